@@ -8,6 +8,9 @@ from typing import Literal
 
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
+from pydantic_ai.models import Model
+
+from agent.ratelimit import RateLimitedModel
 
 
 class MultipleChoiceExercise(BaseModel):
@@ -50,8 +53,8 @@ class FlashcardItem(BaseModel):
     back: str = Field(..., description="Very short answer or definition (at most 3 words, not a full sentence)")
 
 
-class CourseContent(BaseModel):
-    """Full course content as returned by the agent: title, overview, cheatsheet, exercises, and flashcards."""
+class CourseOutline(BaseModel):
+    """Course text without exercises or flashcards: title, overview, and cheatsheet."""
 
     title: str = Field(..., description="Short course title based on the topic")
     overview: str = Field(..., description="One paragraph (2–4 sentences) explaining what the learner will learn")
@@ -59,6 +62,25 @@ class CourseContent(BaseModel):
         ...,
         description="Key facts/formulas/definitions in valid Markdown. Use ### headings for category titles and bullet list items for entries beneath each heading. Never put a category title inside a bullet point.",
     )
+
+
+class ExerciseBatch(BaseModel):
+    """Some of a course's exercises, generated separately from the rest of the course."""
+
+    exercises: list[ExerciseItem] = Field(
+        ..., description="Mix of multiple_choice and matching exercises. Generate exactly the requested count."
+    )
+
+
+class FlashcardBatch(BaseModel):
+    """Some of a course's flashcards, generated separately from the rest of the course."""
+
+    flashcards: list[FlashcardItem] = Field(..., description="Generate exactly the requested count.")
+
+
+class CourseContent(CourseOutline):
+    """Full course content as returned by the agent: title, overview, cheatsheet, exercises, and flashcards."""
+
     exercises: list[ExerciseItem] = Field(
         default_factory=list,
         description="Mix of multiple_choice and matching exercises. Generate exactly the requested count, or 5–8 if not specified.",
@@ -79,8 +101,13 @@ COURSE_GENERATOR_INSTRUCTIONS = """You are an educational content designer. You
 Keep explanations clear and concise. Make exercises fun and instructive. Always respect the difficulty level and any additional instructions."""
 
 
-def get_course_generator_agent(model: str = "openai:gpt-5-mini") -> Agent[None, CourseContent]:
-    """Build the course generator agent with the given model string (e.g. openai:gpt-5-mini)."""
+SECTION_INSTRUCTIONS = f"""{COURSE_GENERATOR_INSTRUCTIONS}
+
+You are writing one part of a course while other parts are written in parallel. Produce only what your output schema asks for. When the request names your batch, cover different aspects of the topic than the other batches so the parts do not repeat each other."""
+
+
+def get_course_generator_agent(model: str | Model = "openai:gpt-5-mini") -> Agent[None, CourseContent]:
+    """Build the course generator agent with the given model or model string (e.g. openai:gpt-5-mini)."""
     return Agent(
         model,
         output_type=CourseContent,
@@ -98,5 +125,16 @@ def get_agent_model() -> str:
 
 @functools.cache
 def get_agent() -> Agent[None, CourseContent]:
-    """Return the default course generator agent (lazy init, model from env or default)."""
-    return get_course_generator_agent(model=get_agent_model())
+    """Return the default course generator agent (lazy init, model from env or default), rate limited."""
+    return get_course_generator_agent(model=RateLimitedModel(get_agent_model()))
+
+
+@functools.cache
+def get_section_agent[T: BaseModel](output_type: type[T]) -> Agent[None, T]:
+    """Return an agent producing one section of a course (see agent.fanout), on the same model as get_agent()."""
+    return Agent(
+        RateLimitedModel(get_agent_model()),
+        output_type=output_type,
+        instructions=SECTION_INSTRUCTIONS,
+        output_retries=3,
+    )
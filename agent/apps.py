@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AgentConfig(AppConfig):
@@ -7,3 +8,18 @@ class AgentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "agent"
     label = "agent"
+
+    def ready(self) -> None:
+        """Configure the LLM rate limiters from the LLM_* settings, sharing their budgets through the cache."""
+        from courseforge.cache import CacheCounterStore
+
+        from .ratelimit import configure_rate_limits
+
+        configure_rate_limits(
+            CacheCounterStore(),
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            cooldown=settings.LLM_RATE_LIMIT_COOLDOWN,
+            retries=settings.LLM_RATE_LIMIT_RETRIES,
+        )
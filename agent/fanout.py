@@ -0,0 +1,137 @@
+"""
+Fan-out course generation: the course is split into independent sections that are generated concurrently
+and merged back into one CourseContent.
+
+One request writes the outline (title, overview, cheatsheet); exercises and flashcards are requested in
+chunks of at most EXERCISES_PER_REQUEST / FLASHCARDS_PER_REQUEST, each chunk told which batch it is so
+the batches cover different ground. Wall time is then roughly that of the slowest section instead of
+growing with the requested counts. Items repeated across batches are dropped when merging.
+"""
+
+import asyncio
+import math
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from agent.agent import (
+    CourseContent,
+    CourseOutline,
+    ExerciseBatch,
+    ExerciseItem,
+    FlashcardBatch,
+    FlashcardItem,
+    get_agent_model,
+    get_section_agent,
+)
+from agent.run_course_gen import build_prompt
+from agent.usage import recorded_run
+
+EXERCISES_PER_REQUEST = 4
+FLASHCARDS_PER_REQUEST = 10
+# Counts used when the request leaves them to the agent (middle of the ranges in the instructions).
+DEFAULT_EXERCISES = 6
+DEFAULT_FLASHCARDS = 8
+
+
+def split_count(total: int, per_request: int) -> list[int]:
+    """Split total into as few chunks of at most per_request as possible, as evenly as possible."""
+    if total <= 0:
+        return []
+    chunks = math.ceil(total / per_request)
+    base, extra = divmod(total, chunks)
+    return [base + 1] * extra + [base] * (chunks - extra)
+
+
+def _normalized(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _exercise_key(item: ExerciseItem) -> str:
+    exercise = item.multiple_choice if item.type == "multiple_choice" else item.matching
+    return f"{item.type}:{_normalized(exercise.question) if exercise else ''}"
+
+
+def _flashcard_key(card: FlashcardItem) -> str:
+    return _normalized(card.front)
+
+
+def _dedupe[T](items: list[T], key: Callable[[T], str], limit: int) -> list[T]:
+    seen: set[str] = set()
+    unique = []
+    for item in items:
+        k = key(item)
+        if k not in seen:
+            seen.add(k)
+            unique.append(item)
+    return unique[:limit]
+
+
+def _batch_prompt(base: str, index: int, total: int) -> str:
+    if total == 1:
+        return base
+    return f"{base}\n\nBatch {index + 1} of {total}."
+
+
+async def _recorded[T](request: Awaitable[T]) -> T:
+    # Record each section's usage as it ends, whether it succeeds, fails, or is cancelled by a failed sibling.
+    with recorded_run():
+        return await request
+
+
+async def run_course_generator_fanout(
+    topic: str,
+    difficulty: str = "beginner",
+    additional_instructions: str | None = None,
+    include_questions: bool = True,
+    num_exercises: int | None = None,
+    include_flashcards: bool = False,
+    num_flashcards: int | None = None,
+) -> tuple[CourseContent, str]:
+    """Generate course content with concurrent section requests and merge them. Returns (content, model_used)."""
+    outline_prompt = build_prompt(topic, difficulty, additional_instructions, include_questions=False)
+    requests: list[Any] = [get_section_agent(CourseOutline).run(outline_prompt)]
+
+    exercise_chunks = split_count(num_exercises or DEFAULT_EXERCISES, EXERCISES_PER_REQUEST)
+    if not include_questions:
+        exercise_chunks = []
+    for i, count in enumerate(exercise_chunks):
+        prompt = build_prompt(topic, difficulty, additional_instructions, num_exercises=count)
+        requests.append(get_section_agent(ExerciseBatch).run(_batch_prompt(prompt, i, len(exercise_chunks))))
+
+    flashcard_chunks = split_count(num_flashcards or DEFAULT_FLASHCARDS, FLASHCARDS_PER_REQUEST)
+    if not include_flashcards:
+        flashcard_chunks = []
+    for i, count in enumerate(flashcard_chunks):
+        prompt = build_prompt(
+            topic,
+            difficulty,
+            additional_instructions,
+            include_questions=False,
+            include_flashcards=True,
+            num_flashcards=count,
+        )
+        requests.append(get_section_agent(FlashcardBatch).run(_batch_prompt(prompt, i, len(flashcard_chunks))))
+
+    # A TaskGroup cancels the other requests as soon as one fails; report that first failure.
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(_recorded(request)) for request in requests]
+    except ExceptionGroup as errors:
+        raise errors.exceptions[0] from errors
+    results = [task.result() for task in tasks]
+    outline = results[0].output
+    exercise_results = results[1 : 1 + len(exercise_chunks)]
+    flashcard_results = results[1 + len(exercise_chunks) :]
+    exercises = [item for result in exercise_results for item in result.output.exercises]
+    flashcards = [card for result in flashcard_results for card in result.output.flashcards]
+    content = CourseContent(
+        **outline.model_dump(),
+        exercises=_dedupe(exercises, _exercise_key, sum(exercise_chunks)),
+        flashcards=_dedupe(flashcards, _flashcard_key, sum(flashcard_chunks)),
+    )
+    return content, get_agent_model()
+
+
+def run_course_generator_fanout_sync(**options: Any) -> tuple[CourseContent, str]:
+    """Blocking wrapper around run_course_generator_fanout, for threads without an event loop."""
+    return asyncio.run(run_course_generator_fanout(**options))
@@ -0,0 +1,363 @@
+"""
+Client-side rate limiting and adaptive concurrency for LLM requests.
+
+get_agent() and get_section_agent() wrap their model in RateLimitedModel, so every generation path (single,
+stream, fan-out, output retries) goes through one RateLimiter per model, which:
+
+- Waits for room in the per-minute budgets of requests (LLM_REQUESTS_PER_MINUTE) and estimated tokens
+  (LLM_TOKENS_PER_MINUTE). Each budget is a counter per model and minute in a CounterStore, refilled every
+  minute, so every client sharing the store draws from the same budget. Token estimates are corrected with
+  the real usage once a response arrives.
+- Caps the requests in flight in this process with an AIMD limit between 1 and LLM_MAX_CONCURRENCY: it
+  starts at half the ceiling, grows by one per limit's worth of healthy responses, and halves on a 429 or
+  when a response takes more than LATENCY_SPIKE_FACTOR times the usual time per output token. Requests
+  over the limit wait until a finishing request hands them its slot.
+- On a 429, pauses every client of the model for LLM_RATE_LIMIT_COOLDOWN seconds (a mark in the store) and
+  retries the request, up to LLM_RATE_LIMIT_RETRIES times, instead of failing the generation.
+
+The module does not depend on Django. By default the limiters keep their counters in this process
+(LocalCounterStore); the Django app configures them from the LLM_* settings with a store on the project's
+cache (see AgentConfig.ready), so processes sharing a file or redis cache share the budgets.
+"""
+
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Protocol
+
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelResponse
+from pydantic_ai.models import KnownModelName, Model, ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+from pydantic_ai.tools import RunContext
+from pydantic_ai.usage import RequestUsage
+
+# A response slower than this many times the running average (per output token) counts as a latency spike.
+LATENCY_SPIKE_FACTOR = 3.0
+# Output tokens assumed for a request until its real usage is known.
+ESTIMATED_OUTPUT_TOKENS = 2000
+_WINDOW_SECONDS = 60
+_LATENCY_WEIGHT = 0.2
+# Decreases closer together than this are one congestion event (requests in flight together fail together).
+_DECREASE_INTERVAL = 2.0
+
+
+def estimate_tokens(messages: list[ModelMessage], parameters: ModelRequestParameters) -> int:
+    """Rough token count of a request (about 4 characters per token) plus ESTIMATED_OUTPUT_TOKENS."""
+    chars = len(ModelMessagesTypeAdapter.dump_json(messages))
+    chars += sum(len(json.dumps(tool.parameters_json_schema)) for tool in parameters.output_tools)
+    return chars // 4 + ESTIMATED_OUTPUT_TOKENS
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether the provider rejected the request for exceeding its rate limit (HTTP 429)."""
+    return isinstance(error, ModelHTTPError) and error.status_code == 429
+
+
+class CounterStore(Protocol):
+    """Where limiters keep what every client of a model shares: the per-minute budgets and the 429 cooldown."""
+
+    async def get(self, key: str) -> Any:
+        """The value at key, or None."""
+        ...
+
+    async def set(self, key: str, value: Any, timeout: float) -> None:
+        """Store value at key for timeout seconds."""
+        ...
+
+    async def incr(self, key: str, delta: int, timeout: float) -> int:
+        """Atomically add delta to the counter at key (created at 0, expiring after timeout); return the result."""
+        ...
+
+
+class LocalCounterStore:
+    """A CounterStore in this process's memory: the limits are shared by its threads and event loops only."""
+
+    def __init__(self) -> None:
+        # key -> (value, monotonic expiry)
+        self._values: dict[str, tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Any:
+        with self._lock:
+            return self._live(key)
+
+    async def set(self, key: str, value: Any, timeout: float) -> None:
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + timeout)
+
+    async def incr(self, key: str, delta: int, timeout: float) -> int:
+        with self._lock:
+            now = time.monotonic()
+            if self._live(key) is None:
+                # A new minute's counter: drop the expired ones so the store stays small.
+                self._values = {k: entry for k, entry in self._values.items() if entry[1] > now}
+                self._values[key] = (0, now + timeout)
+            value, expires = self._values[key]
+            total = int(value) + delta
+            self._values[key] = (total, expires)
+            return total
+
+    def _live(self, key: str) -> Any:
+        value, expires = self._values.get(key, (None, 0.0))
+        return value if expires > time.monotonic() else None
+
+
+class RateLimiter:
+    """Shared request/token budgets, a shared 429 cooldown, and an adaptive in-flight limit for one model."""
+
+    def __init__(
+        self,
+        name: str,
+        store: CounterStore | None = None,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 16,
+        cooldown: float = 10.0,
+        retries: int = 3,
+    ) -> None:
+        self.name = name
+        self.store = store or LocalCounterStore()
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max(1, max_concurrency)
+        self.cooldown = cooldown
+        self.retries = retries
+        self.limit = max(1.0, float(self.max_concurrency // 2))
+        self.in_flight = 0
+        # Running average of healthy responses' seconds per output token.
+        self.latency: float | None = None
+        self._last_decrease = 0.0
+        # Requests come from several threads and event loops (worker pools, run_sync, asyncio.run), so waiting
+        # for a slot uses futures resolved on their own loop rather than an asyncio.Condition bound to one.
+        self._lock = threading.Lock()
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = deque()
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait for the cooldown, the budgets, and an in-flight slot, then take them."""
+        while (wait := await self._cooldown_left()) > 0:
+            await asyncio.sleep(wait)
+        await self._take_slot()
+        try:
+            while (wait := await self._take_budget(tokens)) > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            with self._lock:
+                self.in_flight -= 1
+                self._wake()
+            raise
+
+    async def release(
+        self,
+        estimated_tokens: int,
+        usage: RequestUsage | None = None,
+        seconds: float | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        """Give back the in-flight slot and adapt to the outcome of a request taken with acquire()."""
+        self._release(usage, seconds, error)
+        if usage is not None and self.tokens_per_minute:
+            await self._adjust_tokens(usage.total_tokens - estimated_tokens)
+
+    async def throttled(self) -> None:
+        """Pause every client of this model for the cooldown (after a 429)."""
+        await self.store.set(self._key("cooldown"), time.time() + self.cooldown, timeout=self.cooldown + 1)
+
+    def _release(self, usage: RequestUsage | None, seconds: float | None, error: BaseException | None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            try:
+                self._adapt(usage, seconds, error)
+            finally:
+                self._wake()
+
+    def _adapt(self, usage: RequestUsage | None, seconds: float | None, error: BaseException | None) -> None:
+        if error is not None:
+            if is_rate_limited(error):
+                self._decrease()
+            return
+        sample = seconds / usage.output_tokens if seconds is not None and usage and usage.output_tokens else None
+        if sample is not None and self.latency is not None and sample > LATENCY_SPIKE_FACTOR * self.latency:
+            self._decrease()
+        else:
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        if sample is not None:
+            self.latency = sample if self.latency is None else self.latency + _LATENCY_WEIGHT * (sample - self.latency)
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease >= _DECREASE_INTERVAL:
+            self.limit = max(1.0, self.limit / 2)
+            self._last_decrease = now
+
+    async def _take_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            except BaseException:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+                    else:
+                        # Woken, but giving up: pass the free slot on to the next waiter.
+                        self._wake()
+                raise
+
+    def _wake(self) -> None:
+        """Wake as many waiters as there are free slots. Call with the lock held."""
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            loop, waiter = self._waiters.popleft()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_resolve, waiter)
+                free -= 1
+
+    async def _cooldown_left(self) -> float:
+        until = await self.store.get(self._key("cooldown"))
+        return max(0.0, until - time.time()) if until else 0.0
+
+    async def _take_budget(self, tokens: int) -> float:
+        """Take one request and tokens from this minute's budgets; returns 0, or the seconds until the next minute."""
+        now = time.time()
+        window = int(now // _WINDOW_SECONDS)
+        taken: list[tuple[str, int]] = []
+        for budget, amount, limit in (
+            ("requests", 1, self.requests_per_minute),
+            ("tokens", tokens, self.tokens_per_minute),
+        ):
+            if not limit:
+                continue
+            key = self._key(budget, window)
+            used = await self._incr(key, amount)
+            taken.append((key, amount))
+            # A request larger than the whole budget still goes through, alone, in a fresh minute.
+            if used > limit and used != amount:
+                for taken_key, taken_amount in taken:
+                    await self._incr(taken_key, -taken_amount)
+                return _WINDOW_SECONDS - now % _WINDOW_SECONDS
+        return 0.0
+
+    async def _adjust_tokens(self, delta: int) -> None:
+        if delta:
+            await self._incr(self._key("tokens", int(time.time() // _WINDOW_SECONDS)), delta)
+
+    async def _incr(self, key: str, delta: int) -> int:
+        # Keys outlive their minute so late corrections still land.
+        return await self.store.incr(key, delta, timeout=2 * _WINDOW_SECONDS)
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join(str(part) for part in ("llm-limit", self.name, *parts))
+
+
+def _resolve(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+# Store and RateLimiter keyword arguments of the limiters get_rate_limiter creates (see configure_rate_limits).
+_store: CounterStore | None = None
+_limits: dict[str, Any] = {}
+
+
+def configure_rate_limits(store: CounterStore | None = None, **limits: Any) -> None:
+    """Set the store and limits (RateLimiter keyword arguments) of every model's shared limiter.
+
+    Called once at startup; limiters created before keep their configuration.
+    """
+    global _store, _limits
+    _store, _limits = store, limits
+    get_rate_limiter.cache_clear()
+
+
+def update_rate_limits(**limits: Any) -> None:
+    """Change some limits of every model's shared limiter, keeping the store and the other limits."""
+    configure_rate_limits(_store, **{**_limits, **limits})
+
+
+@functools.cache
+def get_rate_limiter(model: str) -> RateLimiter:
+    """The process-wide RateLimiter of a model, with the store and limits from configure_rate_limits."""
+    return RateLimiter(model, _store, **_limits)
+
+
+class RateLimitedModel(WrapperModel):
+    """A model whose requests go through a RateLimiter (by default the shared one for the model string)."""
+
+    def __init__(self, wrapped: Model | KnownModelName | str, limiter: RateLimiter | None = None) -> None:
+        super().__init__(wrapped)  # type: ignore[arg-type]
+        self.limiter = limiter or get_rate_limiter(wrapped if isinstance(wrapped, str) else self.wrapped.model_name)
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        tokens = estimate_tokens(messages, model_request_parameters)
+        attempt = 0
+        while True:
+            await self.limiter.acquire(tokens)
+            started = time.monotonic()
+            try:
+                response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+            except BaseException as e:
+                if not await self._retry(tokens, e, attempt):
+                    raise
+                attempt += 1
+                continue
+            await self.limiter.release(tokens, response.usage, time.monotonic() - started)
+            return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+        run_context: RunContext[Any] | None = None,
+    ) -> AsyncIterator[StreamedResponse]:
+        # Only opening the stream is retried: once events have been consumed the request cannot be replayed.
+        # Streams give no latency sample (their duration includes the consumer's work).
+        tokens = estimate_tokens(messages, model_request_parameters)
+        attempt = 0
+        while True:
+            await self.limiter.acquire(tokens)
+            stack = AsyncExitStack()
+            try:
+                stream = await stack.enter_async_context(
+                    self.wrapped.request_stream(messages, model_settings, model_request_parameters, run_context)
+                )
+            except BaseException as e:
+                if not await self._retry(tokens, e, attempt):
+                    raise
+                attempt += 1
+                continue
+            break
+        try:
+            async with stack:
+                yield stream
+        except BaseException as e:
+            await self.limiter.release(tokens, stream.usage(), error=e)
+            raise
+        await self.limiter.release(tokens, stream.usage())
+
+    async def _retry(self, tokens: int, error: BaseException, attempt: int) -> bool:
+        """Release a failed request; on a 429 start the shared cooldown and say whether to try again."""
+        await self.limiter.release(tokens, error=error)
+        if not is_rate_limited(error):
+            return False
+        await self.limiter.throttled()
+        return attempt < self.limiter.retries
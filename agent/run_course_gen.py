@@ -1,12 +1,32 @@
 """
-Thin wrapper to run the course generator agent. Called by Django views.
+Thin wrapper to run the course generator agent. Called by the generation workers.
 Returns (CourseContent, model_name) or raises on failure.
+
+run_course_generator is the native async entry point (one coroutine per generation, so a single
+event loop can drive many concurrent LLM calls); run_course_generator_sync blocks a thread until done.
+stream_course_generator yields partial content while the response streams in.
+Each reports its token usage to agent.usage.track_usage().
 """
 
+from collections.abc import AsyncIterator
+from typing import TypedDict, Unpack
+
 from agent.agent import CourseContent, get_agent, get_agent_model
+from agent.usage import record_usage, recorded_run
+
+
+class GenerationOptions(TypedDict, total=False):
+    """Optional request settings accepted by build_prompt and every generator entry point."""
 
+    difficulty: str
+    additional_instructions: str | None
+    include_questions: bool
+    num_exercises: int | None
+    include_flashcards: bool
+    num_flashcards: int | None
 
-def run_course_generator_sync(
+
+def build_prompt(
     topic: str,
     difficulty: str = "beginner",
     additional_instructions: str | None = None,
@@ -14,8 +34,8 @@ def run_course_generator_sync(
     num_exercises: int | None = None,
     include_flashcards: bool = False,
     num_flashcards: int | None = None,
-) -> tuple[CourseContent, str]:
-    """Generate course content for the given topic and options. Blocks until done. Returns (content, model_used)."""
+) -> str:
+    """Build the structured user prompt the course generator agent expects."""
     parts = [f"Topic: {topic.strip()}", f"Difficulty: {difficulty.strip().capitalize()}"]
     if additional_instructions and additional_instructions.strip():
         parts.append(f"Additional instructions: {additional_instructions.strip()}")
@@ -32,10 +52,41 @@ def run_course_generator_sync(
             content_bits.append("Flashcards")
     if content_bits:
         parts.append(f"Content to generate: {", ".join(content_bits)}")
-    prompt = "\n\n".join(parts)
-    agent = get_agent()
-    result = agent.run_sync(prompt)
-    output = result.output
+    return "\n\n".join(parts)
+
+
+def _checked(output: CourseContent | None) -> tuple[CourseContent, str]:
     if not output:
         raise RuntimeError("Agent returned no output")
     return output, get_agent_model()
+
+
+async def run_course_generator(topic: str, **options: Unpack[GenerationOptions]) -> tuple[CourseContent, str]:
+    """Generate course content for the given topic and options without blocking the event loop."""
+    with recorded_run():
+        result = await get_agent().run(build_prompt(topic, **options))
+    return _checked(result.output)
+
+
+def run_course_generator_sync(topic: str, **options: Unpack[GenerationOptions]) -> tuple[CourseContent, str]:
+    """Generate course content for the given topic and options. Blocks until done. Returns (content, model_used)."""
+    with recorded_run():
+        result = get_agent().run_sync(build_prompt(topic, **options))
+    return _checked(result.output)
+
+
+async def stream_course_generator(topic: str, **options: Unpack[GenerationOptions]) -> AsyncIterator[CourseContent]:
+    """Generate course content, yielding partial CourseContent as the structured response streams in.
+
+    Fields arrive in order (title, overview, cheatsheet, exercises, flashcards). In a partial output only
+    the last exercise or flashcard, or the last text field, may still be incomplete. The last item yielded
+    is the complete, validated output.
+    """
+    async with get_agent().run_stream(build_prompt(topic, **options)) as result:
+        try:
+            async for partial in result.stream_output():
+                yield partial
+            output = await result.get_output()
+        finally:
+            record_usage(result.usage())
+    yield _checked(output)[0]
@@ -1,13 +1,30 @@
-"""Unit tests for the course generator agent (no Django, no LLM call)."""
+"""Unit tests for the course generator agent and its rate limiter (no Django, no LLM call)."""
 
+import asyncio
+import json
 import os
+import threading
+import time
+import uuid
+from typing import Any
+from unittest.mock import patch
 
 import pytest
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError, UnexpectedModelBehavior
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+from pydantic_ai.usage import RequestUsage
 
 from agent.agent import (
     CourseContent,
+    FlashcardBatch,
     get_course_generator_agent,
 )
+from agent.fanout import run_course_generator_fanout, split_count
+from agent.ratelimit import LocalCounterStore, RateLimitedModel, RateLimiter
+from agent.run_course_gen import build_prompt, run_course_generator, stream_course_generator
+from agent.usage import track_usage
 
 
 def test_course_content_model_parses_valid_output() -> None:
@@ -62,3 +79,271 @@ def test_get_agent_returns_agent() -> None:
     agent = get_course_generator_agent(model="openai:gpt-4o-mini")
     assert agent is not None
     assert agent.output_type is CourseContent
+
+
+def test_build_prompt_includes_requested_content() -> None:
+    """build_prompt lists topic, difficulty, instructions, and the requested content counts."""
+    prompt = build_prompt(
+        " Rust ownership ",
+        difficulty="advanced",
+        additional_instructions="use examples",
+        num_exercises=5,
+        include_flashcards=True,
+    )
+    assert prompt.split("\n\n") == [
+        "Topic: Rust ownership",
+        "Difficulty: Advanced",
+        "Additional instructions: use examples",
+        "Content to generate: Questions (5), Flashcards",
+    ]
+
+
+def test_run_course_generator_awaits_agent() -> None:
+    """run_course_generator runs the agent natively async and returns (content, model)."""
+    agent = get_course_generator_agent(model="test")
+    with patch("agent.run_course_gen.get_agent", return_value=agent):
+        content, model = asyncio.run(run_course_generator("Rust"))
+    assert isinstance(content, CourseContent)
+    assert model
+
+
+def test_track_usage_counts_tokens_and_output_retries() -> None:
+    """Usage of the runs inside track_usage() is summed; a request repeated after invalid output is a retry."""
+    data = {"title": "Rust", "overview": "Learn Rust.", "cheatsheet": "- moves", "exercises": [], "flashcards": []}
+    calls = 0
+
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        nonlocal calls
+        calls += 1
+        args = {"title": "Rust"} if calls == 1 else data
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, args)])
+
+    agent = Agent(FunctionModel(respond), output_type=CourseContent)
+    with patch("agent.run_course_gen.get_agent", return_value=agent), track_usage() as usage:
+        asyncio.run(run_course_generator("Rust"))
+    assert usage.requests == 2
+    assert usage.output_retries == 1
+    assert usage.prompt_tokens > 0
+    assert usage.completion_tokens > 0
+
+
+def test_track_usage_counts_runs_that_fail() -> None:
+    """A run that exhausts its output retries still reports the tokens and retries it used."""
+
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {"title": "Rust"})])
+
+    agent = Agent(FunctionModel(respond), output_type=CourseContent, output_retries=2)
+    with (
+        patch("agent.run_course_gen.get_agent", return_value=agent),
+        track_usage() as usage,
+        pytest.raises(UnexpectedModelBehavior),
+    ):
+        asyncio.run(run_course_generator("Rust"))
+    assert usage.requests == 3
+    assert usage.output_retries == 2
+    assert usage.prompt_tokens > 0
+    assert usage.completion_tokens > 0
+
+
+def test_stream_course_generator_yields_partial_then_complete_output() -> None:
+    """stream_course_generator yields growing partial outputs and ends with the validated content."""
+    data = {
+        "title": "Rust",
+        "overview": "Learn Rust.",
+        "cheatsheet": "### Ownership\n- moves",
+        "exercises": [],
+        "flashcards": [{"front": f"Term {i}", "back": "Meaning"} for i in range(3)],
+    }
+
+    async def stream_json(messages, info: AgentInfo):
+        text = json.dumps(data)
+        for start in range(0, len(text), 20):
+            name = info.output_tools[0].name if start == 0 else None
+            yield {0: DeltaToolCall(name=name, json_args=text[start : start + 20])}
+
+    agent = Agent(FunctionModel(stream_function=stream_json), output_type=CourseContent)
+
+    async def collect() -> list[CourseContent]:
+        return [partial async for partial in stream_course_generator("Rust")]
+
+    with patch("agent.run_course_gen.get_agent", return_value=agent):
+        outputs = asyncio.run(collect())
+    assert len(outputs) > 2
+    assert [len(o.flashcards) for o in outputs] == sorted(len(o.flashcards) for o in outputs)
+    assert outputs[-1] == CourseContent.model_validate(data)
+
+
+def test_split_count_balances_chunks() -> None:
+    """split_count uses as few chunks as the limit allows and keeps them within one of each other."""
+    assert split_count(10, 4) == [4, 3, 3]
+    assert split_count(4, 4) == [4]
+    assert split_count(0, 4) == []
+
+
+def test_fanout_generates_sections_concurrently_and_merges() -> None:
+    """The outline and each chunk are separate concurrent requests; duplicates across batches are dropped."""
+    prompts: list[str] = []
+    in_flight = peak = 0
+
+    async def section(messages, info: AgentInfo) -> ModelResponse:
+        nonlocal in_flight, peak
+        prompt = messages[-1].parts[-1].content
+        prompts.append(prompt)
+        call = len(prompts)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        tool = info.output_tools[0]
+        fields = tool.parameters_json_schema["properties"]
+        args: dict[str, Any]
+        if "title" in fields:
+            args = {"title": "Rust", "overview": "Learn Rust.", "cheatsheet": "### Ownership"}
+        elif "exercises" in fields:
+            count = int(prompt.split("Questions (")[1].split(")")[0])
+            # Every batch repeats "Q0", so merging has a duplicate to drop.
+            args = {
+                "exercises": [
+                    {
+                        "type": "multiple_choice",
+                        "multiple_choice": {
+                            "question": "Q0" if i == 0 else f"Q{call}-{i}",
+                            "options": ["a", "b", "c", "d"],
+                            "correct_index": 0,
+                            "explanation": "a",
+                        },
+                    }
+                    for i in range(count)
+                ]
+            }
+        else:
+            args = {"flashcards": [{"front": f"Term {call}", "back": "Meaning"}]}
+        return ModelResponse(parts=[ToolCallPart(tool.name, args)])
+
+    def section_agent(output_type):
+        return Agent(FunctionModel(section), output_type=output_type)
+
+    with patch("agent.fanout.get_section_agent", side_effect=section_agent), track_usage() as usage:
+        content, model = asyncio.run(
+            run_course_generator_fanout("Rust", num_exercises=10, include_flashcards=True, num_flashcards=2)
+        )
+    # Outline + 3 exercise chunks (4, 3, 3) + 1 flashcard chunk, all in flight together.
+    assert len(prompts) == 5
+    assert peak == 5
+    assert usage.requests == 5
+    assert sum("Batch 2 of 3." in p for p in prompts) == 1
+    assert content.title == "Rust"
+    questions = [e.multiple_choice.question for e in content.exercises if e.multiple_choice]
+    assert questions.count("Q0") == 1
+    assert len(questions) == 8
+    assert len(content.flashcards) == 1
+    assert model
+
+
+def _limiter(**options) -> RateLimiter:
+    return RateLimiter(f"test-{uuid.uuid4()}", **options)
+
+
+def test_rate_limited_model_backs_off_and_retries_after_429() -> None:
+    """A 429 halves the in-flight limit, starts the shared cooldown, and the request is retried."""
+    data = {"title": "Rust", "overview": "Learn Rust.", "cheatsheet": "- moves", "exercises": [], "flashcards": []}
+    calls = 0
+
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ModelHTTPError(429, "test", {"error": "rate limited"})
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, data)])
+
+    limiter = _limiter(max_concurrency=8, cooldown=0.05, retries=2)
+    agent = Agent(RateLimitedModel(FunctionModel(respond), limiter), output_type=CourseContent)
+    started = time.monotonic()
+    result = agent.run_sync("Rust")
+    assert result.output.title == "Rust"
+    assert calls == 2
+    assert time.monotonic() - started >= 0.04
+    assert limiter.limit < 4
+    assert limiter.in_flight == 0
+
+
+def test_rate_limited_model_gives_up_after_retries() -> None:
+    """Past the retry limit the 429 reaches the caller."""
+
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        raise ModelHTTPError(429, "test")
+
+    limiter = _limiter(cooldown=0.0, retries=1)
+    agent = Agent(RateLimitedModel(FunctionModel(respond), limiter), output_type=CourseContent)
+    with pytest.raises(ModelHTTPError):
+        agent.run_sync("Rust")
+    assert limiter.in_flight == 0
+
+
+def test_limiter_caps_requests_in_flight() -> None:
+    """Concurrent requests beyond the adaptive limit wait for a slot."""
+    limiter = _limiter(max_concurrency=4)
+    in_flight = peak = 0
+
+    async def respond(messages, info: AgentInfo) -> ModelResponse:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {"flashcards": []})])
+
+    agent = Agent(RateLimitedModel(FunctionModel(respond), limiter), output_type=FlashcardBatch)
+
+    async def run_all() -> None:
+        await asyncio.gather(*(agent.run("Rust") for _ in range(6)))
+
+    asyncio.run(run_all())
+    assert peak == 2
+
+
+def test_limiter_adapts_to_latency() -> None:
+    """Healthy responses raise the limit additively; a latency spike halves it."""
+    limiter = _limiter(max_concurrency=8)
+
+    async def request(seconds: float) -> None:
+        await limiter.acquire(0)
+        await limiter.release(0, RequestUsage(output_tokens=100), seconds=seconds)
+
+    for _ in range(4):
+        asyncio.run(request(1.0))
+    raised = limiter.limit
+    assert raised > 4
+    asyncio.run(request(10.0))
+    assert limiter.limit == raised / 2
+
+
+def test_release_hands_slot_to_waiter_on_another_loop() -> None:
+    """A request waiting for a slot in one thread's event loop is woken by a release from another thread."""
+    limiter = _limiter(max_concurrency=2)
+    asyncio.run(limiter.acquire(0))
+    acquired = threading.Event()
+
+    def wait_for_slot() -> None:
+        asyncio.run(limiter.acquire(0))
+        acquired.set()
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    assert not acquired.wait(0.1)
+    asyncio.run(limiter.release(0))
+    assert acquired.wait(1)
+    waiter.join()
+    assert limiter.in_flight == 1
+
+
+def test_request_budget_is_shared_through_the_store() -> None:
+    """Limiters for the same model sharing a store (processes sharing a cache) draw from one per-minute budget."""
+    store = LocalCounterStore()
+    first, second = (RateLimiter("test", store, requests_per_minute=2, tokens_per_minute=1000) for _ in range(2))
+    assert asyncio.run(first._take_budget(100)) == 0
+    assert asyncio.run(second._take_budget(100)) == 0
+    assert asyncio.run(first._take_budget(100)) > 0
+    # A refused request takes nothing from the token budget either.
+    assert asyncio.run(store.get(first._key("tokens", int(time.time() // 60)))) == 200
@@ -0,0 +1,74 @@
+"""
+Token usage of the agent runs made for one generation.
+
+The generators record each run's usage with record_usage, also for runs that raise (see recorded_run);
+a caller that wants the totals wraps the generation in track_usage(). The tracker lives in a context variable, so it follows the generation
+into the tasks of a fan-out (which copy the context) without changing what the generators return.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from pydantic_ai import capture_run_messages
+from pydantic_ai.messages import ModelResponse
+from pydantic_ai.usage import RunUsage
+
+
+@dataclass
+class GenerationUsage:
+    """Totals over every agent run of a generation."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    requests: int = 0
+    # Requests beyond the first of each run: the model was asked again because its output failed validation.
+    output_retries: int = 0
+
+    def add(self, usage: RunUsage) -> None:
+        """Add one agent run's usage."""
+        self.prompt_tokens += usage.input_tokens
+        self.completion_tokens += usage.output_tokens
+        self.requests += usage.requests
+        self.output_retries += max(0, usage.requests - 1)
+
+
+_current: ContextVar[GenerationUsage | None] = ContextVar("generation_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[GenerationUsage]:
+    """Collect the usage of the agent runs made inside the block."""
+    usage = GenerationUsage()
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+def record_usage(usage: RunUsage) -> None:
+    """Add an agent run's usage to the enclosing track_usage() block, if any."""
+    current = _current.get()
+    if current is not None:
+        current.add(usage)
+
+
+@contextmanager
+def recorded_run() -> Iterator[None]:
+    """Record the usage of the agent run (run or run_sync) made inside the block, also when it raises.
+
+    A failed run returns no result to read usage from, e.g. UnexpectedModelBehavior once the output retries
+    are used up, so the usage is summed from the run's messages: one per model response.
+    """
+    with capture_run_messages() as messages:
+        try:
+            yield
+        finally:
+            usage = RunUsage()
+            for message in messages:
+                if isinstance(message, ModelResponse):
+                    usage.requests += 1
+                    usage.incr(message.usage)
+            record_usage(usage)
@@ -1,7 +1,9 @@
 """
 ASGI config for courseforge project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+It exposes the ASGI callable as a module-level variable named ``application``. Serving it (e.g. with
+``uvicorn courseforge.asgi:application``) is what enables the server-sent event stream at
+``/courses/api/events/``; under WSGI the browser falls back to polling.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
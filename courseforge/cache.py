@@ -0,0 +1,124 @@
+"""Helpers on top of Django's default cache: readable keys and stampede protection.
+
+- make_key joins key parts with ":" and hashes keys that are too long or contain unsafe characters.
+- get_or_compute returns a cached value or computes it, making sure only one caller recomputes a given
+  key at a time (see its docstring).
+- CacheCounterStore keeps the LLM rate limits (agent.ratelimit) in the cache, shared by every process using it.
+"""
+
+import hashlib
+import math
+import random
+import time
+from collections.abc import Callable
+from typing import Any, cast
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+# Longest key used as-is (memcached allows 250 bytes, including the backend's key prefix).
+_MAX_KEY_LENGTH = 200
+# Seconds between checks while waiting for another caller to finish computing a key.
+_WAIT_STEP = 0.05
+
+
+def make_key(*parts: Any) -> str:
+    """Join parts into a cache key; keys that are too long or contain whitespace are hashed."""
+    key = ":".join(str(part) for part in parts)
+    if len(key) > _MAX_KEY_LENGTH or any(c.isspace() or not c.isprintable() for c in key):
+        return f"{parts[0]}:{hashlib.sha256(key.encode()).hexdigest()}"
+    return key
+
+
+def get_or_compute[T](
+    key: str,
+    compute: Callable[[], T],
+    timeout: float,
+    *,
+    should_cache: Callable[[T], bool] | None = None,
+    beta: float = 1.0,
+    lock_timeout: float = 30.0,
+    wait: float = 5.0,
+) -> T:
+    """Return the cached value for key, or compute, cache (if should_cache allows), and return it.
+
+    Protects against stampedes on hot keys in two ways:
+
+    - Early recomputation: entries remember when they expire and how long they took to compute. Shortly
+      before expiry each reader recomputes with a probability that grows as expiry approaches (scaled by
+      compute time and beta), so one reader refreshes a hot key while the others keep reading the old value.
+    - Locking on a miss: cache.add on a lock key lets a single caller compute; the others wait up to wait
+      seconds for its result and compute themselves only if none arrives (e.g. the lock holder failed).
+    """
+    lock_key = make_key(key, "lock")
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires_at, duration = entry
+        if time.time() - duration * beta * math.log(1.0 - random.random()) < expires_at:
+            return cast(T, value)
+        if not cache.add(lock_key, 1, lock_timeout):
+            return cast(T, value)
+        return _compute_and_store(key, lock_key, compute, timeout, should_cache)
+
+    if cache.add(lock_key, 1, lock_timeout):
+        return _compute_and_store(key, lock_key, compute, timeout, should_cache)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(_WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return cast(T, entry[0])
+        if cache.get(lock_key) is None:
+            # Released without storing a value (not cacheable, or compute failed): compute our own.
+            break
+    return _compute_and_store(key, None, compute, timeout, should_cache)
+
+
+def _compute_and_store[T](
+    key: str,
+    lock_key: str | None,
+    compute: Callable[[], T],
+    timeout: float,
+    should_cache: Callable[[T], bool] | None,
+) -> T:
+    try:
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        if should_cache is None or should_cache(value):
+            cache.set(key, (value, finished + timeout, finished - started), timeout)
+        return value
+    finally:
+        if lock_key is not None:
+            cache.delete(lock_key)
+
+
+class CacheCounterStore:
+    """An agent.ratelimit.CounterStore on the default cache.
+
+    Calls run on the shared thread pool (thread_sensitive=False) rather than through Django's a* cache
+    methods. Those run on the thread-sensitive executor, which is the blocked caller's own thread when a
+    limiter runs inside run_sync from a request or an async_to_sync call. The default aincr is also a get
+    followed by a set, which would lose concurrent updates to a budget.
+    """
+
+    async def get(self, key: str) -> Any:
+        return await sync_to_async(cache.get, thread_sensitive=False)(make_key(key))
+
+    async def set(self, key: str, value: Any, timeout: float) -> None:
+        await sync_to_async(cache.set, thread_sensitive=False)(make_key(key), value, math.ceil(timeout))
+
+    async def incr(self, key: str, delta: int, timeout: float) -> int:
+        return await sync_to_async(self._incr, thread_sensitive=False)(make_key(key), delta, math.ceil(timeout))
+
+    @staticmethod
+    def _incr(key: str, delta: int, timeout: int) -> int:
+        # incr() is atomic on the locmem, redis, and memcached backends (the file backend can lose a concurrent
+        # update, loosening the budget slightly).
+        cache.add(key, 0, timeout=timeout)
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # Expired between add() and incr().
+            cache.set(key, delta, timeout=timeout)
+            return delta
@@ -104,6 +104,30 @@ _default_db = (
 DATABASES = {"default": _default_db}
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# COURSEFORGE_CACHE_BACKEND: "locmem" (per process), "file" (shared by the processes on one host), "redis"
+# (shared across hosts; any Redis-protocol server, requires the redis package), or "dummy" (no caching).
+
+_CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "courseforge"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", str(BASE_DIR / ".cache")),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://localhost:6379/0"),
+    "dummy": ("django.core.cache.backends.dummy.DummyCache", ""),
+}
+_cache_backend, _cache_location = _CACHE_BACKENDS[os.environ.get("COURSEFORGE_CACHE_BACKEND", "locmem")]
+_default_cache = {
+    "BACKEND": _cache_backend,
+    "LOCATION": os.environ.get("COURSEFORGE_CACHE_LOCATION", _cache_location),
+    "TIMEOUT": int(os.environ.get("COURSEFORGE_CACHE_TIMEOUT", "300")),
+    "KEY_PREFIX": os.environ.get("COURSEFORGE_CACHE_KEY_PREFIX", "courseforge"),
+}
+if _cache_backend.endswith(("LocMemCache", "FileBasedCache")):
+    # Size bound for the local backends; Redis is bounded by its own maxmemory policy.
+    _default_cache["OPTIONS"] = {"MAX_ENTRIES": int(os.environ.get("COURSEFORGE_CACHE_MAX_ENTRIES", "5000"))}
+CACHES = {"default": _default_cache}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -150,3 +174,48 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 LOGIN_REDIRECT_URL = "dashboard"
 LOGOUT_REDIRECT_URL = "home"
+
+# Courses per page on the browse page and its infinite-scroll endpoint.
+COURSE_LIST_PAGE_SIZE = int(os.environ.get("COURSEFORGE_COURSE_LIST_PAGE_SIZE", "24"))
+
+# Seconds course pages stay in the page/fragment cache. Keys carry the course version, so edits take
+# effect immediately regardless.
+COURSE_PAGE_CACHE_TTL = int(os.environ.get("COURSEFORGE_COURSE_PAGE_CACHE_TTL", str(24 * 3600)))
+
+# Server-sent event stream (courses/api/events/, served under ASGI): seconds between checks for changes,
+# between keep-alive comments, and before the stream is closed for the browser to reconnect.
+EVENT_STREAM_INTERVAL = float(os.environ.get("COURSEFORGE_EVENT_STREAM_INTERVAL", "3"))
+EVENT_STREAM_HEARTBEAT = float(os.environ.get("COURSEFORGE_EVENT_STREAM_HEARTBEAT", "20"))
+EVENT_STREAM_MAX_AGE = float(os.environ.get("COURSEFORGE_EVENT_STREAM_MAX_AGE", "300"))
+
+
+# Course generation worker (manage.py run_generation_workers)
+
+# "asyncio" multiplexes generations as coroutines on one thread; "threads" uses one thread per generation.
+GENERATION_WORKER_ENGINE = os.environ.get("COURSEFORGE_WORKER_ENGINE", "asyncio")
+GENERATION_WORKER_CONCURRENCY = int(os.environ.get("COURSEFORGE_WORKER_CONCURRENCY", "4"))
+GENERATION_WORKER_POLL_INTERVAL = float(os.environ.get("COURSEFORGE_WORKER_POLL_INTERVAL", "2"))
+# Seconds between heartbeats; a running job without a heartbeat for GENERATION_STALE_AFTER is re-queued.
+GENERATION_HEARTBEAT_INTERVAL = float(os.environ.get("COURSEFORGE_WORKER_HEARTBEAT_INTERVAL", "10"))
+GENERATION_STALE_AFTER = float(os.environ.get("COURSEFORGE_WORKER_STALE_AFTER", "120"))
+GENERATION_MAX_ATTEMPTS = int(os.environ.get("COURSEFORGE_WORKER_MAX_ATTEMPTS", "3"))
+
+# How the agent is called: "single" waits for the whole course; "stream" persists the course while the
+# structured output streams in, so learners can open it within seconds; "fanout" generates the outline and
+# chunks of exercises and flashcards concurrently, and allows larger counts in the create form.
+GENERATION_STRATEGY = os.environ.get("COURSEFORGE_GENERATION_STRATEGY", "single")
+
+# Seconds an identical generation request (same normalized topic, options, and model) reuses an existing
+# course instead of calling the LLM. 0 disables the cache.
+GENERATION_CACHE_TTL = int(os.environ.get("COURSEFORGE_GENERATION_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Client-side limits on LLM requests (see agent.ratelimit). The per-minute budgets are counted in the cache,
+# so they are shared by every process using a shared backend (file or redis); 0 means unlimited.
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("COURSEFORGE_LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("COURSEFORGE_LLM_TOKENS_PER_MINUTE", "0"))
+# Ceiling of the adaptive per-process limit on requests in flight, which halves on 429s and latency spikes.
+LLM_MAX_CONCURRENCY = int(os.environ.get("COURSEFORGE_LLM_MAX_CONCURRENCY", "16"))
+# After a 429, every client of the model pauses this many seconds, then the request is retried (up to
+# LLM_RATE_LIMIT_RETRIES times) instead of failing the generation.
+LLM_RATE_LIMIT_COOLDOWN = float(os.environ.get("COURSEFORGE_LLM_RATE_LIMIT_COOLDOWN", "10"))
+LLM_RATE_LIMIT_RETRIES = int(os.environ.get("COURSEFORGE_LLM_RATE_LIMIT_RETRIES", "3"))
@@ -0,0 +1,116 @@
+"""Tests for the courseforge.cache helpers."""
+
+import asyncio
+import threading
+import time
+from importlib.util import find_spec
+from typing import cast
+from unittest import skipUnless
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.test import SimpleTestCase, override_settings
+
+from .cache import CacheCounterStore, get_or_compute, make_key
+
+# Installed with the dev dependencies; the redis tests are skipped without it.
+HAS_FAKEREDIS = find_spec("fakeredis") is not None
+
+
+class CacheHelperTests(SimpleTestCase):
+    """Tests for cache keys, counters, and stampede protection, on the default (locmem) cache."""
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_make_key_hashes_unsafe_keys(self) -> None:
+        """Short, printable keys are kept readable; long or whitespace keys are hashed under their first part."""
+        self.assertEqual(make_key("course-page", "detail", 3, 17), "course-page:detail:3:17")
+        hashed = make_key("topic", "intro to python")
+        self.assertTrue(hashed.startswith("topic:"))
+        self.assertNotIn(" ", hashed)
+        self.assertLessEqual(len(make_key("x", "y" * 500)), 80)
+
+    def test_counters_add_and_incr(self) -> None:
+        """add creates a counter only once, incr bumps it, and incr of a missing key raises ValueError.
+
+        The change counters (courses.changes) and the LLM rate limits (agent.ratelimit) rely on this.
+        """
+        self.assertTrue(cache.add("counter", 10, 60))
+        self.assertFalse(cache.add("counter", 0, 60))
+        self.assertEqual(cache.incr("counter", 5), 15)
+        self.assertEqual(cache.get("counter"), 15)
+        with self.assertRaises(ValueError):
+            cache.incr("missing")
+
+    def test_counter_store_shares_rate_limit_counters(self) -> None:
+        """The rate limiters' CacheCounterStore counts through the cache, starting missing counters at 0."""
+        store = CacheCounterStore()
+
+        async def count() -> list[int]:
+            return [await store.incr("llm-limit:m:requests:1", delta, 120) for delta in (1, 1, -1)]
+
+        self.assertEqual(asyncio.run(count()), [1, 2, 1])
+        asyncio.run(store.set("llm-limit:m:cooldown", 12.5, 0.5))
+        self.assertEqual(asyncio.run(store.get("llm-limit:m:cooldown")), 12.5)
+
+    def test_concurrent_misses_compute_once(self) -> None:
+        """Callers that miss while another caller computes wait for its result instead of recomputing."""
+        calls = []
+
+        def compute() -> str:
+            calls.append(1)
+            time.sleep(0.2)
+            return "page"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_compute("hot", compute, 60))) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["page"] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_should_cache_rejects_value(self) -> None:
+        """Values rejected by should_cache are returned but not stored."""
+        self.assertEqual(get_or_compute("k", lambda: 404, 60, should_cache=lambda v: v == 200), 404)
+        self.assertEqual(get_or_compute("k", lambda: 200, 60, should_cache=lambda v: v == 200), 200)
+        self.assertEqual(get_or_compute("k", lambda: 500, 60), 200)
+
+    def test_entry_near_expiry_is_recomputed_by_one_caller(self) -> None:
+        """An entry in its early-recompute window is refreshed by the caller holding the lock; others get the old value."""
+        # Expires now and took long to compute: always inside the early-recompute window.
+        cache.set("k", ("old", time.time(), 1000.0), 60)
+        cache.add(make_key("k", "lock"), 1, 30)
+        self.assertEqual(get_or_compute("k", lambda: "new", 60), "old")
+        cache.delete(make_key("k", "lock"))
+        self.assertEqual(get_or_compute("k", lambda: "new", 60), "new")
+
+
+@skipUnless(HAS_FAKEREDIS, "requires the fakeredis package")
+class RedisCacheHelperTests(CacheHelperTests):
+    """The same tests on the redis backend (COURSEFORGE_CACHE_BACKEND=redis), against a fakeredis server on localhost."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        from fakeredis import TcpFakeServer
+
+        server = TcpFakeServer(("127.0.0.1", 0))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(server.server_close)
+        cls.addClassCleanup(server.shutdown)
+        host, port = cast(tuple[str, int], server.server_address)
+        redis_cache = {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": f"redis://{host}:{port}/0",
+            "KEY_PREFIX": "courseforge",
+        }
+        cls.enterClassContext(override_settings(CACHES={"default": redis_cache}))
+        super().setUpClass()
+
+    def test_backend_is_redis(self) -> None:
+        """The tests above really went through the redis backend."""
+        self.assertIsInstance(caches["default"], RedisCache)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Course, Exercise
+from .models import Course, CourseGenerationJob, Exercise
 
 
 @admin.register(Course)
@@ -16,3 +16,34 @@ class ExerciseAdmin(admin.ModelAdmin):
 
     list_display = ("course", "order_index", "exercise_type", "question")
     list_filter = ("exercise_type",)
+
+
+@admin.register(CourseGenerationJob)
+class CourseGenerationJobAdmin(admin.ModelAdmin):
+    """Admin for CourseGenerationJob: status, model, tokens, and stage latencies; filter by status and model."""
+
+    list_display = (
+        "topic",
+        "status",
+        "generation_model",
+        "created_at",
+        "prompt_tokens",
+        "completion_tokens",
+        "output_retries",
+        "queue_wait_seconds",
+        "llm_seconds",
+        "persist_seconds",
+    )
+    list_filter = ("status", "generation_model", "difficulty")
+    search_fields = ("topic",)
+    date_hierarchy = "created_at"
+    readonly_fields = (
+        "generation_model",
+        "prompt_tokens",
+        "completion_tokens",
+        "llm_requests",
+        "output_retries",
+        "queue_wait_seconds",
+        "llm_seconds",
+        "persist_seconds",
+    )
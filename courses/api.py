@@ -0,0 +1,110 @@
+"""Read-only JSON representation of courses, for the /courses/api/courses/ endpoints and quiz mode.
+
+Responses are built from pydantic models (serialized to compact JSON by pydantic-core) so the shape is
+declared in one place. Exercises never include their answers: multiple choice lists only the options, and
+matching lists the left items and the right items in shuffled order, each with the value to submit.
+"""
+
+import random
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from agent.agent import FlashcardItem
+
+from .models import Course, Exercise
+
+
+class RightOption(BaseModel):
+    """A right-hand item of a matching exercise; submit its value as the match for a left item."""
+
+    value: int
+    label: str
+
+
+class ExerciseOut(BaseModel):
+    """An exercise without its answer key."""
+
+    id: int
+    index: int
+    type: str
+    question: str
+    # Multiple choice
+    options: list[str] | None = None
+    # Matching
+    left: list[str] | None = None
+    right: list[RightOption] | None = None
+
+
+class CourseSummaryOut(BaseModel):
+    """Course metadata, as listed by /courses/api/courses/."""
+
+    slug: str
+    title: str
+    overview: str
+    author: str | None
+    created_at: datetime
+    updated_at: datetime
+    exercise_count: int
+    has_flashcards: bool
+
+
+class CourseDetailOut(CourseSummaryOut):
+    """A whole course: metadata, cheatsheet (markdown), exercises, and flashcards."""
+
+    cheatsheet: str
+    exercises: list[ExerciseOut]
+    flashcards: list[FlashcardItem]
+
+
+class CoursePageOut(BaseModel):
+    """One keyset page of courses; pass next_cursor as ?after= for the next page."""
+
+    courses: list[CourseSummaryOut]
+    next_cursor: str | None
+
+
+def exercise_out(exercise: Exercise, rng: random.Random | None = None) -> ExerciseOut:
+    """Serialize an exercise without its answer.
+
+    Matching right items are shuffled with rng; by default the order is seeded by the exercise id, so it is
+    the same on every request and the response stays cacheable.
+    """
+    item = ExerciseOut(
+        id=exercise.pk, index=exercise.order_index, type=exercise.exercise_type, question=exercise.question
+    )
+    if exercise.exercise_type == Exercise.ExerciseType.MATCHING_PAIRS:
+        pairs = exercise.payload.get("pairs", [])
+        right_indices = list(range(len(pairs)))
+        (rng or random.Random(exercise.pk)).shuffle(right_indices)
+        item.left = [p["left"] for p in pairs]
+        item.right = [RightOption(value=i, label=pairs[i]["right"]) for i in right_indices]
+    else:
+        item.options = exercise.payload.get("options", [])
+    return item
+
+
+def course_summary_out(course: Course, exercise_count: int) -> CourseSummaryOut:
+    """Serialize a course's metadata. Load the course with select_related("created_by")."""
+    return CourseSummaryOut(
+        slug=course.slug,
+        title=course.title,
+        overview=course.overview,
+        author=course.created_by.username if course.created_by else None,
+        created_at=course.created_at,
+        updated_at=course.updated_at,
+        exercise_count=exercise_count,
+        has_flashcards=course.has_flashcards,
+    )
+
+
+def course_detail_out(course: Course) -> CourseDetailOut:
+    """Serialize a whole course (two queries: exercises and flashcards)."""
+    exercises = [exercise_out(e) for e in course.exercises.order_by("order_index")]
+    flashcards = [FlashcardItem(front=f.front, back=f.back) for f in course.flashcards.order_by("order_index")]
+    return CourseDetailOut(
+        **course_summary_out(course, len(exercises)).model_dump(),
+        cheatsheet=course.cheatsheet,
+        exercises=exercises,
+        flashcards=flashcards,
+    )
@@ -6,3 +6,6 @@ class CoursesConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "courses"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,184 @@
+"""Bulk pre-generation of a course catalog from a topic list (manage.py generate_courses).
+
+Each entry becomes a CourseGenerationJob and is run through the normal pipeline (arun_generation), so
+bulk courses are persisted, cached, and fingerprinted exactly like user requests. Entries whose
+fingerprint already has a course are skipped, which makes an interrupted run safe to start again: it
+picks up where it stopped, reusing jobs that were queued but never ran.
+
+CatalogWorker runs the jobs on the asyncio worker with bounded concurrency. Their LLM requests are paced by
+the shared limiters of agent.ratelimit like every other generation; the command sets their requests-per-minute
+budget from --rpm.
+"""
+
+import csv
+import json
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from .forms import CreateCourseForm
+from .generation import enqueue_generation, find_active_leader, generation_fingerprint
+from .job_queue import claim_job
+from .models import Course, CourseGenerationJob
+from .worker import AsyncGenerationWorker
+
+_TRUE = {"1", "true", "yes", "y", "on"}
+_FALSE = {"0", "false", "no", "n", "off"}
+_DIFFICULTIES = {value for value, _ in CreateCourseForm.DIFFICULTY_CHOICES}
+
+
+@dataclass
+class CatalogEntry:
+    """One course to pre-generate: a topic and the same options the create form offers."""
+
+    topic: str
+    difficulty: str = "beginner"
+    additional_instructions: str = ""
+    include_questions: bool = True
+    num_exercises: int | None = None
+    include_flashcards: bool = False
+    num_flashcards: int | None = None
+
+    def fingerprint(self) -> str:
+        """Generation fingerprint of this entry (see courses.generation.generation_fingerprint)."""
+        return generation_fingerprint(**asdict(self))
+
+
+def _parse_entry(row: dict[str, Any]) -> CatalogEntry:
+    def text(name: str) -> str:
+        value = row.get(name)
+        return "" if value is None else str(value).strip()
+
+    def number(name: str) -> int | None:
+        value = text(name)
+        if not value:
+            return None
+        if not value.isdigit() or int(value) == 0:
+            raise ValueError(f"{name} must be a positive integer, not {value!r}")
+        return int(value)
+
+    def flag(name: str, default: bool) -> bool:
+        value = row.get(name)
+        if isinstance(value, bool):
+            return value
+        value = text(name).lower()
+        if not value:
+            return default
+        if value in _TRUE or value in _FALSE:
+            return value in _TRUE
+        raise ValueError(f"{name} must be true or false, not {value!r}")
+
+    topic = text("topic")
+    if not topic:
+        raise ValueError("topic is required")
+    difficulty = text("difficulty").lower() or "beginner"
+    if difficulty not in _DIFFICULTIES:
+        raise ValueError(f"difficulty must be one of {', '.join(sorted(_DIFFICULTIES))}, not {difficulty!r}")
+    num_flashcards = number("num_flashcards")
+    return CatalogEntry(
+        topic=topic[:255],
+        difficulty=difficulty,
+        additional_instructions=text("additional_instructions"),
+        include_questions=flag("include_questions", True),
+        num_exercises=number("num_exercises"),
+        # Asking for a number of flashcards implies wanting them.
+        include_flashcards=flag("include_flashcards", num_flashcards is not None),
+        num_flashcards=num_flashcards,
+    )
+
+
+def read_catalog(path: str | Path) -> list[CatalogEntry]:
+    """Read entries from a CSV file (header row) or a JSONL file (one object per line), by file extension.
+
+    Columns/keys: topic (required), difficulty, additional_instructions, include_questions, num_exercises,
+    include_flashcards, num_flashcards. Raises ValueError naming the line of the first invalid entry.
+    """
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            rows: Iterable[tuple[int, Any]] = (
+                (reader.line_num, row) for reader in [csv.DictReader(f)] for row in reader
+            )
+        elif path.suffix.lower() in (".jsonl", ".ndjson"):
+            rows = ((n, json.loads(line)) for n, line in enumerate(f, start=1) if line.strip())
+        else:
+            raise ValueError(f"Unsupported catalog format {path.suffix!r}; use .csv or .jsonl")
+        entries = []
+        for line, row in rows:
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError("expected an object")
+                entries.append(_parse_entry(row))
+            except ValueError as e:
+                raise ValueError(f"{path.name}, line {line}: {e}") from e
+    return entries
+
+
+@dataclass
+class CatalogPlan:
+    """Jobs to run for a catalog, and how many entries needed no generation."""
+
+    job_ids: list[str]
+    already_done: int = 0
+    in_progress: int = 0
+
+
+def enqueue_catalog(entries: list[CatalogEntry], user_id: int | None = None) -> CatalogPlan:
+    """Queue a generation job for every entry that has no course yet; returns the jobs to run.
+
+    Entries with a course for their fingerprint (however old), or repeated in the list, count as done.
+    A job still pending from an interrupted run is reused; one running elsewhere is left to its worker.
+    """
+    fingerprints = [entry.fingerprint() for entry in entries]
+    done = set(
+        Course.objects.filter(generation_fingerprint__in=set(fingerprints)).values_list(
+            "generation_fingerprint", flat=True
+        )
+    )
+    plan = CatalogPlan(job_ids=[])
+    for entry, fingerprint in zip(entries, fingerprints, strict=True):
+        if fingerprint in done:
+            plan.already_done += 1
+            continue
+        done.add(fingerprint)
+        leader = find_active_leader(fingerprint)
+        if leader is None:
+            leader = enqueue_generation(user_id, **asdict(entry))
+        if leader.status == CourseGenerationJob.Status.PENDING and leader.leader_id is None:
+            plan.job_ids.append(str(leader.pk))
+        elif leader.status == CourseGenerationJob.Status.COMPLETE:
+            plan.already_done += 1
+        else:
+            plan.in_progress += 1
+    return plan
+
+
+class CatalogWorker(AsyncGenerationWorker):
+    """Asyncio worker that runs only the given jobs, in order.
+
+    on_finished(job) is called (on the event loop) as each job completes or fails.
+    """
+
+    def __init__(
+        self,
+        job_ids: list[str],
+        on_finished: Callable[[CourseGenerationJob], None] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self._pending = list(job_ids)
+        self._on_finished = on_finished
+
+    def _claim(self) -> CourseGenerationJob | None:
+        while self._pending:
+            job = claim_job(self._pending.pop(0), self.worker_id)
+            if job is not None:
+                return job
+        return None
+
+    async def _run_job(self, job_id: str) -> None:
+        await super()._run_job(job_id)
+        if self._on_finished is not None:
+            job = await CourseGenerationJob.objects.select_related("course").aget(pk=job_id)
+            self._on_finished(job)
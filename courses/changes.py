@@ -0,0 +1,64 @@
+"""Per-user change counters in the cache that wake a user's event streams (see courses.events).
+
+Every write a stream reports (a notification created or marked read, a generation job changing) bumps the
+user's counter once its transaction commits. An open stream reads only the counter on each tick and
+queries the database only when it moved, so idle streams cost one cache read per tick and no connection.
+
+Model saves bump through the post_save receivers in courses.signals. Queryset .update() and bulk_create
+send no signals, so code writing jobs or notifications that way must call bump_user_events itself.
+
+The counters only work when every process sees the same cache: jobs and notifications are written by the
+generation workers, not by the web process serving the stream. With a per-process (locmem) or dummy cache,
+counters_shared() is False and the streams query the database on every tick instead.
+"""
+
+import time
+from collections.abc import Iterable
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from courseforge.cache import make_key
+
+# Lifetime of a counter; once it expires the next read or bump starts a new one from the clock.
+_COUNTER_TIMEOUT = 24 * 60 * 60
+
+
+def change_key(user_id: int) -> str:
+    """Cache key of a user's change counter."""
+    return make_key("user-events", user_id)
+
+
+def counters_shared() -> bool:
+    """Whether a bump in one process reaches the others: false for the per-process and dummy backends."""
+    return not isinstance(caches["default"], LocMemCache | DummyCache)
+
+
+def change_counter(user_id: int) -> int:
+    """Current value of a user's change counter, created if missing."""
+    key = change_key(user_id)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, int(time.time() * 1000), timeout=_COUNTER_TIMEOUT)
+        value = cache.get(key, 0)
+    return int(value)
+
+
+def bump_user_events(user_ids: Iterable[int | None]) -> None:
+    """Bump the change counters of the given users once the current transaction commits. None ids are skipped."""
+    ids = {user_id for user_id in user_ids if user_id is not None}
+    if ids:
+        transaction.on_commit(lambda: _bump(ids))
+
+
+def _bump(user_ids: set[int]) -> None:
+    for user_id in user_ids:
+        key = change_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Missing (never read, expired, or evicted). Start from the clock, not 0, so a recreated counter
+            # never repeats a value an open stream already saw.
+            cache.add(key, int(time.time() * 1000), timeout=_COUNTER_TIMEOUT)
@@ -0,0 +1,47 @@
+"""Cheatsheet markdown rendering, cached on the Course row.
+
+Rendering is the most CPU-expensive step of the course detail page and a cheatsheet rarely changes, so the
+HTML is stored in Course.cheatsheet_html next to a hash of the markdown and the renderer configuration
+(extensions and python-markdown version). A course whose hash no longer matches (cheatsheet edited in the
+admin, extensions or library upgraded) is re-rendered on its next view, or in bulk with
+manage.py rerender_cheatsheets.
+"""
+
+import hashlib
+import json
+
+import markdown
+
+from .models import Course
+
+MARKDOWN_EXTENSIONS = ["extra", "nl2br", "sane_lists"]
+_RENDERER_KEY = json.dumps({"extensions": MARKDOWN_EXTENSIONS, "markdown": markdown.__version__})
+
+
+def render_markdown(text: str) -> str:
+    """Render markdown to HTML with the site's extension set."""
+    if not text:
+        return ""
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+
+
+def cheatsheet_hash(text: str) -> str:
+    """Hash identifying the HTML rendered from text by the current renderer configuration."""
+    return hashlib.sha256(f"{_RENDERER_KEY}\n{text}".encode()).hexdigest()
+
+
+def render_cheatsheet(course: Course) -> bool:
+    """Fill course.cheatsheet_html if it is missing or stale (does not save). Returns True if it re-rendered."""
+    digest = cheatsheet_hash(course.cheatsheet)
+    if course.cheatsheet_html_hash == digest:
+        return False
+    course.cheatsheet_html = render_markdown(course.cheatsheet)
+    course.cheatsheet_html_hash = digest
+    return True
+
+
+def rendered_cheatsheet(course: Course) -> str:
+    """The course's cheatsheet as HTML, rendering and storing it first if the stored copy is stale."""
+    if render_cheatsheet(course):
+        course.save(update_fields=["cheatsheet_html", "cheatsheet_html_hash"])
+    return course.cheatsheet_html
@@ -0,0 +1,155 @@
+"""Server-sent event (SSE) stream of a user's notifications and generation jobs, served by the ASGI application.
+
+One stream per page multiplexes two event types:
+
+- "notifications": the unread count and newest unread notifications, sent on connect and whenever the
+  unread state (count and newest id, one query on notification_unread_idx) changes.
+- "jobs": the user's generation jobs. The first event is a snapshot of every queued or running job;
+  later events carry only the jobs whose version changed, including the final complete/failed transition.
+
+Every EVENT_STREAM_INTERVAL seconds the stream reads the user's change counter from the cache (see
+courses.changes). Only when the counter moved does it query the database, one query per event type, and
+send what changed; an idle stream holds no database connection. With a cache the generation workers do not
+share (locmem, dummy) the counters never move for their writes, so the stream queries on every tick. Between changes it sends a keep-alive
+comment every EVENT_STREAM_HEARTBEAT seconds.
+After EVENT_STREAM_MAX_AGE seconds it closes, and the browser's EventSource reconnects on its own, so
+long-lived connections are recycled.
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Q
+
+from .changes import change_counter, counters_shared
+from .generation import ACTIVE_STATUSES
+from .models import CourseGenerationJob, Notification
+
+# Number of unread notifications listed in the dropdown.
+NOTIFICATION_LIST_SIZE = 20
+# Milliseconds the browser waits before reconnecting a closed stream.
+_RECONNECT_MS = 3000
+
+
+def notification_snapshot(user_id: int) -> dict[str, Any]:
+    """Unread notification count and the newest NOTIFICATION_LIST_SIZE of them, as sent to the browser."""
+    unread = Notification.objects.filter(user_id=user_id, read=False).order_by("-created_at")
+    notifications = list(unread.select_related("course")[:NOTIFICATION_LIST_SIZE])
+    count = len(notifications) if len(notifications) < NOTIFICATION_LIST_SIZE else unread.count()
+    return {
+        "count": count,
+        "items": [
+            {
+                "id": n.id,
+                "message": n.message,
+                "course_slug": n.course.slug if n.course else None,
+            }
+            for n in notifications
+        ],
+    }
+
+
+def job_status_payload(job: CourseGenerationJob) -> dict[str, Any]:
+    """A job's status as sent to the browser. Load the job with select_related("course")."""
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "message": job.status_message or "",
+        "course_slug": job.course.slug if job.course else None,
+        "error": job.error or "",
+        "version": job.version,
+    }
+
+
+class _NotificationWatch:
+    """Emits a notifications event when the user's unread count or newest unread notification changes."""
+
+    event = "notifications"
+
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        self.state: tuple[int, int | None] | None = None
+
+    def poll(self) -> dict[str, Any] | None:
+        state = Notification.objects.filter(user_id=self.user_id, read=False).aggregate(
+            count=Count("pk"), latest=Max("pk")
+        )
+        current = (state["count"], state["latest"])
+        if current == self.state:
+            return None
+        self.state = current
+        return notification_snapshot(self.user_id)
+
+
+class _JobWatch:
+    """Emits a jobs event with every job whose version changed since the last check."""
+
+    event = "jobs"
+
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        # Versions of the jobs that were active at the last check; None before the first check.
+        self.versions: dict[str, int] | None = None
+
+    def poll(self) -> dict[str, Any] | None:
+        snapshot = self.versions is None
+        watched = list(self.versions or ())
+        jobs = list(
+            CourseGenerationJob.objects.filter(created_by_id=self.user_id)
+            .filter(Q(status__in=ACTIVE_STATUSES) | Q(pk__in=watched))
+            .select_related("course")
+            .order_by("created_at")
+        )
+        previous = self.versions or {}
+        changed = [job for job in jobs if snapshot or previous.get(str(job.pk)) != job.version]
+        self.versions = {str(job.pk): job.version for job in jobs if job.status in ACTIVE_STATUSES}
+        if not (snapshot or changed):
+            return None
+        return {"snapshot": snapshot, "jobs": [job_status_payload(job) for job in changed]}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _poll(watches: list[Any]) -> list[str]:
+    try:
+        return [sse_event(watch.event, payload) for watch in watches if (payload := watch.poll()) is not None]
+    finally:
+        # Runs on a shared executor thread between long idle stretches: don't keep a connection open on it.
+        connection.close()
+
+
+async def user_events(user_id: int) -> AsyncIterator[str]:
+    """Yield SSE messages for the user's notifications and jobs until EVENT_STREAM_MAX_AGE elapses."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENT_STREAM_MAX_AGE
+    watches = [_NotificationWatch(user_id), _JobWatch(user_id)]
+    last_sent = loop.time()
+    # Both run off the request's thread-sensitive executor (which cache.aget would use), so an open stream
+    # does not pin a thread of its own.
+    read_counter = sync_to_async(change_counter, thread_sensitive=False)
+    poll = sync_to_async(_poll, thread_sensitive=False)
+    shared = counters_shared()
+    seen = None
+    yield f"retry: {_RECONNECT_MS}\n\n"
+    while loop.time() < deadline:
+        counter = await read_counter(user_id) if shared else None
+        messages = []
+        if not shared or counter != seen:
+            seen = counter
+            messages = await poll(watches)
+        for message in messages:
+            yield message
+        if messages:
+            last_sent = loop.time()
+        elif loop.time() - last_sent >= settings.EVENT_STREAM_HEARTBEAT:
+            yield ": keep-alive\n\n"
+            last_sent = loop.time()
+        await asyncio.sleep(settings.EVENT_STREAM_INTERVAL)
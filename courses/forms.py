@@ -1,6 +1,9 @@
 """Forms for course creation and other course-related input."""
 
+from typing import cast
+
 from django import forms
+from django.conf import settings
 
 
 class CreateCourseForm(forms.Form):
@@ -19,6 +22,12 @@ class CreateCourseForm(forms.Form):
         (8, "8"),
         (10, "10"),
     ]
+    NUM_FLASHCARDS_CHOICES = [("", "Agent decides"), (5, "5"), (10, "10"), (15, "15"), (20, "20")]
+    # Larger courses offered when sections are generated in parallel (GENERATION_STRATEGY "fanout"), where
+    # latency does not grow with the counts.
+    FANOUT_NUM_EXERCISES_CHOICES = [(15, "15"), (20, "20")]
+    FANOUT_NUM_FLASHCARDS_CHOICES = [(30, "30"), (40, "40")]
+    FANOUT_NUM_EXERCISES_HELP = "Short quiz (3) to long course (20). Leave blank to let the agent decide."
 
     topic = forms.CharField(
         max_length=255,
@@ -60,17 +69,33 @@ class CreateCourseForm(forms.Form):
     num_exercises = forms.TypedChoiceField(
         choices=NUM_EXERCISES_CHOICES,
         coerce=lambda v: int(v) if v != "" else None,
+        empty_value=None,
         required=False,
         label="Number of exercises",
         help_text="Short quiz (3) to longer course (10). Leave blank to let the agent decide.",
     )
     num_flashcards = forms.TypedChoiceField(
-        choices=[("", "Agent decides"), (5, "5"), (10, "10"), (15, "15"), (20, "20")],
+        choices=NUM_FLASHCARDS_CHOICES,
         coerce=lambda v: int(v) if v != "" else None,
+        empty_value=None,
         required=False,
         label="Number of flashcards",
         help_text="Leave blank to let the agent decide.",
     )
+    force_fresh = forms.BooleanField(
+        required=False,
+        label="Force fresh generation",
+        help_text="Generate a new course even if an identical one was generated recently.",
+    )
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        if settings.GENERATION_STRATEGY == "fanout":
+            num_exercises = cast(forms.ChoiceField, self.fields["num_exercises"])
+            num_exercises.choices = self.NUM_EXERCISES_CHOICES + self.FANOUT_NUM_EXERCISES_CHOICES
+            num_flashcards = cast(forms.ChoiceField, self.fields["num_flashcards"])
+            num_flashcards.choices = self.NUM_FLASHCARDS_CHOICES + self.FANOUT_NUM_FLASHCARDS_CHOICES
+            self.fields["num_exercises"].help_text = self.FANOUT_NUM_EXERCISES_HELP
 
     def clean(self):
         cleaned_data = super().clean()
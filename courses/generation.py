@@ -0,0 +1,524 @@
+"""Course generation pipeline: queue generation requests, run the agent for claimed jobs, and persist courses.
+
+run_generation is the blocking variant used by the threaded worker; arun_generation awaits the agent
+natively so one event loop can multiplex many generations (database stages go through sync_to_async).
+
+GENERATION_STRATEGY picks how the agent is called: "single" waits for the complete CourseContent and
+persists it in one transaction; "stream" streams the structured output and persists the course while it
+arrives (see ProgressiveCourse), so learners can open it within seconds; "fanout" generates the outline
+and chunks of exercises and flashcards concurrently (see agent.fanout) and persists the merged result.
+
+Identical requests (same normalized topic, options, and model) are answered from an existing course
+generated within GENERATION_CACHE_TTL seconds instead of calling the LLM again, unless force_fresh is set.
+Identical requests that arrive while one is still queued or running attach to it as followers (single
+flight): they are never claimed by a worker and complete with the leader's course.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from agent.agent import CourseContent, ExerciseItem, FlashcardItem, get_agent_model
+from agent.fanout import run_course_generator_fanout, run_course_generator_fanout_sync
+from agent.run_course_gen import run_course_generator, run_course_generator_sync, stream_course_generator
+from agent.usage import track_usage
+
+from .changes import bump_user_events
+from .cheatsheets import render_cheatsheet
+from .metrics import StageTimer, record_job_metrics
+from .models import Course, CourseGenerationJob, Exercise, Flashcard, Notification
+from .slugs import create_course_with_unique_slug
+
+ACTIVE_STATUSES = (CourseGenerationJob.Status.PENDING, CourseGenerationJob.Status.RUNNING)
+
+
+def normalize_topic(topic: str) -> str:
+    """Lowercase the topic and collapse whitespace, so trivially different spellings share a cache entry."""
+    return " ".join(topic.lower().split())[:255]
+
+
+def generation_fingerprint(
+    topic: str,
+    difficulty: str = "beginner",
+    additional_instructions: str | None = None,
+    include_questions: bool = True,
+    num_exercises: int | None = None,
+    include_flashcards: bool = False,
+    num_flashcards: int | None = None,
+    model: str | None = None,
+) -> str:
+    """Stable hash of a normalized generation request; equal fingerprints produce interchangeable courses."""
+    key = {
+        "topic": normalize_topic(topic),
+        "difficulty": difficulty.strip().lower(),
+        "instructions": " ".join((additional_instructions or "").split()),
+        "questions": num_exercises if include_questions else False,
+        "flashcards": num_flashcards if include_flashcards else False,
+        "model": model or get_agent_model(),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def find_cached_course(fingerprint: str) -> Course | None:
+    """Return the newest course generated for this fingerprint within GENERATION_CACHE_TTL, if any."""
+    ttl = settings.GENERATION_CACHE_TTL
+    if not fingerprint or ttl <= 0:
+        return None
+    return (
+        Course.objects.filter(
+            generation_fingerprint=fingerprint,
+            created_at__gte=timezone.now() - timedelta(seconds=ttl),
+        )
+        .order_by("-created_at")
+        .first()
+    )
+
+
+def find_active_leader(fingerprint: str) -> CourseGenerationJob | None:
+    """Return the oldest queued or running leader job for this fingerprint, if any."""
+    if not fingerprint:
+        return None
+    return (
+        CourseGenerationJob.objects.filter(fingerprint=fingerprint, status__in=ACTIVE_STATUSES, leader__isnull=True)
+        .order_by("created_at")
+        .first()
+    )
+
+
+def enqueue_generation(
+    user_id: int | None,
+    topic: str,
+    difficulty: str = "beginner",
+    additional_instructions: str | None = None,
+    include_questions: bool = True,
+    num_exercises: int | None = None,
+    include_flashcards: bool = False,
+    num_flashcards: int | None = None,
+    force_fresh: bool = False,
+) -> CourseGenerationJob:
+    """Create a generation job for the workers, or complete it at once from the cache.
+
+    The returned job is COMPLETE (with its course set) on a cache hit, otherwise PENDING; if an identical
+    job is already in progress the new job follows it instead of being queued for a worker.
+    """
+    options = {
+        "topic": topic[:255],
+        "difficulty": difficulty,
+        "additional_instructions": additional_instructions or "",
+        "include_questions": include_questions,
+        "num_exercises": num_exercises,
+        "include_flashcards": include_flashcards,
+        "num_flashcards": num_flashcards,
+    }
+    fingerprint = generation_fingerprint(
+        topic[:255],
+        difficulty,
+        additional_instructions,
+        include_questions,
+        num_exercises,
+        include_flashcards,
+        num_flashcards,
+    )
+    cached = None if force_fresh else find_cached_course(fingerprint)
+    leader = None if force_fresh or cached is not None else find_active_leader(fingerprint)
+    job = CourseGenerationJob.objects.create(
+        status=CourseGenerationJob.Status.PENDING,
+        status_message=("Waiting for an identical course in progress..." if leader else "Waiting for a worker..."),
+        created_by_id=user_id,
+        force_fresh=force_fresh,
+        fingerprint=fingerprint,
+        leader=leader,
+        **options,
+    )
+    if cached is not None:
+        complete_job(job, cached)
+    elif leader is not None:
+        # The leader may have finished between the lookup and the insert; settle the follower now if so.
+        leader.refresh_from_db(fields=["status", "course"])
+        if leader.status == CourseGenerationJob.Status.COMPLETE and leader.course is not None:
+            _complete_followers(leader.course, pk=job.pk)
+        elif leader.status == CourseGenerationJob.Status.FAILED:
+            _release_followers(leader)
+        job.refresh_from_db()
+    return job
+
+
+def _cached_course_for(job: CourseGenerationJob) -> Course | None:
+    if job.force_fresh:
+        return None
+    return find_cached_course(job.fingerprint)
+
+
+def run_generation(job_id: str) -> None:
+    """Run the course generator for a claimed job and update it (status, course, error).
+
+    The job must already be RUNNING (see job_queue.claim_next_job). Failures are recorded
+    on the job and reported to the user as a notification; they are never re-raised. Token usage
+    and stage latencies are recorded on the job either way (see courses.metrics).
+    """
+    job = CourseGenerationJob.objects.get(pk=job_id)
+    generation_model = get_agent_model()
+    timer = StageTimer()
+    with track_usage() as usage:
+        try:
+            cached = _cached_course_for(job)
+            if cached is not None:
+                complete_job(job, cached)
+                return
+
+            job.status_message = "Generating course content..."
+            job.save(update_fields=["status_message"])
+
+            if settings.GENERATION_STRATEGY == "stream":
+                async_to_sync(astream_generation)(job, timer)
+                return
+            generate = (
+                run_course_generator_fanout_sync
+                if settings.GENERATION_STRATEGY == "fanout"
+                else run_course_generator_sync
+            )
+            with timer.stage("llm"):
+                content, generation_model = generate(**job.generation_options())
+
+            job.status_message = "Creating course content..."
+            job.save(update_fields=["status_message"])
+
+            with timer.stage("persist"):
+                persist_generated_course(job, content, generation_model)
+        except Exception as e:
+            fail_job(job, str(e))
+        finally:
+            record_job_metrics(job, generation_model, usage, timer)
+
+
+async def arun_generation(job_id: str) -> None:
+    """Async counterpart of run_generation: awaits the agent instead of blocking a thread on it."""
+    job = await CourseGenerationJob.objects.aget(pk=job_id)
+    generation_model = get_agent_model()
+    timer = StageTimer()
+    with track_usage() as usage:
+        try:
+            cached = await sync_to_async(_cached_course_for)(job)
+            if cached is not None:
+                await sync_to_async(complete_job)(job, cached)
+                return
+
+            job.status_message = "Generating course content..."
+            await job.asave(update_fields=["status_message"])
+
+            if settings.GENERATION_STRATEGY == "stream":
+                await astream_generation(job, timer)
+                return
+            agenerate = (
+                run_course_generator_fanout if settings.GENERATION_STRATEGY == "fanout" else run_course_generator
+            )
+            with timer.stage("llm"):
+                content, generation_model = await agenerate(**job.generation_options())
+
+            job.status_message = "Creating course content..."
+            await job.asave(update_fields=["status_message"])
+
+            with timer.stage("persist"):
+                await sync_to_async(persist_generated_course)(job, content, generation_model)
+        except Exception as e:
+            await sync_to_async(fail_job)(job, str(e))
+        finally:
+            await sync_to_async(record_job_metrics)(job, generation_model, usage, timer)
+
+
+def persist_generated_course(job: CourseGenerationJob, content: CourseContent, generation_model: str) -> Course:
+    """Create the Course with its exercises and flashcards, complete the job, and notify the user.
+
+    Everything happens in one transaction with bulk inserts, so a crash never leaves a half-built
+    course visible and the write cost does not grow with the number of exercises and flashcards.
+    """
+    # Render the cheatsheet once here rather than on the first page view (see courses.cheatsheets).
+    rendered = Course(cheatsheet=content.cheatsheet)
+    render_cheatsheet(rendered)
+    with transaction.atomic():
+        course = create_course_with_unique_slug(
+            content.title,
+            overview=content.overview,
+            cheatsheet=content.cheatsheet,
+            cheatsheet_html=rendered.cheatsheet_html,
+            cheatsheet_html_hash=rendered.cheatsheet_html_hash,
+            has_questions=bool(content.exercises),
+            has_flashcards=bool(content.flashcards),
+            created_by_id=job.created_by_id,
+            topic_normalized=normalize_topic(job.topic),
+            generation_fingerprint=job.fingerprint,
+            generation_model=generation_model,
+        )
+        Exercise.objects.bulk_create(build_exercises(course, content.exercises))
+        Flashcard.objects.bulk_create(
+            Flashcard(course=course, order_index=i, front=card.front, back=card.back)
+            for i, card in enumerate(content.flashcards)
+        )
+        complete_job(job, course)
+    return course
+
+
+async def astream_generation(job: CourseGenerationJob, timer: StageTimer | None = None) -> None:
+    """Stream the agent's output for a running job and persist the course as it arrives.
+
+    On failure the partially built course is deleted and the exception re-raised, so the caller fails the
+    job as usual. Time spent persisting is added to timer's "persist" stage and the rest of the stream to "llm".
+    """
+    timer = timer or StageTimer()
+    progressive = ProgressiveCourse(job, get_agent_model())
+    try:
+        # A course on a running job is left over from an attempt whose worker died.
+        await sync_to_async(progressive.discard)()
+        content = None
+        persisted = timer.seconds.get("persist", 0.0)
+        with timer.stage("llm"):
+            async for content in stream_course_generator(**job.generation_options()):
+                with timer.stage("persist"):
+                    await sync_to_async(progressive.update)(content)
+        # The stream's wall time includes the updates made while it was open; count those only as persisting.
+        timer.seconds["llm"] -= timer.seconds.get("persist", 0.0) - persisted
+        if content is None:
+            raise RuntimeError("Agent returned no output")
+        with timer.stage("persist"):
+            await sync_to_async(progressive.finish)(content)
+    except Exception:
+        await sync_to_async(progressive.discard)()
+        raise
+
+
+class ProgressiveCourse:
+    """Persists a course while its content streams in, so learners can open it before generation ends.
+
+    The course row is created once its title, overview, and cheatsheet are complete (when the first
+    exercise or flashcard starts arriving), and each exercise or flashcard is appended once it is complete
+    (when the next one starts). The job's status message reports the real counts. The course gets its
+    generation fingerprint only in finish(), so the generation cache never hands out a half-built course.
+    """
+
+    def __init__(self, job: CourseGenerationJob, generation_model: str) -> None:
+        self.job = job
+        self.generation_model = generation_model
+        self.course: Course | None = None
+        # Items persisted so far, and the number of Exercise rows they produced (invalid items are skipped).
+        self.exercise_items: list[ExerciseItem] = []
+        self.flashcard_items: list[FlashcardItem] = []
+        self.exercise_rows = 0
+
+    def update(self, partial: CourseContent) -> None:
+        """Persist whatever a partial output has completed since the last update."""
+        created = False
+        if self.course is None:
+            if not (partial.exercises or partial.flashcards):
+                return
+            self._create_course(partial)
+            created = True
+        # Once flashcards arrive the exercises are done; otherwise the last one may still be incomplete.
+        exercises = partial.exercises if partial.flashcards else partial.exercises[:-1]
+        if self._append(exercises, partial.flashcards[:-1]) or created:
+            self._report_progress()
+
+    def finish(self, content: CourseContent) -> Course:
+        """Persist the rest of the complete output, fill in the final course fields, and complete the job."""
+        if self.course is None:
+            return persist_generated_course(self.job, content, self.generation_model)
+        course = self.course
+        with transaction.atomic():
+            if (
+                content.exercises[: len(self.exercise_items)] != self.exercise_items
+                or content.flashcards[: len(self.flashcard_items)] != self.flashcard_items
+            ):
+                # The final output does not continue what was streamed (e.g. the agent retried): start over.
+                course.exercises.all().delete()
+                course.flashcards.all().delete()
+                self.exercise_items, self.flashcard_items, self.exercise_rows = [], [], 0
+            self._append(content.exercises, content.flashcards)
+            course.title = content.title
+            course.overview = content.overview
+            course.cheatsheet = content.cheatsheet
+            render_cheatsheet(course)
+            course.has_questions = self.exercise_rows > 0
+            course.has_flashcards = bool(self.flashcard_items)
+            course.generation_fingerprint = self.job.fingerprint
+            course.save()
+            complete_job(self.job, course)
+        return course
+
+    def discard(self) -> None:
+        """Delete the job's unfinished course, if any."""
+        if self.job.course_id is not None:
+            Course.objects.filter(pk=self.job.course_id).delete()
+            self.job.course = None
+        self.course = None
+
+    def _create_course(self, partial: CourseContent) -> None:
+        course = create_course_with_unique_slug(
+            partial.title,
+            overview=partial.overview,
+            cheatsheet=partial.cheatsheet,
+            has_questions=False,
+            has_flashcards=False,
+            created_by_id=self.job.created_by_id,
+            topic_normalized=normalize_topic(self.job.topic),
+            generation_model=self.generation_model,
+        )
+        render_cheatsheet(course)
+        course.save(update_fields=["cheatsheet_html", "cheatsheet_html_hash"])
+        self.course = course
+        self.job.course = course
+
+    def _append(self, exercises: list[ExerciseItem], flashcards: list[FlashcardItem]) -> bool:
+        """Insert the items past those already persisted; returns whether there were any."""
+        assert self.course is not None
+        new_exercises = exercises[len(self.exercise_items) :]
+        new_flashcards = flashcards[len(self.flashcard_items) :]
+        if not (new_exercises or new_flashcards):
+            return False
+        with transaction.atomic():
+            rows = Exercise.objects.bulk_create(build_exercises(self.course, new_exercises, self.exercise_rows))
+            Flashcard.objects.bulk_create(
+                Flashcard(course=self.course, order_index=len(self.flashcard_items) + i, front=c.front, back=c.back)
+                for i, c in enumerate(new_flashcards)
+            )
+            self.exercise_items += new_exercises
+            self.flashcard_items += new_flashcards
+            self.exercise_rows += len(rows)
+            # bulk_create sends no post_save signals: bump updated_at here so cached course pages refresh.
+            Course.objects.filter(pk=self.course.pk).update(
+                has_questions=self.exercise_rows > 0,
+                has_flashcards=bool(self.flashcard_items),
+                updated_at=timezone.now(),
+            )
+        return True
+
+    def _report_progress(self) -> None:
+        job = self.job
+        counts = []
+        if job.include_questions:
+            counts.append(_progress_count(self.exercise_rows, job.num_exercises, "exercises"))
+        if job.include_flashcards:
+            counts.append(_progress_count(len(self.flashcard_items), job.num_flashcards, "flashcards"))
+        job.status_message = f"Generated {', '.join(counts)}..." if counts else "Generating course content..."
+        job.save(update_fields=["course", "status_message"])
+
+
+def _progress_count(done: int, requested: int | None, noun: str) -> str:
+    return f"{done}/{requested} {noun}" if requested else f"{done} {noun}"
+
+
+def build_exercises(course: Course, items: list[ExerciseItem], start_index: int = 0) -> list[Exercise]:
+    """Unsaved Exercise rows for the agent's exercise items, numbered contiguously from start_index.
+
+    Items whose declared type has no matching payload are skipped without leaving a gap in order_index.
+    """
+    exercises: list[Exercise] = []
+    for item in items:
+        if item.type == "multiple_choice" and item.multiple_choice:
+            mc = item.multiple_choice
+            exercise_type = Exercise.ExerciseType.MULTIPLE_CHOICE
+            question = mc.question
+            payload = {
+                "options": mc.options,
+                "correct_index": mc.correct_index,
+                "explanation": mc.explanation,
+            }
+        elif item.type == "matching" and item.matching:
+            mat = item.matching
+            exercise_type = Exercise.ExerciseType.MATCHING_PAIRS
+            question = mat.question
+            payload = {"pairs": [{"left": p.left, "right": p.right} for p in mat.pairs]}
+        else:
+            continue
+        exercises.append(
+            Exercise(
+                course=course,
+                order_index=start_index + len(exercises),
+                exercise_type=exercise_type,
+                question=question,
+                payload=payload,
+            )
+        )
+    return exercises
+
+
+def complete_job(job: CourseGenerationJob, course: Course) -> None:
+    """Attach the course to the job, mark it complete, and notify the user and every follower."""
+    job.course = course
+    job.status = CourseGenerationJob.Status.COMPLETE
+    job.status_message = "Done!"
+    job.worker_id = ""
+    job.save(update_fields=["course", "status", "status_message", "worker_id"])
+    if job.created_by_id:
+        Notification.objects.create(
+            user_id=job.created_by_id,
+            message=f'Your course "{course.title}" is ready!',
+            course=course,
+        )
+    _complete_followers(course, leader=job)
+
+
+def fail_job(job: CourseGenerationJob, error: str) -> None:
+    """Mark the job as failed with the given error, notify the user, and hand its followers a new leader."""
+    job.status = CourseGenerationJob.Status.FAILED
+    job.error = error
+    job.status_message = "Failed"
+    job.worker_id = ""
+    job.save(update_fields=["status", "error", "status_message", "worker_id"])
+    if job.created_by_id:
+        Notification.objects.create(
+            user_id=job.created_by_id,
+            message=f'Course generation failed for "{job.topic}". Please try again.',
+            course=None,
+        )
+    _release_followers(job)
+
+
+def _complete_followers(course: Course, **lookup) -> None:
+    """Complete the still-pending followers matching lookup with course and notify their users."""
+    with transaction.atomic():
+        followers = list(
+            CourseGenerationJob.objects.select_for_update()
+            .filter(status=CourseGenerationJob.Status.PENDING, leader__isnull=False, **lookup)
+            .only("pk", "created_by_id")
+        )
+        if not followers:
+            return
+        CourseGenerationJob.objects.filter(pk__in=[f.pk for f in followers]).update(
+            course=course,
+            status=CourseGenerationJob.Status.COMPLETE,
+            status_message="Done!",
+            version=F("version") + 1,
+        )
+        Notification.objects.bulk_create(
+            Notification(user_id=f.created_by_id, message=f'Your course "{course.title}" is ready!', course=course)
+            for f in followers
+            if f.created_by_id
+        )
+        # Neither the update nor bulk_create sends post_save: wake the followers' streams here.
+        bump_user_events(f.created_by_id for f in followers)
+
+
+def _release_followers(leader: CourseGenerationJob) -> None:
+    """Promote the oldest pending follower of a failed leader to leader and re-attach the rest to it."""
+    with transaction.atomic():
+        followers = list(
+            CourseGenerationJob.objects.select_for_update()
+            .filter(leader=leader, status=CourseGenerationJob.Status.PENDING)
+            .order_by("created_at")
+            .only("pk", "created_by_id")
+        )
+        if not followers:
+            return
+        new_leader, rest = followers[0], followers[1:]
+        CourseGenerationJob.objects.filter(pk=new_leader.pk).update(
+            leader=None, status_message="Waiting for a worker...", version=F("version") + 1
+        )
+        CourseGenerationJob.objects.filter(pk__in=[f.pk for f in rest]).update(
+            leader=new_leader, version=F("version") + 1
+        )
+        bump_user_events(f.created_by_id for f in followers)
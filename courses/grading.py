@@ -0,0 +1,163 @@
+"""Grading of exercise answers against compiled answer keys.
+
+An exercise's payload is compiled once into an AnswerKey (the correct option, or the pairs of a matching
+exercise, plus the texts shown as feedback) and cached by exercise id under the course version, so edits
+never grade against a stale key. Grading then reads neither the payload JSON nor the database:
+
+- grade checks one answer against its key.
+- answer_keys fetches the keys of every exercise in a course with one cache round-trip (compiling only
+  the misses), and grade_answers grades a whole submission against them, e.g. a complete quiz in one POST.
+
+Answers are the raw submitted values: the chosen option index for multiple choice, and for matching the
+chosen right-item index for each left item, in order. Anything that is not a non-negative integer counts
+as no answer.
+"""
+
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, cast
+
+from django.conf import settings
+from django.core.cache import cache
+
+from courseforge.cache import make_key
+
+from .models import Course, Exercise
+
+type Answer = str | int | Sequence[str | int | None] | None
+
+
+@dataclass(frozen=True, slots=True)
+class AnswerKey:
+    """Everything grading needs to know about one exercise."""
+
+    exercise_id: int
+    course_id: int
+    exercise_type: str
+    option_count: int = 0
+    correct_index: int | None = None
+    # Matching exercises: (left, right) pairs; left item i is matched correctly by right item i.
+    pairs: tuple[tuple[str, str], ...] = ()
+    explanation: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class Grade:
+    """The outcome of grading one answer, with the feedback the exercise page shows."""
+
+    exercise_id: int
+    correct: bool
+    explanation: str = ""
+    # Multiple choice: the chosen option index, if any.
+    selected_answer: int | None = None
+    # Matching: per left item, {left, correct_right, user_right, is_correct}.
+    matching_result: tuple[dict[str, Any], ...] | None = None
+
+
+def compile_answer_key(exercise: Exercise) -> AnswerKey:
+    """Build the answer key of an exercise from its payload."""
+    payload = exercise.payload or {}
+    explanation = payload.get("explanation", "")
+    if exercise.exercise_type == Exercise.ExerciseType.MATCHING_PAIRS:
+        pairs = tuple((pair["left"], pair["right"]) for pair in payload.get("pairs", []))
+        return AnswerKey(exercise.pk, exercise.course_id, exercise.exercise_type, pairs=pairs, explanation=explanation)
+    option_count = len(payload.get("options", []))
+    correct_index = _parse_index(payload.get("correct_index"))
+    if correct_index is not None and correct_index >= option_count:
+        correct_index = None
+    return AnswerKey(
+        exercise.pk,
+        exercise.course_id,
+        exercise.exercise_type,
+        option_count=option_count,
+        correct_index=correct_index,
+        explanation=explanation,
+    )
+
+
+def _cache_key(course: Course, exercise_id: int) -> str:
+    return make_key("answer-key", exercise_id, course.cache_version)
+
+
+def answer_key(exercise: Exercise) -> AnswerKey:
+    """The cached answer key of an exercise. Load the exercise with select_related("course")."""
+    key = _cache_key(exercise.course, exercise.pk)
+    compiled = cast(AnswerKey | None, cache.get(key))
+    if compiled is None:
+        compiled = compile_answer_key(exercise)
+        cache.set(key, compiled, settings.COURSE_PAGE_CACHE_TTL)
+    return compiled
+
+
+def answer_keys(course: Course, exercises: Sequence[Exercise] | None = None) -> list[AnswerKey]:
+    """The cached answer keys of every exercise in the course, in order.
+
+    Pass the course's exercises if they are already loaded. Otherwise this is one query for the exercise
+    ids and one cache read for their keys; payloads are loaded (in one more query) only for exercises
+    whose key is not cached.
+    """
+    if exercises is None:
+        exercise_ids = list(course.exercises.order_by("order_index").values_list("pk", flat=True))
+    else:
+        exercise_ids = [exercise.pk for exercise in exercises]
+    cache_keys = {pk: _cache_key(course, pk) for pk in exercise_ids}
+    cached = cache.get_many(cache_keys.values())
+    missing = [pk for pk in exercise_ids if cache_keys[pk] not in cached]
+    if missing:
+        to_compile = Exercise.objects.filter(pk__in=missing) if exercises is None else exercises
+        fresh = {cache_keys[e.pk]: compile_answer_key(e) for e in to_compile if e.pk in cache_keys}
+        cache.set_many(fresh, settings.COURSE_PAGE_CACHE_TTL)
+        cached.update(fresh)
+    return [cached[cache_keys[pk]] for pk in exercise_ids if cache_keys[pk] in cached]
+
+
+def answer_from_form(key: AnswerKey, data: Mapping[str, Any], prefix: str = "") -> Answer:
+    """Read an exercise's answer from form data: field <prefix>answer, or <prefix>match_<i> per left item."""
+    if key.exercise_type == Exercise.ExerciseType.MATCHING_PAIRS:
+        return [data.get(f"{prefix}match_{i}") for i in range(len(key.pairs))]
+    return data.get(f"{prefix}answer")
+
+
+def grade(key: AnswerKey, answer: Answer) -> Grade:
+    """Grade one answer against an answer key."""
+    if key.exercise_type == Exercise.ExerciseType.MATCHING_PAIRS:
+        raw = answer if isinstance(answer, Sequence) and not isinstance(answer, str) else ()
+        count = len(key.pairs)
+        chosen = [_parse_index(value) for value in raw[:count]]
+        chosen += [None] * (count - len(chosen))
+        result = tuple(
+            {
+                "left": left,
+                "correct_right": right,
+                "user_right": key.pairs[choice][1] if choice is not None and choice < count else "-",
+                "is_correct": choice == i,
+            }
+            for i, ((left, right), choice) in enumerate(zip(key.pairs, chosen, strict=True))
+        )
+        return Grade(
+            key.exercise_id,
+            all(item["is_correct"] for item in result),
+            explanation=key.explanation,
+            matching_result=result,
+        )
+    choice = _parse_index(answer)
+    return Grade(
+        key.exercise_id,
+        choice is not None and choice == key.correct_index,
+        explanation=key.explanation,
+        selected_answer=choice,
+    )
+
+
+def grade_answers(keys: Iterable[AnswerKey], answers: Mapping[int, Answer]) -> list[Grade]:
+    """Grade a batch of answers, keyed by exercise id; exercises without an answer are graded as wrong."""
+    return [grade(key, answers.get(key.exercise_id)) for key in keys]
+
+
+def _parse_index(value: Any) -> int | None:
+    """A submitted index as a non-negative int, or None."""
+    if isinstance(value, str):
+        return int(value) if value.isascii() and value.isdigit() else None
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    return None
@@ -0,0 +1,120 @@
+"""Database-backed queue of CourseGenerationJob rows: claiming, heartbeats, and re-queueing orphaned jobs.
+
+On databases that support it (PostgreSQL) jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED so
+concurrent workers never block on or double-claim the same row. Elsewhere (SQLite) a conditional
+UPDATE on the pending status acts as a compare-and-swap.
+"""
+
+from datetime import timedelta
+from typing import Any
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .changes import bump_user_events
+from .generation import fail_job
+from .models import CourseGenerationJob
+
+# Number of pending rows tried per claim on databases without SKIP LOCKED.
+_CLAIM_CANDIDATES = 10
+
+
+def claim_next_job(worker_id: str) -> CourseGenerationJob | None:
+    """Claim the oldest pending job for this worker and mark it RUNNING. Returns None if the queue is empty.
+
+    Followers (jobs waiting on an identical leader job) are never claimed; they complete with their leader.
+    """
+    if connection.features.has_select_for_update_skip_locked:
+        return _claim_skip_locked(worker_id)
+    return _claim_compare_and_swap(worker_id)
+
+
+def _claim_skip_locked(worker_id: str) -> CourseGenerationJob | None:
+    with transaction.atomic():
+        job = (
+            CourseGenerationJob.objects.select_for_update(skip_locked=True)
+            .filter(status=CourseGenerationJob.Status.PENDING, leader__isnull=True)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        job.status = CourseGenerationJob.Status.RUNNING
+        job.status_message = "Starting..."
+        job.worker_id = worker_id
+        job.started_at = now
+        job.heartbeat_at = now
+        job.attempts += 1
+        job.save(update_fields=["status", "status_message", "worker_id", "started_at", "heartbeat_at", "attempts"])
+        return job
+
+
+def _claim_compare_and_swap(worker_id: str) -> CourseGenerationJob | None:
+    pending = CourseGenerationJob.objects.filter(status=CourseGenerationJob.Status.PENDING, leader__isnull=True)
+    for pk in pending.order_by("created_at").values_list("pk", flat=True)[:_CLAIM_CANDIDATES]:
+        job = claim_job(pk, worker_id)
+        if job is not None:
+            return job
+    return None
+
+
+def claim_job(job_id: Any, worker_id: str) -> CourseGenerationJob | None:
+    """Claim one specific pending job and mark it RUNNING. Returns None if it is not pending (or is a follower).
+
+    A conditional UPDATE on the pending status, so at most one worker claims it on any database.
+    """
+    now = timezone.now()
+    claimed = CourseGenerationJob.objects.filter(
+        pk=job_id, status=CourseGenerationJob.Status.PENDING, leader__isnull=True
+    ).update(
+        status=CourseGenerationJob.Status.RUNNING,
+        status_message="Starting...",
+        worker_id=worker_id,
+        started_at=now,
+        heartbeat_at=now,
+        attempts=F("attempts") + 1,
+        version=F("version") + 1,
+    )
+    if not claimed:
+        return None
+    job = CourseGenerationJob.objects.get(pk=job_id)
+    bump_user_events([job.created_by_id])
+    return job
+
+
+def heartbeat(worker_id: str, job_ids: list[str]) -> int:
+    """Refresh heartbeat_at for the running jobs this worker still owns. Returns the number of rows updated."""
+    if not job_ids:
+        return 0
+    return CourseGenerationJob.objects.filter(
+        pk__in=job_ids,
+        worker_id=worker_id,
+        status=CourseGenerationJob.Status.RUNNING,
+    ).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs(stale_after: timedelta, max_attempts: int) -> tuple[int, int]:
+    """Return RUNNING jobs whose worker stopped heartbeating to the queue.
+
+    Jobs that already used up max_attempts are failed instead. Returns (requeued, failed).
+    """
+    cutoff = timezone.now() - stale_after
+    stale = CourseGenerationJob.objects.filter(status=CourseGenerationJob.Status.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True)
+    )
+    failed = 0
+    for job in stale.filter(attempts__gte=max_attempts):
+        fail_job(job, f"Worker stopped responding ({job.attempts} attempts).")
+        failed += 1
+    requeue = list(stale.filter(attempts__lt=max_attempts).values_list("pk", "created_by_id"))
+    requeued = stale.filter(pk__in=[pk for pk, _ in requeue]).update(
+        status=CourseGenerationJob.Status.PENDING,
+        status_message="Waiting for a worker...",
+        worker_id="",
+        heartbeat_at=None,
+        version=F("version") + 1,
+    )
+    bump_user_events(user_id for _, user_id in requeue)
+    return requeued, failed
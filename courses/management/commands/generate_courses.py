@@ -0,0 +1,113 @@
+"""Pre-generate a catalog of courses from a CSV or JSONL topic list (see courses.catalog)."""
+
+import signal
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from agent.ratelimit import update_rate_limits
+from courses.catalog import CatalogWorker, enqueue_catalog, read_catalog
+from courses.job_queue import requeue_stale_jobs
+from courses.models import Course, CourseGenerationJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a course for every entry of a CSV or JSONL catalog that has none yet. "
+        "Safe to re-run: completed entries are skipped and interrupted ones resume."
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "path",
+            help="Catalog file (.csv with a header row, or .jsonl). Column topic is required; optional columns "
+            "are difficulty, additional_instructions, include_questions, num_exercises, include_flashcards, "
+            "num_flashcards.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.GENERATION_WORKER_CONCURRENCY,
+            help="Maximum number of generations running at once.",
+        )
+        parser.add_argument(
+            "--rpm",
+            type=int,
+            default=60,
+            help="Maximum LLM requests per minute, counted with every process sharing the cache "
+            "(replaces COURSEFORGE_LLM_REQUESTS_PER_MINUTE for this run).",
+        )
+        parser.add_argument("--user", help="Username to record as the author of the generated courses.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many entries still need generating; queue nothing.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["concurrency"] < 1 or options["rpm"] <= 0:
+            raise CommandError("--concurrency and --rpm must be positive.")
+        try:
+            entries = read_catalog(options["path"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e)) from e
+        user_id = None
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}.")
+            user_id = user.pk
+
+        if options["dry_run"]:
+            fingerprints = {entry.fingerprint() for entry in entries}
+            done = Course.objects.filter(generation_fingerprint__in=fingerprints).values("generation_fingerprint")
+            remaining = len(fingerprints) - done.distinct().count()
+            self.stdout.write(f"{len(entries)} entries, {remaining} to generate.")
+            return
+
+        # Jobs left running by an interrupted run go back to pending, so this run resumes them.
+        requeue_stale_jobs(timedelta(seconds=settings.GENERATION_STALE_AFTER), settings.GENERATION_MAX_ATTEMPTS)
+        plan = enqueue_catalog(entries, user_id)
+        self.stdout.write(
+            f"{len(entries)} entries: {len(plan.job_ids)} to generate, {plan.already_done} already generated, "
+            f"{plan.in_progress} in progress elsewhere."
+        )
+        if not plan.job_ids:
+            return
+
+        counts = {"generated": 0, "failed": 0}
+
+        def _report(job: CourseGenerationJob) -> None:
+            if job.status == CourseGenerationJob.Status.COMPLETE and job.course is not None:
+                counts["generated"] += 1
+                self.stdout.write(f"[{sum(counts.values())}/{len(plan.job_ids)}] {job.topic}: {job.course.slug}")
+            else:
+                counts["failed"] += 1
+                self.stderr.write(f"[{sum(counts.values())}/{len(plan.job_ids)}] {job.topic}: failed: {job.error}")
+
+        # Every LLM request of this process, including fan-out sections and retries, draws from this budget.
+        update_rate_limits(requests_per_minute=options["rpm"])
+        worker = CatalogWorker(
+            plan.job_ids,
+            on_finished=_report,
+            concurrency=options["concurrency"],
+            poll_interval=1.0,
+            heartbeat_interval=settings.GENERATION_HEARTBEAT_INTERVAL,
+            stale_after=settings.GENERATION_STALE_AFTER,
+            max_attempts=settings.GENERATION_MAX_ATTEMPTS,
+        )
+
+        def _stop(signum: int, frame: Any) -> None:
+            self.stdout.write("Stopping after in-flight jobs finish; run the command again to resume.")
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+        worker.run(once=True)
+        self.stdout.write(
+            f"Generated {counts['generated']}, failed {counts['failed']}, "
+            f"not started {len(plan.job_ids) - sum(counts.values())}."
+        )
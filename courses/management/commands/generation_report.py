@@ -0,0 +1,58 @@
+"""Print p50/p95 latency and token usage of recent course generations, per model (see courses.metrics)."""
+
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from courses.metrics import OPTION_FIELDS, REPORT_FIELDS, generation_report
+from courses.models import CourseGenerationJob
+
+_COLUMNS = {
+    "queue_wait_seconds": "queue s",
+    "llm_seconds": "llm s",
+    "persist_seconds": "persist s",
+    "prompt_tokens": "prompt tok",
+    "completion_tokens": "compl tok",
+    "output_retries": "retries",
+}
+
+
+def _cell(value: float | None) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.2f}" if isinstance(value, float) and not value.is_integer() else f"{value:.0f}"
+
+
+class Command(BaseCommand):
+    help = "Report p50/p95 queue wait, LLM and persistence latency, tokens, and retries of completed generations."
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--days", type=float, default=7, help="Only include jobs created in the last N days.")
+        parser.add_argument(
+            "--by",
+            action="append",
+            choices=OPTION_FIELDS,
+            default=[],
+            help="Also group by this generation option (repeatable), e.g. --by num_exercises.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        jobs = CourseGenerationJob.objects.filter(created_at__gte=timezone.now() - timedelta(days=options["days"]))
+        rows = generation_report(jobs, by=options["by"])
+        if not rows:
+            self.stdout.write("No completed generations with recorded metrics.")
+            return
+        header = ["model", *options["by"], "jobs"]
+        for field in REPORT_FIELDS:
+            header += [f"{_COLUMNS[field]} p50", f"{_COLUMNS[field]} p95"]
+        table = [header]
+        for row in rows:
+            line = [str(value) for value in row.group] + [str(row.jobs)]
+            for field in REPORT_FIELDS:
+                line += [_cell(row.p50[field]), _cell(row.p95[field])]
+            table.append(line)
+        widths = [max(len(line[i]) for line in table) for i in range(len(header))]
+        for line in table:
+            self.stdout.write("  ".join(cell.ljust(width) for cell, width in zip(line, widths, strict=True)).rstrip())
@@ -0,0 +1,45 @@
+"""Re-render stored cheatsheet HTML, e.g. after the markdown extension set or library version changed.
+
+bulk_update skips auto_now, so re-rendered courses get updated_at set here: cached pages and fragments are
+keyed on Course.cache_version and would otherwise keep serving the old HTML.
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from courses.cheatsheets import render_cheatsheet
+from courses.models import Course
+
+_BATCH_SIZE = 200
+_FIELDS = ["cheatsheet_html", "cheatsheet_html_hash", "updated_at"]
+
+
+class Command(BaseCommand):
+    help = "Render the stored HTML of every cheatsheet that is missing or out of date."
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render every cheatsheet, even those whose stored HTML is current.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        courses = Course.objects.only("pk", "cheatsheet", "cheatsheet_html_hash").order_by("pk")
+        stale: list[Course] = []
+        rendered = 0
+        for course in courses.iterator(chunk_size=_BATCH_SIZE):
+            if options["force"]:
+                course.cheatsheet_html_hash = ""
+            if render_cheatsheet(course):
+                course.updated_at = timezone.now()
+                stale.append(course)
+            if len(stale) >= _BATCH_SIZE:
+                Course.objects.bulk_update(stale, _FIELDS)
+                rendered += len(stale)
+                stale = []
+        Course.objects.bulk_update(stale, _FIELDS)
+        rendered += len(stale)
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} cheatsheet(s)."))
@@ -0,0 +1,63 @@
+"""Run the course generation worker: claims queued CourseGenerationJob rows and runs the agent for them."""
+
+import signal
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from courses.worker import AsyncGenerationWorker, BaseGenerationWorker, GenerationWorker
+
+ENGINES: dict[str, type[BaseGenerationWorker]] = {
+    "asyncio": AsyncGenerationWorker,
+    "threads": GenerationWorker,
+}
+
+
+class Command(BaseCommand):
+    help = "Run course generation workers that claim queued jobs from the database."
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--engine",
+            choices=sorted(ENGINES),
+            default=settings.GENERATION_WORKER_ENGINE,
+            help="asyncio: one event loop multiplexes all generations; threads: one thread per generation.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.GENERATION_WORKER_CONCURRENCY,
+            help="Maximum number of generations running at once in this process.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.GENERATION_WORKER_POLL_INTERVAL,
+            help="Seconds to wait before checking an empty queue again.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty instead of waiting for new jobs.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        worker = ENGINES[options["engine"]](
+            concurrency=options["concurrency"],
+            poll_interval=options["poll_interval"],
+            heartbeat_interval=settings.GENERATION_HEARTBEAT_INTERVAL,
+            stale_after=settings.GENERATION_STALE_AFTER,
+            max_attempts=settings.GENERATION_MAX_ATTEMPTS,
+        )
+
+        def _stop(signum: int, frame: Any) -> None:
+            self.stdout.write("Stopping after in-flight jobs finish...")
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+        self.stdout.write(
+            f"Worker {worker.worker_id} running with engine {options['engine']} and concurrency {worker.concurrency}"
+        )
+        worker.run(once=options["once"])
@@ -0,0 +1,117 @@
+"""Per-job cost and latency of course generation, and the p50/p95 report built from them.
+
+Each run records on its CourseGenerationJob the model, prompt and completion tokens, LLM requests and
+output-validation retries (from agent.usage), and how long the job waited in the queue, waited for the LLM,
+and spent writing the course. The report (manage.py generation_report) groups completed jobs by model and,
+optionally, by generation options, to show where time and tokens go.
+"""
+
+import statistics
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.db.models import QuerySet
+
+from agent.usage import GenerationUsage
+
+from .models import CourseGenerationJob
+
+# Recorded fields the report summarizes, in column order.
+REPORT_FIELDS = (
+    "queue_wait_seconds",
+    "llm_seconds",
+    "persist_seconds",
+    "prompt_tokens",
+    "completion_tokens",
+    "output_retries",
+)
+# Job fields the report can additionally group by.
+OPTION_FIELDS = ("difficulty", "include_questions", "num_exercises", "include_flashcards", "num_flashcards")
+
+
+@dataclass
+class StageTimer:
+    """Wall-clock seconds spent in each stage of a job ("llm", "persist"), summed over repeated entries."""
+
+    seconds: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the block and add it to the stage."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.monotonic() - started
+
+
+def record_job_metrics(
+    job: CourseGenerationJob, generation_model: str, usage: GenerationUsage, timer: StageTimer
+) -> None:
+    """Store a finished run's usage and stage latencies on the job.
+
+    A plain UPDATE that leaves version alone: metrics are not a status change clients need to see.
+    """
+    # No requests means the LLM was never reached (cache hit, early failure): leave the usage unmeasured.
+    measured = usage.requests > 0
+    CourseGenerationJob.objects.filter(pk=job.pk).update(
+        generation_model=generation_model,
+        prompt_tokens=usage.prompt_tokens if measured else None,
+        completion_tokens=usage.completion_tokens if measured else None,
+        llm_requests=usage.requests if measured else None,
+        output_retries=usage.output_retries if measured else None,
+        queue_wait_seconds=(job.started_at - job.created_at).total_seconds() if job.started_at else None,
+        llm_seconds=timer.seconds.get("llm"),
+        persist_seconds=timer.seconds.get("persist"),
+    )
+
+
+def percentile(values: Sequence[float], p: int) -> float | None:
+    """The p-th percentile of values (linear interpolation between closest ranks), or None if empty."""
+    if not values:
+        return None
+    if len(values) == 1:
+        return float(values[0])
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+@dataclass
+class ReportRow:
+    """Summary of one group of jobs: count, and p50/p95 of each REPORT_FIELDS value."""
+
+    group: tuple
+    jobs: int
+    p50: dict[str, float | None]
+    p95: dict[str, float | None]
+
+
+def generation_report(jobs: QuerySet[CourseGenerationJob], by: Iterable[str] = ()) -> list[ReportRow]:
+    """p50/p95 of the recorded metrics of completed jobs, grouped by model and then by the given OPTION_FIELDS.
+
+    Jobs that never called the LLM (cache hits, followers) and runs from before metrics were recorded are left out.
+    """
+    group_fields = ("generation_model", *by)
+    rows = (
+        jobs.filter(status=CourseGenerationJob.Status.COMPLETE)
+        .exclude(generation_model="")
+        .exclude(llm_seconds=None)
+        .order_by(*group_fields)
+    )
+    groups: dict[tuple, dict[str, list[float]]] = {}
+    for values in rows.values(*group_fields, *REPORT_FIELDS):
+        group = tuple(values[f] for f in group_fields)
+        samples = groups.setdefault(group, {f: [] for f in REPORT_FIELDS})
+        for f in REPORT_FIELDS:
+            if values[f] is not None:
+                samples[f].append(values[f])
+    return [
+        ReportRow(
+            group=group,
+            jobs=len(samples["llm_seconds"]),
+            p50={f: percentile(sorted(v), 50) for f, v in samples.items()},
+            p95={f: percentile(sorted(v), 95) for f, v in samples.items()},
+        )
+        for group, samples in groups.items()
+    ]
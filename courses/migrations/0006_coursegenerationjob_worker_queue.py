@@ -0,0 +1,67 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0005_coursegenerationjob_created_by_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="additional_instructions",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="difficulty",
+            field=models.CharField(default="beginner", max_length=16),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="include_flashcards",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="include_questions",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="num_exercises",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="num_flashcards",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="worker_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifier of the worker currently running this job (empty if queued).",
+                max_length=128,
+            ),
+        ),
+    ]
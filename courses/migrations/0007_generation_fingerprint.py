@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0006_coursegenerationjob_worker_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="generation_fingerprint",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Hash of the normalized generation request (topic, options, model); used to reuse identical courses.",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="fingerprint",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="force_fresh",
+            field=models.BooleanField(default=False, help_text="Always call the LLM, even if a cached course matches."),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0007_generation_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="leader",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Identical job already in progress; this job waits for it instead of calling the LLM itself.",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="followers",
+                to="courses.coursegenerationjob",
+            ),
+        ),
+    ]
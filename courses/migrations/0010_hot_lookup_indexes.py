@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_course_browse_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="coursegenerationjob",
+            index=models.Index(fields=["created_by", "status", "-created_at"], name="job_by_user_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="coursegenerationjob",
+            index=models.Index(
+                condition=models.Q(("leader__isnull", True)), fields=["status", "created_at"], name="job_claim_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("read", False)), fields=["user", "-created_at"], name="notification_unread_idx"
+            ),
+        ),
+    ]
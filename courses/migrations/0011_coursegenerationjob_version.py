@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0010_hot_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Incremented on every save or status update, so clients can tell when the job changed.",
+            ),
+        ),
+    ]
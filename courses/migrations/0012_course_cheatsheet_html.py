@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_coursegenerationjob_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="cheatsheet_html",
+            field=models.TextField(blank=True, editable=False, help_text="Cheatsheet rendered from markdown."),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="cheatsheet_html_hash",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Hash of the cheatsheet and renderer configuration that cheatsheet_html was rendered from.",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:49
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Existing courses were last changed when they were created."""
+    Course = apps.get_model("courses", "Course")
+    Course.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0012_course_cheatsheet_html"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, help_text="Last change to the course or its exercises/flashcards; versions cached pages."
+            ),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
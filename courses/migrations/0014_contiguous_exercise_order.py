@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def renumber_exercises(apps, schema_editor):
+    """Close gaps in order_index left by skipped items, so exercise N of a course has order_index N."""
+    Course = apps.get_model("courses", "Course")
+    Exercise = apps.get_model("courses", "Exercise")
+    gapped = (
+        Course.objects.annotate(n=Count("exercises"), last=Max("exercises__order_index"))
+        .filter(n__gt=0)
+        .values_list("pk", "n", "last")
+    )
+    for course_id, count, last in gapped:
+        if last == count - 1:
+            continue
+        # Moving each exercise down in ascending order never collides with (course, order_index) uniqueness.
+        for new_index, exercise in enumerate(Exercise.objects.filter(course_id=course_id).order_by("order_index")):
+            if exercise.order_index != new_index:
+                exercise.order_index = new_index
+                exercise.save(update_fields=["order_index"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0013_course_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_exercises, migrations.RunPython.noop),
+    ]
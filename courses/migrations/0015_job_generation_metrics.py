@@ -0,0 +1,55 @@
+# Generated by Django 6.0.2 on 2026-10-17 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0014_contiguous_exercise_order"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="completion_tokens",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="generation_model",
+            field=models.CharField(blank=True, help_text="LLM model the job ran with.", max_length=128),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="llm_requests",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="llm_seconds",
+            field=models.FloatField(blank=True, help_text="Time spent waiting for the LLM.", null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="output_retries",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Extra LLM requests made because the output failed validation.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="persist_seconds",
+            field=models.FloatField(blank=True, help_text="Time spent writing the course.", null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="prompt_tokens",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="coursegenerationjob",
+            name="queue_wait_seconds",
+            field=models.FloatField(blank=True, help_text="From creation until a worker started it.", null=True),
+        ),
+    ]
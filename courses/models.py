@@ -1,4 +1,5 @@
 import uuid
+from typing import Any
 
 from django.conf import settings
 from django.db import models
@@ -11,6 +12,13 @@ class Course(models.Model):
     slug = models.SlugField(max_length=255, unique=True, allow_unicode=True)
     overview = models.TextField()
     cheatsheet = models.TextField()
+    cheatsheet_html = models.TextField(blank=True, editable=False, help_text="Cheatsheet rendered from markdown.")
+    cheatsheet_html_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="Hash of the cheatsheet and renderer configuration that cheatsheet_html was rendered from.",
+    )
     has_questions = models.BooleanField(default=True)
     has_flashcards = models.BooleanField(default=False)
     created_by = models.ForeignKey(
@@ -20,7 +28,16 @@ class Course(models.Model):
         related_name="created_courses",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(
+        auto_now=True, help_text="Last change to the course or its exercises/flashcards; versions cached pages."
+    )
     topic_normalized = models.CharField(max_length=255, blank=True, db_index=True)
+    generation_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="Hash of the normalized generation request (topic, options, model); used to reuse identical courses.",
+    )
     generation_model = models.CharField(
         max_length=128,
         blank=True,
@@ -30,13 +47,22 @@ class Course(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination of the browse page: ORDER BY created_at DESC, id DESC.
+            models.Index(fields=["-created_at", "-id"], name="course_browse_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
+    @property
+    def cache_version(self) -> int:
+        """Version of the course's content for cache keys: updated_at in microseconds."""
+        return int(self.updated_at.timestamp() * 1_000_000)
+
 
 class CourseGenerationJob(models.Model):
-    """Tracks an async course generation; status is polled by the generating page."""
+    """A queued course generation: stores the request options and is claimed and run by a generation worker."""
 
     class Status(models.TextChoices):
         PENDING = "pending"
@@ -58,10 +84,81 @@ class CourseGenerationJob(models.Model):
         related_name="generation_jobs",
     )
     topic = models.CharField(max_length=255, blank=True)
+    difficulty = models.CharField(max_length=16, default="beginner")
+    additional_instructions = models.TextField(blank=True)
+    include_questions = models.BooleanField(default=True)
+    num_exercises = models.PositiveSmallIntegerField(null=True, blank=True)
+    include_flashcards = models.BooleanField(default=False)
+    num_flashcards = models.PositiveSmallIntegerField(null=True, blank=True)
+    worker_id = models.CharField(
+        max_length=128, blank=True, help_text="Identifier of the worker currently running this job (empty if queued)."
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    force_fresh = models.BooleanField(default=False, help_text="Always call the LLM, even if a cached course matches.")
+    fingerprint = models.CharField(max_length=64, blank=True, db_index=True)
+    leader = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="followers",
+        help_text="Identical job already in progress; this job waits for it instead of calling the LLM itself.",
+    )
+    version = models.PositiveIntegerField(
+        default=0, help_text="Incremented on every save or status update, so clients can tell when the job changed."
+    )
+    # Cost and stage latencies of the last run, recorded when it ends (see courses.metrics). Null when not measured.
+    generation_model = models.CharField(max_length=128, blank=True, help_text="LLM model the job ran with.")
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    llm_requests = models.PositiveIntegerField(null=True, blank=True)
+    output_retries = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Extra LLM requests made because the output failed validation."
+    )
+    queue_wait_seconds = models.FloatField(null=True, blank=True, help_text="From creation until a worker started it.")
+    llm_seconds = models.FloatField(null=True, blank=True, help_text="Time spent waiting for the LLM.")
+    persist_seconds = models.FloatField(null=True, blank=True, help_text="Time spent writing the course.")
+
+    class Meta:
+        indexes = [
+            # A user's queued and running jobs, newest first (the course list's "Generating..." cards). status is
+            # an index column rather than a partial-index condition: it is compared with bound parameters, which
+            # the planner cannot match against a partial index's WHERE clause.
+            models.Index(fields=["created_by", "status", "-created_at"], name="job_by_user_status_idx"),
+            # Oldest claimable leader job for the workers (see job_queue.claim_next_job).
+            models.Index(
+                fields=["status", "created_at"], condition=models.Q(leader__isnull=True), name="job_claim_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Job {self.id} ({self.status})"
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save and bump version.
+
+        Queryset .update() calls that change the job must bump version themselves, and call
+        courses.changes.bump_user_events (saves do that through a post_save receiver).
+        """
+        self.version += 1
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+
+    def generation_options(self) -> dict[str, Any]:
+        """Keyword arguments for run_course_generator_sync built from the stored request options."""
+        return {
+            "topic": self.topic,
+            "difficulty": self.difficulty,
+            "additional_instructions": self.additional_instructions or None,
+            "include_questions": self.include_questions,
+            "num_exercises": self.num_exercises,
+            "include_flashcards": self.include_flashcards,
+            "num_flashcards": self.num_flashcards,
+        }
+
 
 class Exercise(models.Model):
     """A single exercise (multiple choice or matching pairs) belonging to a course."""
@@ -117,6 +214,14 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Unread notifications per user, newest first: polled by every open tab (see api_notifications).
+            models.Index(
+                fields=["user", "-created_at"],
+                condition=models.Q(read=False),
+                name="notification_unread_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Notification({self.user_id}): {self.message[:50]}"
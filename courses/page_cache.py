@@ -0,0 +1,63 @@
+"""Caching of the public course pages (detail and flashcards) for anonymous visitors.
+
+Shared course links bring bursts of anonymous traffic to pages whose content only changes when the course
+is edited. For anonymous GETs the page is answered from one small query for the course's id and
+updated_at: a conditional request whose ETag or Last-Modified still matches gets 304 Not Modified, and
+otherwise the rendered response is served from the cache under a key that includes the course version
+(Course.cache_version), so edits never serve stale pages and need no explicit purge. A burst of misses
+renders the page once (courseforge.cache.get_or_compute). Authenticated users see per-user progress and
+get the normal view, whose templates cache their static fragments instead. Views whose output is the same
+for every visitor (the JSON API) pass anonymous_only=False to get the same treatment for all requests.
+"""
+
+from collections.abc import Callable
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import Http404, HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from courseforge.cache import get_or_compute, make_key
+
+from .models import Course
+
+CourseView = Callable[..., HttpResponse]
+
+
+def cache_course_page(kind: str, *, anonymous_only: bool = True) -> Callable[[CourseView], CourseView]:
+    """Serve a course page view(request, slug, ...) from the page cache for (anonymous) GET requests."""
+
+    def decorator(view: CourseView) -> CourseView:
+        @wraps(view)
+        def wrapper(request: HttpRequest, slug: str, *args, **kwargs) -> HttpResponse:
+            # Pages carrying one-off flash messages are rendered fresh.
+            if request.method not in ("GET", "HEAD") or (
+                anonymous_only and (request.user.is_authenticated or len(get_messages(request)))
+            ):
+                return view(request, slug, *args, **kwargs)
+            course = Course.objects.filter(slug=slug).only("pk", "updated_at").first()
+            if course is None:
+                raise Http404("No course matches the given query.")
+            etag = f'"{kind}-{course.pk}-{course.cache_version}"'
+            last_modified = int(course.updated_at.timestamp())
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = get_or_compute(
+                    make_key("course-page", kind, course.pk, course.cache_version),
+                    lambda: view(request, slug, *args, **kwargs),
+                    settings.COURSE_PAGE_CACHE_TTL,
+                    should_cache=lambda r: r.status_code == 200,
+                )
+                if response.status_code != 200:
+                    return response
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            # Revalidate every time: a 304 is cheap, and edits must show up at once.
+            patch_cache_control(response, public=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
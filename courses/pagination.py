@@ -0,0 +1,43 @@
+"""Keyset (seek) pagination over (created_at, id), newest first.
+
+Pages are addressed by an opaque cursor encoding the last row's (created_at, id), so fetching page N
+costs the same as page 1 (no OFFSET scan) and rows inserted meanwhile never shift or repeat a page.
+"""
+
+import base64
+from datetime import datetime
+from typing import Any
+
+from django.db.models import Q, QuerySet
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    """Opaque, URL-safe cursor pointing just past the row with this (created_at, pk)."""
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    """Inverse of encode_cursor; returns None for a missing or malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset: QuerySet[Any], cursor: str | None, page_size: int) -> tuple[list[Any], str | None]:
+    """Return (rows, next_cursor) for the page after cursor; next_cursor is None on the last page."""
+    qs = queryset.order_by("-created_at", "-pk")
+    position = decode_cursor(cursor or "")
+    if position is not None:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    rows = list(qs[: page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    last = rows[page_size - 1]
+    return rows[:page_size], encode_cursor(last.created_at, last.pk)
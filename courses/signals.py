@@ -0,0 +1,57 @@
+"""Signal handlers keeping Course.updated_at current and waking users' event streams when their data changes."""
+
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from django.db.models import Model, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .changes import bump_user_events
+from .models import Course, CourseGenerationJob, Exercise, Flashcard, Notification
+
+# Courses already touched by each queryset delete(), so deleting many rows of one course updates it once.
+_touched_by_delete: WeakKeyDictionary[QuerySet, set[int]] = WeakKeyDictionary()
+
+
+def _touch(course_id: int) -> None:
+    Course.objects.filter(pk=course_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_save, sender=Flashcard)
+def touch_course(sender: type, instance: Exercise | Flashcard, **kwargs: Any) -> None:
+    """An exercise or flashcard was edited (e.g. in the admin): invalidate its course's cached pages."""
+    _touch(instance.course_id)
+
+
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=Flashcard)
+def touch_course_on_delete(
+    sender: type, instance: Exercise | Flashcard, origin: Model | QuerySet | None = None, **kwargs: Any
+) -> None:
+    """An exercise or flashcard was deleted: invalidate its course's cached pages, once per delete() call.
+
+    Rows removed because their course is being deleted leave it alone: there is nothing left to invalidate.
+    """
+    if isinstance(origin, Course) or (isinstance(origin, QuerySet) and origin.model is Course):
+        return
+    if isinstance(origin, QuerySet):
+        touched = _touched_by_delete.setdefault(origin, set())
+        if instance.course_id in touched:
+            return
+        touched.add(instance.course_id)
+    _touch(instance.course_id)
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender: type, instance: Notification, **kwargs: Any) -> None:
+    """A notification was created or marked read: wake its user's event streams."""
+    bump_user_events([instance.user_id])
+
+
+@receiver(post_save, sender=CourseGenerationJob)
+def job_saved(sender: type, instance: CourseGenerationJob, **kwargs: Any) -> None:
+    """A generation job was saved (a new version): wake its user's event streams."""
+    bump_user_events([instance.created_by_id])
@@ -0,0 +1,52 @@
+"""Unique slug allocation for courses: one query to find the next free suffix, atomic retry on collision."""
+
+import re
+from typing import Any, cast
+
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Count, Max, Q
+from django.db.models.functions import Cast, Substr
+from django.utils.text import slugify
+
+from .models import Course
+
+# Leave room for a "-<n>" suffix within Course.slug's max_length.
+_MAX_BASE_LENGTH = cast(int, Course._meta.get_field("slug").max_length) - 10
+_ALLOCATION_ATTEMPTS = 5
+
+
+def base_slug_for(title: str) -> str:
+    """Slugify a course title (Unicode allowed), truncated so any numeric suffix still fits."""
+    return slugify(title, allow_unicode=True)[:_MAX_BASE_LENGTH].strip("-") or "course"
+
+
+def next_free_slug(base_slug: str) -> str:
+    """Return base_slug if it is free, otherwise base_slug-N with N one past the highest existing suffix.
+
+    A single aggregate query over the base slug and its "base-N" siblings, instead of probing
+    base-1, base-2, ... one query at a time.
+    """
+    suffixed = Q(slug__startswith=f"{base_slug}-", slug__regex=rf"^{re.escape(base_slug)}-[0-9]{{1,9}}$")
+    taken = Course.objects.filter(Q(slug=base_slug) | suffixed).aggregate(
+        base=Count("pk", filter=Q(slug=base_slug)),
+        max_suffix=Max(
+            Cast(Substr("slug", len(base_slug) + 2), output_field=BigIntegerField()),
+            filter=~Q(slug=base_slug),
+        ),
+    )
+    if not taken["base"] and taken["max_suffix"] is None:
+        return base_slug
+    return f"{base_slug}-{(taken['max_suffix'] or 0) + 1}"
+
+
+def create_course_with_unique_slug(title: str, **fields: Any) -> Course:
+    """Create a Course whose slug is derived from title, retrying if a concurrent writer takes the same slug."""
+    base_slug = base_slug_for(title)
+    for _ in range(_ALLOCATION_ATTEMPTS - 1):
+        try:
+            with transaction.atomic():
+                return Course.objects.create(title=title, slug=next_free_slug(base_slug), **fields)
+        except IntegrityError:
+            continue
+    # Last attempt: a collision that keeps happening is surfaced to the caller.
+    return Course.objects.create(title=title, slug=next_free_slug(base_slug), **fields)
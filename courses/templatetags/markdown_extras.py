@@ -1,19 +1,21 @@
 from typing import cast
 
-import markdown
 from django import template
 from django.utils.safestring import mark_safe
 
+from courses.cheatsheets import render_markdown, rendered_cheatsheet
+from courses.models import Course
+
 register = template.Library()
 
 
 @register.filter
 def markdown_to_html(value: str) -> str:
     """Render markdown text to HTML. Use with {{ content|markdown_to_html }} in templates."""
-    if not value:
-        return ""
-    html = markdown.markdown(
-        value,
-        extensions=["extra", "nl2br", "sane_lists"],
-    )
-    return cast(str, mark_safe(html))
+    return cast(str, mark_safe(render_markdown(value)))
+
+
+@register.filter
+def cheatsheet_html(course: Course) -> str:
+    """A course's rendered cheatsheet, from its stored HTML (see courses.cheatsheets)."""
+    return cast(str, mark_safe(rendered_cheatsheet(course)))
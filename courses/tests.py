@@ -1,10 +1,45 @@
-"""Tests for Course model and course list/detail views."""
+"""Tests for Course model, course list/detail views, and the generation job queue."""
 
+import asyncio
+import json
+import tempfile
+import uuid
+from collections.abc import AsyncGenerator
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Any, cast
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from pydantic_ai.usage import RunUsage
+
+from agent.agent import CourseContent
+from agent.ratelimit import get_rate_limiter, update_rate_limits
+from agent.usage import record_usage
+from progress.models import CourseProgress
+from progress.rollup import rebuild_course_progress, record_attempt
 
-from .models import Course
+from . import events, grading
+from .catalog import CatalogEntry, enqueue_catalog, read_catalog
+from .changes import change_counter, change_key
+from .forms import CreateCourseForm
+from .generation import enqueue_generation, generation_fingerprint, persist_generated_course, run_generation
+from .job_queue import claim_next_job, heartbeat, requeue_stale_jobs
+from .metrics import generation_report
+from .models import Course, CourseGenerationJob, Exercise, Flashcard, Notification
+from .slugs import create_course_with_unique_slug, next_free_slug
+from .worker import AsyncGenerationWorker, GenerationWorker
 
 User = get_user_model()
 
@@ -73,6 +108,35 @@ class CourseListViewTests(TestCase):
         self.assertEqual(courses[0].slug, "course-b")
         self.assertEqual(courses[1].slug, "course-a")
 
+    def test_course_list_query_count_is_constant(self) -> None:
+        """Creator and exercise counts come from one query, however many courses are listed."""
+        user = User.objects.create_user(username="teacher", password="testpass123")
+        for n in range(5):
+            course = Course.objects.create(title=f"C{n}", slug=f"c{n}", overview="o", cheatsheet="c", created_by=user)
+            Exercise.objects.create(course=course, exercise_type="multiple_choice", question="q", payload={})
+        client = Client()
+        with self.assertNumQueries(1):
+            response = client.get(reverse("courses:list"))
+        self.assertContains(response, "1 exercise<", count=5)
+        self.assertContains(response, "teacher", count=5)
+
+    @override_settings(COURSE_LIST_PAGE_SIZE=2)
+    def test_course_list_keyset_pages(self) -> None:
+        """Pages follow the cursor newest-first, and the JSON endpoint returns the next cards."""
+        for n in range(5):
+            Course.objects.create(title=f"Course {n}", slug=f"course-{n}", overview="o", cheatsheet="c")
+        client = Client()
+        first = client.get(reverse("courses:list"))
+        self.assertEqual([c.slug for c in first.context["courses"]], ["course-4", "course-3"])
+        cursor = first.context["next_cursor"]
+        second = client.get(reverse("courses:list_page"), {"after": cursor}).json()
+        self.assertIn("Course 2", second["html"])
+        self.assertIn("Course 1", second["html"])
+        self.assertNotIn("Course 3", second["html"])
+        last = client.get(reverse("courses:list"), {"after": second["next_cursor"]})
+        self.assertEqual([c.slug for c in last.context["courses"]], ["course-0"])
+        self.assertIsNone(last.context["next_cursor"])
+
 
 class CourseDetailViewTests(TestCase):
     """Tests for the course detail view."""
@@ -111,3 +175,1380 @@ class CourseDetailViewTests(TestCase):
         client = Client()
         response = client.get(reverse("courses:detail", kwargs={"slug": "my-course"}))
         self.assertTemplateUsed(response, "courses/course_detail.html")
+
+
+def _sample_content(title: str = "Python basics") -> CourseContent:
+    """Small valid CourseContent as the agent would return it."""
+    return CourseContent.model_validate(
+        {
+            "title": title,
+            "overview": "Learn the basics.",
+            "cheatsheet": "### Syntax\n- print()",
+            "exercises": [
+                {
+                    "type": "multiple_choice",
+                    "multiple_choice": {
+                        "question": "What prints text?",
+                        "options": ["print", "echo", "say", "puts"],
+                        "correct_index": 0,
+                        "explanation": "print writes to stdout.",
+                    },
+                },
+            ],
+            "flashcards": [{"front": "print", "back": "Output text"}],
+        }
+    )
+
+
+class CourseCreateViewTests(TestCase):
+    """Tests for submitting the course creation form."""
+
+    def test_post_queues_job_with_options(self) -> None:
+        """A valid submission stores a pending job with the requested options and starts nothing inline."""
+        user = User.objects.create_user(username="teacher", password="testpass123")
+        client = Client()
+        client.force_login(user)
+        with patch("courses.generation.run_course_generator_sync") as generator:
+            response = client.post(
+                reverse("courses:create"),
+                {
+                    "topic": "Python lists",
+                    "difficulty": "advanced",
+                    "include_questions": "on",
+                    "num_exercises": "5",
+                    "include_flashcards": "on",
+                    "num_flashcards": "10",
+                },
+            )
+        self.assertRedirects(response, reverse("courses:list"))
+        generator.assert_not_called()
+        job = CourseGenerationJob.objects.get()
+        self.assertEqual(job.status, CourseGenerationJob.Status.PENDING)
+        self.assertEqual(job.created_by, user)
+        self.assertEqual(job.difficulty, "advanced")
+        self.assertEqual(job.num_exercises, 5)
+        self.assertTrue(job.include_flashcards)
+        self.assertEqual(job.num_flashcards, 10)
+
+
+class CreateCourseFormTests(TestCase):
+    """Tests for the course creation form's count limits."""
+
+    def test_larger_counts_only_with_fanout(self) -> None:
+        """20 exercises and 40 flashcards are accepted only when sections are generated in parallel."""
+        data = {
+            "topic": "Rust",
+            "difficulty": "beginner",
+            "include_questions": "on",
+            "num_exercises": "20",
+            "include_flashcards": "on",
+            "num_flashcards": "40",
+        }
+        self.assertFalse(CreateCourseForm(data).is_valid())
+        with override_settings(GENERATION_STRATEGY="fanout"):
+            form = CreateCourseForm(data)
+            self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual((form.cleaned_data["num_exercises"], form.cleaned_data["num_flashcards"]), (20, 40))
+
+
+class JobQueueTests(TestCase):
+    """Tests for claiming, heartbeating, and re-queueing generation jobs."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="teacher", password="testpass123")
+
+    def _job(self, **kwargs) -> CourseGenerationJob:
+        return CourseGenerationJob.objects.create(created_by=self.user, topic="Python", **kwargs)
+
+    def test_claim_returns_oldest_pending_job_once(self) -> None:
+        """Claiming marks the oldest pending job RUNNING for the worker; a second claim gets the next job."""
+        first = self._job()
+        second = self._job()
+        claimed = claim_next_job("worker-a")
+        assert claimed is not None
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, CourseGenerationJob.Status.RUNNING)
+        self.assertEqual(claimed.worker_id, "worker-a")
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNotNone(claimed.heartbeat_at)
+        again = claim_next_job("worker-b")
+        assert again is not None
+        self.assertEqual(again.pk, second.pk)
+        self.assertIsNone(claim_next_job("worker-c"))
+
+    def test_heartbeat_only_touches_own_jobs(self) -> None:
+        """heartbeat() updates jobs owned by the worker and ignores others."""
+        self._job()
+        job = claim_next_job("worker-a")
+        assert job is not None
+        self.assertEqual(heartbeat("worker-a", [str(job.pk)]), 1)
+        self.assertEqual(heartbeat("worker-b", [str(job.pk)]), 0)
+
+    def test_requeue_stale_jobs(self) -> None:
+        """Jobs without a recent heartbeat are re-queued, or failed once attempts are used up."""
+        stale_at = timezone.now() - timedelta(minutes=10)
+        retry = self._job(status=CourseGenerationJob.Status.RUNNING, heartbeat_at=stale_at, attempts=1)
+        exhausted = self._job(status=CourseGenerationJob.Status.RUNNING, heartbeat_at=stale_at, attempts=3)
+        alive = self._job(status=CourseGenerationJob.Status.RUNNING, heartbeat_at=timezone.now(), attempts=1)
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=2), max_attempts=3), (1, 1))
+
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(retry.status, CourseGenerationJob.Status.PENDING)
+        self.assertEqual(retry.worker_id, "")
+        self.assertEqual(exhausted.status, CourseGenerationJob.Status.FAILED)
+        self.assertEqual(alive.status, CourseGenerationJob.Status.RUNNING)
+        self.assertTrue(Notification.objects.filter(user=self.user, course=None).exists())
+
+
+class RunGenerationTests(TestCase):
+    """Tests for running a claimed job through the generation pipeline."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="teacher", password="testpass123")
+        CourseGenerationJob.objects.create(created_by=self.user, topic="Python Basics", num_exercises=1)
+        job = claim_next_job("worker-a")
+        assert job is not None
+        self.job = job
+
+    def test_success_creates_course_and_notification(self) -> None:
+        """A successful run persists the course, completes the job, and notifies the user."""
+        with patch(
+            "courses.generation.run_course_generator_sync", return_value=(_sample_content(), "test:model")
+        ) as generator:
+            run_generation(str(self.job.pk))
+        self.assertEqual(generator.call_args.kwargs["num_exercises"], 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.Status.COMPLETE)
+        assert self.job.course is not None
+        self.assertEqual(self.job.course.created_by, self.user)
+        self.assertEqual(self.job.course.topic_normalized, "python basics")
+        self.assertEqual(self.job.course.exercises.count(), 1)
+        self.assertEqual(self.job.course.flashcards.count(), 1)
+        self.assertTrue(Notification.objects.filter(user=self.user, course=self.job.course).exists())
+
+    @override_settings(GENERATION_STRATEGY="fanout")
+    def test_fanout_strategy_uses_parallel_generator(self) -> None:
+        """With the fanout strategy the job runs through the fan-out generator and is persisted as usual."""
+        with patch(
+            "courses.generation.run_course_generator_fanout_sync", return_value=(_sample_content(), "test:model")
+        ) as generator:
+            run_generation(str(self.job.pk))
+        self.assertEqual(generator.call_args.kwargs["num_exercises"], 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.Status.COMPLETE)
+
+    def test_run_records_usage_and_stage_latencies(self) -> None:
+        """The job records the model, the agent's token usage, and the queue, LLM, and persistence times."""
+
+        def generate(**kwargs):
+            record_usage(RunUsage(input_tokens=120, output_tokens=800, requests=2))
+            return _sample_content(), "test:model"
+
+        with patch("courses.generation.run_course_generator_sync", side_effect=generate):
+            run_generation(str(self.job.pk))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.generation_model, "test:model")
+        self.assertEqual((self.job.prompt_tokens, self.job.completion_tokens), (120, 800))
+        self.assertEqual((self.job.llm_requests, self.job.output_retries), (2, 1))
+        assert self.job.queue_wait_seconds is not None
+        assert self.job.llm_seconds is not None
+        assert self.job.persist_seconds is not None
+        self.assertGreaterEqual(self.job.queue_wait_seconds, 0)
+        self.assertGreaterEqual(self.job.llm_seconds, 0)
+        self.assertGreater(self.job.persist_seconds, 0)
+
+    def test_failure_marks_job_failed(self) -> None:
+        """An agent error fails the job with the error message and notifies the user."""
+        with patch("courses.generation.run_course_generator_sync", side_effect=RuntimeError("boom")):
+            run_generation(str(self.job.pk))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.Status.FAILED)
+        self.assertEqual(self.job.error, "boom")
+        self.assertFalse(Course.objects.exists())
+
+
+def _streamed_content(exercises: int = 3, flashcards: int = 2) -> CourseContent:
+    """CourseContent with numbered exercises and flashcards, to tell streamed items apart."""
+    content = _sample_content()
+    item = content.exercises[0]
+    choice = item.multiple_choice
+    assert choice is not None
+    content.exercises = [
+        item.model_copy(update={"multiple_choice": choice.model_copy(update={"question": f"Q{i}"})})
+        for i in range(exercises)
+    ]
+    content.flashcards = [content.flashcards[0].model_copy(update={"front": f"F{i}"}) for i in range(flashcards)]
+    return content
+
+
+@override_settings(GENERATION_STRATEGY="stream")
+class StreamingGenerationTests(TestCase):
+    """Tests for persisting a course progressively while the agent's output streams in."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="teacher", password="testpass123")
+        CourseGenerationJob.objects.create(
+            created_by=self.user, topic="Python", num_exercises=3, include_flashcards=True, num_flashcards=2
+        )
+        job = claim_next_job("worker-a")
+        assert job is not None
+        self.job = job
+        self.seen: list[tuple[int, int, str, str]] = []
+
+    def _snapshot(self) -> None:
+        job = CourseGenerationJob.objects.get(pk=self.job.pk)
+        course = job.course
+        self.seen.append(
+            (
+                course.exercises.count() if course else -1,
+                course.flashcards.count() if course else -1,
+                course.generation_fingerprint if course else "",
+                job.status_message,
+            )
+        )
+
+    def _stream(self, partials: list[CourseContent], error: Exception | None = None):
+        async def fake_stream(**kwargs):
+            for partial in partials:
+                yield partial
+                await sync_to_async(self._snapshot)()
+            if error is not None:
+                raise error
+
+        return patch("courses.generation.stream_course_generator", side_effect=fake_stream)
+
+    def _partials(self, content: CourseContent) -> list[CourseContent]:
+        header = content.model_copy(update={"exercises": [], "flashcards": []})
+        return [
+            header,
+            header.model_copy(update={"exercises": content.exercises[:1]}),
+            header.model_copy(update={"exercises": content.exercises[:2]}),
+            header.model_copy(update={"exercises": content.exercises, "flashcards": content.flashcards[:1]}),
+            content,
+        ]
+
+    def test_course_is_persisted_as_content_arrives(self) -> None:
+        """The course appears once its header is complete; items are appended and counted as they finish."""
+        content = _streamed_content()
+        with self._stream(self._partials(content)):
+            run_generation(str(self.job.pk))
+
+        self.assertEqual(
+            self.seen[:4],
+            [
+                (-1, -1, "", "Generating course content..."),
+                (0, 0, "", "Generated 0/3 exercises, 0/2 flashcards..."),
+                (1, 0, "", "Generated 1/3 exercises, 0/2 flashcards..."),
+                (3, 0, "", "Generated 3/3 exercises, 0/2 flashcards..."),
+            ],
+        )
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.Status.COMPLETE)
+        course = self.job.course
+        assert course is not None
+        self.assertEqual(course.generation_fingerprint, self.job.fingerprint)
+        self.assertTrue(course.has_questions and course.has_flashcards)
+        self.assertEqual(list(course.exercises.values_list("question", flat=True)), ["Q0", "Q1", "Q2"])
+        self.assertEqual(list(course.flashcards.values_list("front", "order_index")), [("F0", 0), ("F1", 1)])
+        self.assertIn("<h3>Syntax</h3>", course.cheatsheet_html)
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_failure_deletes_partial_course(self) -> None:
+        """If the stream breaks off, the half-built course is removed and the job fails."""
+        partials = self._partials(_streamed_content())[:3]
+        with self._stream(partials, error=RuntimeError("connection reset")):
+            run_generation(str(self.job.pk))
+        self.assertEqual(self.seen[-1][0], 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.Status.FAILED)
+        self.assertIsNone(self.job.course)
+        self.assertFalse(Course.objects.exists())
+
+    def test_final_output_replaces_diverging_stream(self) -> None:
+        """If the complete output does not continue what was streamed (a retry), the items are rebuilt."""
+        streamed = self._partials(_streamed_content())[:3]
+        final = _streamed_content(exercises=2, flashcards=1)
+        final.exercises.reverse()
+        with self._stream([*streamed, final]):
+            run_generation(str(self.job.pk))
+        self.job.refresh_from_db()
+        assert self.job.course is not None
+        self.assertEqual(list(self.job.course.exercises.values_list("question", flat=True)), ["Q1", "Q0"])
+        self.assertEqual(self.job.course.flashcards.count(), 1)
+
+
+class SlugAllocationTests(TestCase):
+    """Tests for single-query unique slug allocation."""
+
+    def _course(self, slug: str) -> Course:
+        return Course.objects.create(title=slug, slug=slug, overview="o", cheatsheet="c")
+
+    def test_free_base_slug_is_used_as_is(self) -> None:
+        """With no existing course the base slug is returned."""
+        self.assertEqual(next_free_slug("intro-python"), "intro-python")
+
+    def test_next_suffix_found_in_one_query(self) -> None:
+        """The 41st course on a title costs one query and gets the next suffix after the highest one."""
+        self._course("intro-python")
+        for n in range(1, 40):
+            self._course(f"intro-python-{n}")
+        self._course("intro-python-advanced")
+        self._course("intro-python-3b")
+        with self.assertNumQueries(1):
+            self.assertEqual(next_free_slug("intro-python"), "intro-python-40")
+
+    def test_suffix_continues_after_base_is_deleted(self) -> None:
+        """Existing suffixes are respected even if the bare base slug is gone."""
+        self._course("intro-python-7")
+        self.assertEqual(next_free_slug("intro-python"), "intro-python-8")
+
+    def test_unicode_title(self) -> None:
+        """Unicode titles keep their characters in the slug."""
+        course = create_course_with_unique_slug("Kužne bolezni", overview="o", cheatsheet="c")
+        again = create_course_with_unique_slug("Kužne bolezni", overview="o", cheatsheet="c")
+        self.assertEqual(course.slug, "kužne-bolezni")
+        self.assertEqual(again.slug, "kužne-bolezni-1")
+
+    def test_collision_is_retried(self) -> None:
+        """If a concurrent writer takes the chosen slug first, allocation retries with a fresh lookup."""
+        self._course("intro-python")
+        with patch("courses.slugs.next_free_slug", side_effect=["intro-python", "intro-python-1"]):
+            course = create_course_with_unique_slug("Intro Python", overview="o", cheatsheet="c")
+        self.assertEqual(course.slug, "intro-python-1")
+
+
+class PersistGeneratedCourseTests(TestCase):
+    """Tests for the bulk, all-or-nothing persistence stage."""
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(username="teacher", password="testpass123")
+        self.job = CourseGenerationJob.objects.create(created_by=user, topic="Python")
+
+    def _content(self, n: int, title: str = "Python basics") -> CourseContent:
+        content = _sample_content(title)
+        content.exercises = content.exercises * n
+        content.flashcards = content.flashcards * 2 * n
+        return content
+
+    def test_query_count_does_not_grow_with_content(self) -> None:
+        """Persisting 2 or 10 exercises (and twice as many flashcards) costs the same number of queries."""
+        with self.assertNumQueries(13):
+            persist_generated_course(self.job, self._content(2), "test:model")
+        other = CourseGenerationJob.objects.create(topic="Python")
+        with self.assertNumQueries(12):  # no creator, so no notification
+            course = persist_generated_course(other, self._content(10, "Rust basics"), "test:model")
+        self.assertEqual(list(course.exercises.values_list("order_index", flat=True)), list(range(10)))
+        self.assertEqual(course.flashcards.count(), 20)
+
+    def test_invalid_items_do_not_leave_gaps(self) -> None:
+        """Exercise items without a payload for their type are skipped and indices stay contiguous."""
+        content = _sample_content()
+        broken = content.exercises[0].model_copy(update={"multiple_choice": None})
+        content.exercises = [content.exercises[0], broken, content.exercises[0]]
+        course = persist_generated_course(self.job, content, "test:model")
+        self.assertEqual(list(course.exercises.values_list("order_index", flat=True)), [0, 1])
+
+    def test_failure_leaves_no_partial_course(self) -> None:
+        """If any insert fails, neither the course nor its exercises are visible."""
+        with (
+            patch("courses.generation.Flashcard.objects.bulk_create", side_effect=RuntimeError("db down")),
+            patch("courses.generation.run_course_generator_sync", return_value=(_sample_content(), "test:model")),
+        ):
+            claim_next_job("worker-a")
+            run_generation(str(self.job.pk))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.Status.FAILED)
+        self.assertFalse(Course.objects.exists())
+        self.assertFalse(Exercise.objects.exists())
+
+
+class GenerationCacheTests(TestCase):
+    """Tests for reusing courses generated from an identical normalized request."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="learner", password="testpass123")
+        self.fingerprint = generation_fingerprint("Python lists", num_exercises=5)
+        self.course = Course.objects.create(
+            title="Python lists",
+            slug="python-lists",
+            overview="o",
+            cheatsheet="c",
+            generation_fingerprint=self.fingerprint,
+        )
+
+    def test_fingerprint_normalizes_topic_but_not_options(self) -> None:
+        """Case and whitespace in the topic do not matter; difficulty, counts, and model do."""
+        self.assertEqual(generation_fingerprint("  PYTHON   lists ", num_exercises=5), self.fingerprint)
+        self.assertNotEqual(generation_fingerprint("Python lists", num_exercises=8), self.fingerprint)
+        self.assertNotEqual(
+            generation_fingerprint("Python lists", difficulty="advanced", num_exercises=5), self.fingerprint
+        )
+        self.assertNotEqual(
+            generation_fingerprint("Python lists", num_exercises=5, model="other:model"), self.fingerprint
+        )
+
+    def test_enqueue_hit_completes_job_without_worker(self) -> None:
+        """A matching recent course completes the job at once and notifies the user."""
+        job = enqueue_generation(self.user.pk, "python  Lists", num_exercises=5)
+        self.assertEqual(job.status, CourseGenerationJob.Status.COMPLETE)
+        self.assertEqual(job.course, self.course)
+        self.assertTrue(Notification.objects.filter(user=self.user, course=self.course).exists())
+
+    def test_force_fresh_and_expired_entries_are_queued(self) -> None:
+        """force_fresh skips the cache, and so does a TTL of 0."""
+        fresh = enqueue_generation(self.user.pk, "Python lists", num_exercises=5, force_fresh=True)
+        self.assertEqual(fresh.status, CourseGenerationJob.Status.PENDING)
+        with override_settings(GENERATION_CACHE_TTL=0):
+            expired = enqueue_generation(self.user.pk, "Python lists", num_exercises=5)
+        self.assertEqual(expired.status, CourseGenerationJob.Status.PENDING)
+
+    def test_create_view_redirects_to_cached_course(self) -> None:
+        """Submitting an identical request sends the user straight to the existing course."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(
+            reverse("courses:create"),
+            {"topic": "Python lists", "difficulty": "beginner", "include_questions": "on", "num_exercises": "5"},
+        )
+        self.assertRedirects(response, reverse("courses:detail", kwargs={"slug": "python-lists"}))
+
+    def test_worker_uses_cache_for_queued_duplicates(self) -> None:
+        """A job queued before its twin finished is completed from the cache without an LLM call."""
+        CourseGenerationJob.objects.create(created_by=self.user, topic="Python lists", fingerprint=self.fingerprint)
+        job = claim_next_job("worker-a")
+        assert job is not None
+        with patch("courses.generation.run_course_generator_sync") as generator:
+            run_generation(str(job.pk))
+        generator.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual(job.course, self.course)
+
+
+class RequestCoalescingTests(TestCase):
+    """Tests for attaching identical concurrent requests to one in-flight leader job."""
+
+    def setUp(self) -> None:
+        self.alice = User.objects.create_user(username="alice", password="testpass123")
+        self.bob = User.objects.create_user(username="bob", password="testpass123")
+        self.leader = enqueue_generation(self.alice.pk, "Python Basics")
+        self.follower = enqueue_generation(self.bob.pk, "python basics")
+
+    def test_identical_request_follows_active_job(self) -> None:
+        """The second identical request attaches to the first and is not claimable by workers."""
+        self.assertIsNone(self.leader.leader)
+        self.assertEqual(self.follower.leader, self.leader)
+        self.assertEqual(self.follower.status, CourseGenerationJob.Status.PENDING)
+        claimed = claim_next_job("worker-a")
+        assert claimed is not None
+        self.assertEqual(claimed.pk, self.leader.pk)
+        self.assertIsNone(claim_next_job("worker-a"))
+        forced = enqueue_generation(self.bob.pk, "python basics", force_fresh=True)
+        self.assertIsNone(forced.leader)
+
+    def test_leader_completion_completes_followers(self) -> None:
+        """When the leader finishes, followers get the same course and each user is notified."""
+        claim_next_job("worker-a")
+        with patch(
+            "courses.generation.run_course_generator_sync", return_value=(_sample_content(), "test:model")
+        ) as generator:
+            run_generation(str(self.leader.pk))
+        generator.assert_called_once()
+        self.leader.refresh_from_db()
+        self.follower.refresh_from_db()
+        self.assertEqual(self.follower.status, CourseGenerationJob.Status.COMPLETE)
+        self.assertEqual(self.follower.course, self.leader.course)
+        self.assertTrue(Notification.objects.filter(user=self.bob, course=self.leader.course).exists())
+        self.assertTrue(Notification.objects.filter(user=self.alice, course=self.leader.course).exists())
+
+    def test_leader_failure_promotes_follower(self) -> None:
+        """A failed leader hands its followers to the oldest one, which becomes claimable.
+
+        Every follower gets a new version and its user's event streams are woken.
+        """
+        carol = User.objects.create_user(username="carol", password="testpass123")
+        third = enqueue_generation(carol.pk, "Python basics")
+        version = third.version
+        claim_next_job("worker-a")
+        counters = {user.pk: change_counter(user.pk) for user in (self.bob, carol)}
+        with (
+            patch("courses.generation.run_course_generator_sync", side_effect=RuntimeError("boom")),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            run_generation(str(self.leader.pk))
+        self.follower.refresh_from_db()
+        third.refresh_from_db()
+        self.assertIsNone(self.follower.leader)
+        self.assertEqual(self.follower.status, CourseGenerationJob.Status.PENDING)
+        self.assertEqual(third.leader, self.follower)
+        self.assertEqual(third.version, version + 1)
+        for user_id, counter in counters.items():
+            self.assertGreater(change_counter(user_id), counter)
+        claimed = claim_next_job("worker-a")
+        assert claimed is not None
+        self.assertEqual(claimed.pk, self.follower.pk)
+
+
+class CheatsheetRenderingTests(TestCase):
+    """Tests for the stored cheatsheet HTML."""
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_generated_course_stores_rendered_cheatsheet(self) -> None:
+        """Generation renders the cheatsheet once and the detail page serves the stored HTML."""
+        job = enqueue_generation(None, "Python")
+        content = _sample_content()
+        content.cheatsheet = "**bold**"
+        course = persist_generated_course(job, content, "test")
+        self.assertEqual(course.cheatsheet_html, "<p><strong>bold</strong></p>")
+
+        with patch("courses.cheatsheets.render_markdown") as render:
+            response = self.client.get(reverse("courses:detail", args=[course.slug]))
+        render.assert_not_called()
+        self.assertContains(response, "<strong>bold</strong>", html=True)
+
+    def test_edited_cheatsheet_is_rerendered_on_view(self) -> None:
+        """A cheatsheet changed after rendering (e.g. in the admin) is rendered again and stored."""
+        course = Course.objects.create(title="Go", slug="go", overview="o", cheatsheet="*old*")
+        self.client.get(reverse("courses:detail", args=[course.slug]))
+        course.cheatsheet = "*new*"
+        course.save()
+
+        response = self.client.get(reverse("courses:detail", args=[course.slug]))
+        course.refresh_from_db()
+        self.assertContains(response, "<em>new</em>", html=True)
+        self.assertEqual(course.cheatsheet_html, "<p><em>new</em></p>")
+
+    def test_rerender_command(self) -> None:
+        """The command renders missing HTML, skips current HTML, and re-renders everything with --force."""
+        Course.objects.create(title="Go", slug="go", overview="o", cheatsheet="# Go")
+        Course.objects.create(title="Rust", slug="rust", overview="o", cheatsheet="# Rust")
+        out = StringIO()
+        call_command("rerender_cheatsheets", stdout=out)
+        call_command("rerender_cheatsheets", stdout=out)
+        call_command("rerender_cheatsheets", "--force", stdout=out)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ["Rendered 2 cheatsheet(s).", "Rendered 0 cheatsheet(s).", "Rendered 2 cheatsheet(s)."],
+        )
+        self.assertEqual(Course.objects.get(slug="go").cheatsheet_html, "<h1>Go</h1>")
+
+
+class CoursePageCacheTests(TestCase):
+    """Tests for the anonymous page cache and the fragment cache of course pages."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.course = Course.objects.create(
+            title="Go", slug="go", overview="Learn Go.", cheatsheet="# Go", has_flashcards=True
+        )
+        Exercise.objects.create(
+            course=self.course, order_index=0, exercise_type="multiple_choice", question="Q", payload={}
+        )
+        Flashcard.objects.create(course=self.course, order_index=0, front="Front", back="Back")
+
+    def test_anonymous_detail_is_served_from_cache(self) -> None:
+        """A repeated anonymous view costs one query for the course version and carries ETag/Last-Modified."""
+        url = reverse("courses:detail", args=[self.course.slug])
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertIn("Last-Modified", second)
+
+    def test_conditional_requests_get_not_modified(self) -> None:
+        """A matching If-None-Match or If-Modified-Since gets 304 with no body."""
+        url = reverse("courses:flashcards", args=[self.course.slug])
+        first = self.client.get(url)
+        self.assertEqual(self.client.get(url, headers={"if-none-match": first["ETag"]}).status_code, 304)
+        self.assertEqual(self.client.get(url, headers={"if-modified-since": first["Last-Modified"]}).status_code, 304)
+
+    def test_editing_course_content_invalidates_pages(self) -> None:
+        """Saving the course or one of its flashcards (as the admin does) changes the version and the page."""
+        url = reverse("courses:flashcards", args=[self.course.slug])
+        etag = self.client.get(url)["ETag"]
+        card = self.course.flashcards.get()
+        card.front = "Edited front"
+        card.save()
+
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Edited front")
+
+        self.course.title = "Go, edited"
+        self.course.save()
+        self.assertContains(self.client.get(url), "Go, edited")
+
+    def test_rerender_command_invalidates_pages(self) -> None:
+        """Cheatsheets re-rendered in bulk (e.g. after a renderer upgrade) replace cached pages and fragments."""
+        url = reverse("courses:detail", args=[self.course.slug])
+        self.client.get(url)
+        user = User.objects.create_user(username="learner", password="testpass123")
+        member = Client()
+        member.force_login(user)
+        member.get(url)
+
+        with patch("courses.cheatsheets.render_markdown", return_value="<p>Re-rendered</p>"):
+            call_command("rerender_cheatsheets", "--force", stdout=StringIO())
+
+        self.assertContains(self.client.get(url), "Re-rendered")
+        self.assertContains(member.get(url), "Re-rendered")
+
+    def test_deletes_touch_each_course_once(self) -> None:
+        """Deleting a course leaves the course table alone; deleting many of its exercises touches it once."""
+        Exercise.objects.create(
+            course=self.course, order_index=1, exercise_type="multiple_choice", question="Q2", payload={}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.course.exercises.all().delete()
+        updates = [q for q in queries.captured_queries if q["sql"].startswith('UPDATE "courses_course"')]
+        self.assertEqual(len(updates), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.course.delete()
+        self.assertFalse([q for q in queries.captured_queries if q["sql"].startswith('UPDATE "courses_course"')])
+
+    def test_missing_course_is_404(self) -> None:
+        """Unknown slugs are not cached and return 404."""
+        self.assertEqual(self.client.get(reverse("courses:detail", args=["nope"])).status_code, 404)
+
+    def test_authenticated_detail_caches_static_fragment_but_not_progress(self) -> None:
+        """Logged-in users get fresh progress while the overview and cheatsheet come from the fragment cache."""
+        user = User.objects.create_user(username="learner", password="testpass123")
+        self.client.force_login(user)
+        url = reverse("courses:detail", args=[self.course.slug])
+        self.client.get(url)
+        record_attempt(user.pk, self.course.exercises.get(), True)
+
+        with patch("courses.templatetags.markdown_extras.rendered_cheatsheet") as cheatsheet:
+            response = self.client.get(url)
+        cheatsheet.assert_not_called()
+        self.assertNotIn("ETag", response)
+        self.assertEqual(response.context["completed_count"], 1)
+        self.assertContains(response, "<h1>Go</h1>", html=True)
+
+
+class ExerciseViewTests(TestCase):
+    """Tests for fetching a single exercise by position."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username="learner", password="testpass123")
+        self.client.force_login(self.user)
+        self.course = Course.objects.create(title="Go", slug="go", overview="Learn Go.", cheatsheet="# Go")
+        for i in range(5):
+            Exercise.objects.create(
+                course=self.course,
+                order_index=i,
+                exercise_type="multiple_choice",
+                question=f"Question {i}",
+                payload={"options": ["a", "b"], "correct_index": 0},
+            )
+
+    def test_get_loads_one_exercise_with_its_course(self) -> None:
+        """Once the count is cached, a view is the session, the user, and one joined exercise/course query."""
+        self.client.get(reverse("courses:exercise", args=[self.course.slug, 0]))
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("courses:exercise", args=[self.course.slug, 3]))
+        self.assertEqual(response.context["exercise"].question, "Question 3")
+        self.assertEqual(response.context["total"], 5)
+
+    def test_count_follows_course_edits(self) -> None:
+        """Adding an exercise changes the course version, so the cached total is not reused."""
+        self.client.get(reverse("courses:exercise", args=[self.course.slug, 0]))
+        Exercise.objects.create(
+            course=self.course, order_index=5, exercise_type="multiple_choice", question="Question 5", payload={}
+        )
+        response = self.client.get(reverse("courses:exercise", args=[self.course.slug, 0]))
+        self.assertEqual(response.context["total"], 6)
+
+    def test_index_is_position_after_a_delete(self) -> None:
+        """Deleting an exercise leaves a gap in order_index; every remaining exercise is still reachable in order."""
+        self.course.exercises.get(order_index=2).delete()
+        responses = [self.client.get(reverse("courses:exercise", args=[self.course.slug, i])) for i in range(4)]
+        questions = [response.context["exercise"].question for response in responses]
+        self.assertEqual(questions, ["Question 0", "Question 1", "Question 3", "Question 4"])
+        response = self.client.get(reverse("courses:exercise", args=[self.course.slug, 4]))
+        self.assertRedirects(response, reverse("courses:detail", args=[self.course.slug]))
+
+    def test_out_of_range_index_redirects_and_unknown_course_is_404(self) -> None:
+        """An index past the last exercise goes back to the course page; an unknown slug is a 404."""
+        response = self.client.get(reverse("courses:exercise", args=[self.course.slug, 5]))
+        self.assertRedirects(response, reverse("courses:detail", args=[self.course.slug]))
+        self.assertEqual(self.client.get(reverse("courses:exercise", args=["nope", 0])).status_code, 404)
+
+    def test_post_records_attempt(self) -> None:
+        """Answering grades the fetched exercise and records progress."""
+        response = self.client.post(reverse("courses:exercise", args=[self.course.slug, 2]), {"answer": "0"})
+        self.assertTrue(response.context["correct"])
+        self.assertEqual(CourseProgress.objects.get(user=self.user, course=self.course).correct_count, 1)
+
+
+class GradingTests(TestCase):
+    """Tests for compiled answer keys and batch grading."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.course = Course.objects.create(title="Go", slug="go", overview="Learn Go.", cheatsheet="# Go")
+        self.choice = Exercise.objects.create(
+            course=self.course,
+            order_index=0,
+            exercise_type="multiple_choice",
+            question="Pick",
+            payload={"options": ["a", "b", "c"], "correct_index": 1, "explanation": "Because b."},
+        )
+        self.matching = Exercise.objects.create(
+            course=self.course,
+            order_index=1,
+            exercise_type="matching_pairs",
+            question="Match",
+            payload={"pairs": [{"left": "x", "right": "1"}, {"left": "y", "right": "2"}]},
+        )
+        self.course.refresh_from_db()
+
+    def test_multiple_choice(self) -> None:
+        """Only the correct index is right; malformed or out-of-range answers count as no answer."""
+        key = grading.compile_answer_key(self.choice)
+        self.assertTrue(grading.grade(key, "1").correct)
+        self.assertEqual(grading.grade(key, "1").explanation, "Because b.")
+        self.assertFalse(grading.grade(key, "0").correct)
+        for bad in ("abc", "-1", "", None, "٣"):
+            with self.subTest(answer=bad):
+                result = grading.grade(key, bad)
+                self.assertFalse(result.correct)
+                self.assertIsNone(result.selected_answer)
+
+    def test_matching(self) -> None:
+        """Every left item must be matched to its own right item; the result lists what was chosen."""
+        key = grading.compile_answer_key(self.matching)
+        self.assertTrue(grading.grade(key, ["0", "1"]).correct)
+        result = grading.grade(key, ["1", "oops"])
+        self.assertFalse(result.correct)
+        assert result.matching_result is not None
+        self.assertEqual(
+            [(item["user_right"], item["is_correct"]) for item in result.matching_result], [("2", False), ("-", False)]
+        )
+        self.assertFalse(grading.grade(key, ["0"]).correct)
+
+    def test_answer_keys_are_cached_per_course_version(self) -> None:
+        """Once compiled, a course's keys cost one query for the exercise ids; an edit recompiles them."""
+        keys = grading.answer_keys(self.course)
+        self.assertEqual([key.exercise_id for key in keys], [self.choice.pk, self.matching.pk])
+        with self.assertNumQueries(1):
+            grading.answer_keys(self.course)
+
+        self.choice.payload = {**self.choice.payload, "correct_index": 2}
+        self.choice.save()
+        self.course.refresh_from_db()
+        self.assertEqual(grading.answer_keys(self.course)[0].correct_index, 2)
+
+    def test_grade_answers_treats_missing_answers_as_wrong(self) -> None:
+        """A batch grades every key, in order, whether or not it was answered."""
+        results = grading.grade_answers(grading.answer_keys(self.course), {self.choice.pk: 1})
+        self.assertEqual(
+            [(r.exercise_id, r.correct) for r in results], [(self.choice.pk, True), (self.matching.pk, False)]
+        )
+
+    def test_exercise_view_grades_matching_answer(self) -> None:
+        """The exercise page grades a matching submission and shows the per-pair result."""
+        self.client.force_login(User.objects.create_user(username="learner", password="testpass123"))
+        url = reverse("courses:exercise", args=[self.course.slug, 1])
+        response = self.client.post(url, {"match_0": "0", "match_1": "1"})
+        self.assertTrue(response.context["correct"])
+        self.assertEqual(len(response.context["matching_result"]), 2)
+
+
+class QuizModeTests(TestCase):
+    """Tests for serving and grading a whole course as one quiz."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username="learner", password="testpass123")
+        self.client.force_login(self.user)
+        self.course = Course.objects.create(title="Go", slug="go", overview="Learn Go.", cheatsheet="# Go")
+        self.choices = [
+            Exercise.objects.create(
+                course=self.course,
+                order_index=i,
+                exercise_type="multiple_choice",
+                question=f"Question {i}",
+                payload={"options": ["a", "b"], "correct_index": 1, "explanation": f"Why {i}"},
+            )
+            for i in range(3)
+        ]
+        self.matching = Exercise.objects.create(
+            course=self.course,
+            order_index=3,
+            exercise_type="matching_pairs",
+            question="Match",
+            payload={"pairs": [{"left": "x", "right": "1"}, {"left": "y", "right": "2"}]},
+        )
+
+    def test_page_lists_every_exercise_without_answers(self) -> None:
+        """GET renders all exercises in one page with prefixed form fields."""
+        response = self.client.get(reverse("courses:quiz", args=[self.course.slug]))
+        self.assertEqual(response.context["total"], 4)
+        self.assertContains(response, f'name="ex{self.choices[2].pk}_answer"')
+        self.assertContains(response, f'name="ex{self.matching.pk}_match_1"')
+        self.assertNotContains(response, "Why 0")
+
+    def test_submission_is_graded_and_recorded_at_once(self) -> None:
+        """One POST grades every exercise, unanswered ones as wrong, and records all attempts in one insert."""
+        data = {
+            f"ex{self.choices[0].pk}_answer": "1",
+            f"ex{self.choices[1].pk}_answer": "0",
+            f"ex{self.matching.pk}_match_0": "0",
+            f"ex{self.matching.pk}_match_1": "1",
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("courses:quiz", args=[self.course.slug]), data)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "progress_userprogress"')]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertEqual(response.context["score"], 2)
+        self.assertEqual([item["grade"].correct for item in response.context["items"]], [True, False, False, True])
+        self.assertContains(response, "Why 1")
+        rollup = CourseProgress.objects.get(user=self.user, course=self.course)
+        self.assertEqual((rollup.completed_count, rollup.correct_count), (4, 2))
+
+    def test_json_api(self) -> None:
+        """The JSON endpoint lists exercises without answer keys and grades a JSON batch."""
+        url = reverse("courses:quiz_api", args=[self.course.slug])
+        exercises = self.client.get(url).json()["exercises"]
+        self.assertEqual([e["id"] for e in exercises], [e.pk for e in [*self.choices, self.matching]])
+        self.assertNotIn("correct_index", json.dumps(exercises))
+
+        answers = {str(self.choices[0].pk): 1, str(self.matching.pk): [0, 1]}
+        body = self.client.post(url, json.dumps({"answers": answers}), content_type="application/json").json()
+        self.assertEqual((body["score"], body["total"]), (2, 4))
+        self.assertEqual(body["results"][0], {**body["results"][0], "correct": True, "explanation": "Why 0"})
+        self.assertEqual(len(body["results"][3]["matching_result"]), 2)
+
+    def test_json_api_under_csrf_enforcement(self) -> None:
+        """The GET issues a CSRF token; a POST echoing it in X-CSRFToken is graded, one without it is a 403."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        url = reverse("courses:quiz_api", args=[self.course.slug])
+        body = json.dumps({"answers": {str(self.choices[0].pk): 1}})
+        token = client.get(url).json()["csrf_token"]
+        self.assertEqual(client.post(url, body, content_type="application/json").status_code, 403)
+
+        response = client.post(url, body, content_type="application/json", headers={"x-csrftoken": token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["score"], 1)
+
+    def test_json_api_rejects_malformed_body(self) -> None:
+        """A body without an answers object is a 400."""
+        url = reverse("courses:quiz_api", args=[self.course.slug])
+        for body in ("not json", "[]", '{"answers": {"x": 1}}'):
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post(url, body, content_type="application/json").status_code, 400)
+
+
+class CourseApiTests(TestCase):
+    """Tests for the read-only JSON course API."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.owner = User.objects.create_user(username="author", password="testpass123")
+        self.course = Course.objects.create(
+            title="Go", slug="go", overview="Learn Go.", cheatsheet="# Go", has_flashcards=True, created_by=self.owner
+        )
+        Exercise.objects.create(
+            course=self.course,
+            order_index=0,
+            exercise_type="multiple_choice",
+            question="Pick",
+            payload={"options": ["a", "b", "c", "d"], "correct_index": 2, "explanation": "Secret reason."},
+        )
+        Exercise.objects.create(
+            course=self.course,
+            order_index=1,
+            exercise_type="matching_pairs",
+            question="Match",
+            payload={"pairs": [{"left": f"l{i}", "right": f"r{i}"} for i in range(4)]},
+        )
+        Flashcard.objects.create(course=self.course, order_index=0, front="Front", back="Back")
+
+    def test_course_detail_strips_answers(self) -> None:
+        """The course JSON has exercises and flashcards but no correct index, explanation, or pair order."""
+        response = self.client.get(reverse("courses:api_course", args=[self.course.slug]))
+        body = response.json()
+        self.assertEqual((body["title"], body["author"], body["exercise_count"]), ("Go", "author", 2))
+        self.assertEqual(body["exercises"][0]["options"], ["a", "b", "c", "d"])
+        self.assertEqual(sorted(r["label"] for r in body["exercises"][1]["right"]), ["r0", "r1", "r2", "r3"])
+        self.assertEqual(body["flashcards"], [{"front": "Front", "back": "Back"}])
+        for secret in ("correct_index", "Secret reason", "explanation", '"pairs"'):
+            self.assertNotIn(secret, response.content.decode())
+
+    def test_course_detail_revalidates_for_any_user(self) -> None:
+        """Anonymous and logged-in clients get the same ETag and 304 until the course is edited."""
+        url = reverse("courses:api_course", args=[self.course.slug])
+        etag = self.client.get(url)["ETag"]
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, 304)
+
+        self.course.title = "Go, edited"
+        self.course.save()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Go, edited")
+
+    def test_course_list_page(self) -> None:
+        """The list is keyset-paginated JSON with an ETag for revalidation."""
+        with override_settings(COURSE_LIST_PAGE_SIZE=1):
+            Course.objects.create(title="Rust", slug="rust", overview="o", cheatsheet="c")
+            url = reverse("courses:api_courses")
+            first = self.client.get(url)
+            page = first.json()
+            self.assertEqual([c["slug"] for c in page["courses"]], ["rust"])
+            second = self.client.get(url, {"after": page["next_cursor"]}).json()
+            self.assertEqual([(c["slug"], c["exercise_count"]) for c in second["courses"]], [("go", 2)])
+            self.assertNotIn("next_cursor", second)
+            self.assertEqual(self.client.get(url, headers={"if-none-match": first["ETag"]}).status_code, 304)
+
+    def test_responses_are_gzipped_on_request(self) -> None:
+        """Clients sending Accept-Encoding: gzip get compressed JSON."""
+        response = self.client.get(
+            reverse("courses:api_course", args=[self.course.slug]), headers={"accept-encoding": "gzip"}
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_unknown_course_is_404(self) -> None:
+        """Unknown slugs return 404."""
+        self.assertEqual(self.client.get(reverse("courses:api_course", args=["nope"])).status_code, 404)
+
+
+def _stream(response: Any) -> AsyncGenerator[bytes]:
+    """The body of a streamed (SSE) test response."""
+    return cast(AsyncGenerator[bytes], aiter(response.streaming_content))
+
+
+async def _next_event(events: AsyncGenerator[bytes], name: str) -> dict[str, Any]:
+    """Read SSE chunks until the next event called name and return its JSON payload."""
+    async for chunk in events:
+        text = chunk.decode()
+        if text.startswith(f"event: {name}\n"):
+            return cast(dict[str, Any], json.loads(text.split("data: ", 1)[1]))
+    raise AssertionError(f"stream ended before a {name} event")
+
+
+def _file_cache(directory: str) -> dict[str, Any]:
+    """CACHES using a file-based cache in directory: shared by processes, unlike the test default (locmem)."""
+    return {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory}}
+
+
+@override_settings(EVENT_STREAM_INTERVAL=0.01, EVENT_STREAM_HEARTBEAT=60, EVENT_STREAM_MAX_AGE=5)
+class EventStreamTests(TransactionTestCase):
+    """Tests for the notification and job-status endpoints and the server-sent event stream.
+
+    A TransactionTestCase: streams are woken by change counters bumped when a transaction commits.
+    """
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="learner", password="testpass123")
+        self.course = Course.objects.create(title="Python", slug="python", overview="o", cheatsheet="c")
+
+    def test_poll_loads_courses_with_notifications(self) -> None:
+        """The poll lists unread notifications and their course slugs in one query."""
+        for n in range(3):
+            Notification.objects.create(user=self.user, message=f"Ready {n}", course=self.course)
+        Notification.objects.create(user=self.user, message="Old", read=True)
+        self.client.force_login(self.user)
+        # Session and user lookups, then the notification list.
+        with self.assertNumQueries(3):
+            data = self.client.get(reverse("courses:notifications")).json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual([item["course_slug"] for item in data["items"]], ["python"] * 3)
+
+    def test_job_version_increases_on_every_status_change(self) -> None:
+        """Saves and queue updates both bump the job's version."""
+        job = enqueue_generation(self.user.pk, "Rust")
+        self.assertEqual(job.version, 1)
+        claim_next_job("worker-1")
+        job.refresh_from_db()
+        self.assertEqual(job.version, 2)
+        persist_generated_course(job, _sample_content(), "test")
+        job.refresh_from_db()
+        self.assertEqual(job.version, 3)
+
+    def test_job_status_etag_short_circuits_unchanged_polls(self) -> None:
+        """A poll carrying the current version as If-None-Match gets 304; a changed job is sent again."""
+        job = enqueue_generation(self.user.pk, "Rust")
+        self.client.force_login(self.user)
+        url = reverse("courses:job_status", args=[job.pk])
+        first = self.client.get(url)
+        self.assertEqual(first.json()["status"], "pending")
+        self.assertEqual(self.client.get(url, headers={"if-none-match": first["ETag"]}).status_code, 304)
+        claim_next_job("worker-1")
+        second = self.client.get(url, headers={"if-none-match": first["ETag"]})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["status"], "running")
+
+    def test_batch_job_status_returns_only_changed_jobs_in_one_query(self) -> None:
+        """The batch endpoint resolves all requested jobs in one query and skips those at the client's version."""
+        jobs = [enqueue_generation(self.user.pk, topic) for topic in ("Rust", "Go", "Zig")]
+        foreign = enqueue_generation(User.objects.create_user(username="other").pk, "Elm")
+        claim_next_job("worker-1")  # claims the oldest, Rust
+        self.client.force_login(self.user)
+        params = [f"{job.pk}:{job.version}" for job in jobs] + [str(foreign.pk), "not-a-uuid"]
+
+        # Session and user lookups, then the jobs with their courses.
+        with self.assertNumQueries(3):
+            data = self.client.get(reverse("courses:job_status_batch"), {"job": params}).json()
+        self.assertEqual([(j["job_id"], j["status"]) for j in data["jobs"]], [(str(jobs[0].pk), "running")])
+
+        unversioned = self.client.get(reverse("courses:job_status_batch"), {"job": [str(j.pk) for j in jobs]}).json()
+        self.assertEqual(len(unversioned["jobs"]), 3)
+
+    def test_stream_requires_login(self) -> None:
+        """Anonymous users cannot open the stream."""
+        self.assertEqual(self.client.get(reverse("courses:events")).status_code, 401)
+
+    def test_stream_under_wsgi_answers_no_content(self) -> None:
+        """Outside ASGI the stream answers 204 so the browser falls back to polling."""
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("courses:events")).status_code, 204)
+
+    async def test_stream_pushes_new_notifications(self) -> None:
+        """The stream sends the unread snapshot on connect and again when a notification is created."""
+        await self.async_client.aforce_login(self.user)
+        await Notification.objects.acreate(user=self.user, message="First", course=self.course)
+
+        response = await self.async_client.get(reverse("courses:events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = _stream(response)
+        self.assertTrue((await anext(events)).startswith(b"retry:"))
+        first = await _next_event(events, "notifications")
+        self.assertEqual(first["count"], 1)
+
+        await Notification.objects.acreate(user=self.user, message="Second")
+        second = await _next_event(events, "notifications")
+        await events.aclose()
+        self.assertEqual(second["count"], 2)
+        self.assertEqual(second["items"][0]["message"], "Second")
+        self.assertIsNone(second["items"][0]["course_slug"])
+
+    @override_settings(EVENT_STREAM_HEARTBEAT=0.05)
+    async def test_stream_queries_only_when_change_counter_moves(self) -> None:
+        """With a shared cache, idle ticks read only the change counter; a notification marked read wakes the stream."""
+        await self.async_client.aforce_login(self.user)
+        notification = await Notification.objects.acreate(user=self.user, message="First")
+
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            override_settings(CACHES=_file_cache(directory)),
+            patch("courses.events._poll", wraps=events._poll) as poll,
+        ):
+            response = await self.async_client.get(reverse("courses:events"))
+            stream = _stream(response)
+            self.assertEqual((await _next_event(stream, "notifications"))["count"], 1)
+            # Several idle ticks pass before the first keep-alive.
+            while not (await anext(stream)).startswith(b": keep-alive"):
+                pass
+            self.assertEqual(poll.call_count, 1)
+
+            await self.async_client.post(reverse("courses:notification_mark_read", args=[notification.pk]))
+            update = await _next_event(stream, "notifications")
+            await stream.aclose()
+        self.assertEqual(update["count"], 0)
+        self.assertEqual(poll.call_count, 2)
+
+    async def test_stream_wakes_on_bump_from_another_process(self) -> None:
+        """A counter bumped through another process's instance of the shared cache wakes the stream."""
+        await self.async_client.aforce_login(self.user)
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES=_file_cache(directory)):
+            response = await self.async_client.get(reverse("courses:events"))
+            stream = _stream(response)
+            self.assertEqual((await _next_event(stream, "notifications"))["count"], 0)
+
+            # What a generation worker does: write (bulk_create sends no signal), then bump its own cache instance.
+            await Notification.objects.abulk_create([Notification(user=self.user, message="Ready")])
+            worker_cache = FileBasedCache(directory, {})
+            await sync_to_async(worker_cache.incr)(change_key(self.user.pk))
+            update = await _next_event(stream, "notifications")
+            await stream.aclose()
+        self.assertEqual(update["count"], 1)
+
+    async def test_stream_polls_every_tick_with_process_local_cache(self) -> None:
+        """With the default locmem cache, bumps from the workers cannot arrive, so every tick checks the database."""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("courses:events"))
+        stream = _stream(response)
+        self.assertEqual((await _next_event(stream, "notifications"))["count"], 0)
+
+        await Notification.objects.abulk_create([Notification(user=self.user, message="Ready")])
+        update = await _next_event(stream, "notifications")
+        await stream.aclose()
+        self.assertEqual(update["count"], 1)
+
+    async def test_stream_pushes_job_transitions(self) -> None:
+        """The first jobs event lists active jobs; later ones carry only jobs that changed, through completion."""
+        await self.async_client.aforce_login(self.user)
+        job = await sync_to_async(enqueue_generation)(self.user.pk, "Rust")
+        other = await sync_to_async(enqueue_generation)(self.user.pk, "Go")
+
+        response = await self.async_client.get(reverse("courses:events"))
+        events = _stream(response)
+        snapshot = await _next_event(events, "jobs")
+        self.assertTrue(snapshot["snapshot"])
+        self.assertEqual([j["job_id"] for j in snapshot["jobs"]], [str(job.pk), str(other.pk)])
+
+        await sync_to_async(persist_generated_course)(job, _sample_content(), "test")
+        update = await _next_event(events, "jobs")
+        await events.aclose()
+        self.assertFalse(update["snapshot"])
+        self.assertEqual(len(update["jobs"]), 1)
+        self.assertEqual(update["jobs"][0]["status"], "complete")
+        self.assertEqual(update["jobs"][0]["course_slug"], "python-basics")
+
+
+class IndexUsageTests(TestCase):
+    """The hot lookups use their composite/partial indexes, checked with the database's EXPLAIN.
+
+    On SQLite this is the plan the query gets. On PostgreSQL sequential scans are disabled (the test tables
+    are tiny) and the captured SQL has its parameters inlined, so the check is that the planner can serve the
+    query from the index; it does not cover plans chosen for prepared statements with bound parameters.
+    Other backends are skipped.
+    """
+
+    def setUp(self) -> None:
+        if connection.vendor not in ("sqlite", "postgresql"):
+            self.skipTest("Query plans are only asserted on SQLite and PostgreSQL.")
+        self.user = User.objects.create_user(username="learner", password="testpass123")
+        self.client.force_login(self.user)
+
+    def _plans(self, table: str, action) -> list[str]:
+        """Run action and return the query plan of every SELECT it issued against table."""
+        with CaptureQueriesContext(connection) as ctx:
+            action()
+        selects = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT") and f'"{table}"' in q["sql"]]
+        self.assertTrue(selects, f"no SELECT against {table}")
+        return [self._explain(sql) for sql in selects]
+
+    def _explain(self, sql: str) -> str:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute(f"EXPLAIN {sql}")
+            else:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return " ".join(str(row) for row in cursor.fetchall())
+
+    def test_notification_poll_uses_unread_index(self) -> None:
+        """The notification poll reads the partial unread index."""
+        plans = self._plans("courses_notification", lambda: self.client.get(reverse("courses:notifications")))
+        for plan in plans:
+            self.assertIn("notification_unread_idx", plan)
+
+    def test_course_list_pending_jobs_use_user_status_index(self) -> None:
+        """The course list's pending-job cards read the (created_by, status, created_at) index."""
+        plans = self._plans("courses_coursegenerationjob", lambda: self.client.get(reverse("courses:list")))
+        self.assertIn("job_by_user_status_idx", " ".join(plans))
+
+    def test_claim_uses_claim_index(self) -> None:
+        """Workers find the oldest claimable job through the partial claim index."""
+        plans = self._plans("courses_coursegenerationjob", lambda: claim_next_job("worker-1"))
+        self.assertIn("job_claim_idx", plans[0])
+
+    def test_progress_rebuild_uses_user_exercise_index(self) -> None:
+        """Rebuilding a user's rollups reads their attempts through the (user, exercise) index."""
+        plans = self._plans("progress_userprogress", lambda: rebuild_course_progress([self.user.pk]))
+        self.assertIn("userprogress_user_exercise_idx", plans[0])
+
+
+class GenerationWorkerTests(TransactionTestCase):
+    """Tests for the worker loop (committed rows, since jobs run on pool threads)."""
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(username="teacher", password="testpass123")
+        for topic in ("Python", "Rust", "Go"):
+            CourseGenerationJob.objects.create(created_by=user, topic=topic)
+
+    def test_once_drains_queue(self) -> None:
+        """With once=True the threaded worker runs every pending job and exits."""
+        # One pool thread: the in-memory SQLite test database rejects concurrent writers outright.
+        with patch(
+            "courses.generation.run_course_generator_sync",
+            side_effect=lambda **kwargs: (_sample_content(kwargs["topic"]), "test:model"),
+        ):
+            GenerationWorker(concurrency=1, poll_interval=0.01).run(once=True)
+        self.assertEqual(
+            CourseGenerationJob.objects.filter(status=CourseGenerationJob.Status.COMPLETE).count(),
+            3,
+        )
+        self.assertEqual(Course.objects.count(), 3)
+
+    def test_async_worker_runs_jobs_concurrently(self) -> None:
+        """The asyncio worker overlaps agent calls up to its concurrency limit on one thread."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_generator(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return _sample_content(kwargs["topic"]), "test:model"
+
+        with patch("courses.generation.run_course_generator", side_effect=fake_generator):
+            AsyncGenerationWorker(concurrency=2, poll_interval=0.01).run(once=True)
+        self.assertEqual(peak, 2)
+        self.assertEqual(Course.objects.count(), 3)
+        self.assertEqual(
+            CourseGenerationJob.objects.filter(status=CourseGenerationJob.Status.COMPLETE).count(),
+            3,
+        )
+        self.assertEqual(Course.objects.count(), 3)
+
+
+class CatalogGenerationTests(TransactionTestCase):
+    """Tests for bulk catalog pre-generation (the generate_courses command)."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.calls: list[str] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def _write(self, name: str, text: str) -> str:
+        path = Path(self.tmp.name) / name
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    async def _fake_generator(self, **kwargs):
+        self.calls.append(kwargs["topic"])
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return _sample_content(kwargs["topic"]), "test:model"
+
+    def _generate(self, path: str, *args: str) -> str:
+        out = StringIO()
+        with (
+            patch("courses.generation.run_course_generator", side_effect=self._fake_generator),
+            patch("courses.management.commands.generate_courses.signal.signal"),
+        ):
+            call_command("generate_courses", path, "--rpm", "6000", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_read_catalog_parses_csv_and_jsonl(self) -> None:
+        """Both formats yield entries; asking for flashcards by number turns them on."""
+        csv_path = self._write(
+            "catalog.csv",
+            "topic,difficulty,num_exercises,num_flashcards\nPython,advanced,5,\nRust,,,10\n",
+        )
+        jsonl_path = self._write(
+            "catalog.jsonl", '{"topic": "Python", "difficulty": "advanced", "num_exercises": 5}\n\n{"topic": "Rust"}\n'
+        )
+        entries = read_catalog(csv_path)
+        self.assertEqual(
+            entries,
+            [
+                CatalogEntry("Python", "advanced", num_exercises=5),
+                CatalogEntry("Rust", include_flashcards=True, num_flashcards=10),
+            ],
+        )
+        self.assertEqual(read_catalog(jsonl_path)[0], entries[0])
+        bad = self._write("bad.csv", "topic,difficulty\nPython,beginner\nRust,expert\n")
+        with self.assertRaisesMessage(ValueError, "bad.csv, line 3: difficulty must be one of"):
+            read_catalog(bad)
+
+    def test_command_generates_catalog_and_resumes(self) -> None:
+        """Every distinct entry is generated once; a second run skips them all."""
+        path = self._write("catalog.csv", "topic\nPython\nRust\nGo\n  python \n")
+        output = self._generate(path, "--concurrency", "2")
+        self.assertIn("3 to generate", output)
+        self.assertIn("Generated 3, failed 0", output)
+        self.assertEqual(sorted(self.calls), ["Go", "Python", "Rust"])
+        self.assertEqual(self.peak, 2)
+        self.assertEqual(Course.objects.count(), 3)
+
+        self.calls.clear()
+        output = self._generate(path)
+        self.assertIn("0 to generate, 4 already generated", output)
+        self.assertEqual(self.calls, [])
+
+    def test_command_resumes_jobs_queued_by_an_interrupted_run(self) -> None:
+        """Pending jobs left by an earlier run are reused instead of queued again."""
+        path = self._write("catalog.jsonl", '{"topic": "Python"}\n{"topic": "Rust"}\n')
+        plan = enqueue_catalog(read_catalog(path))
+        output = self._generate(path)
+        self.assertIn("2 to generate", output)
+        self.assertEqual(CourseGenerationJob.objects.count(), 2)
+        self.assertEqual(
+            set(
+                CourseGenerationJob.objects.filter(status=CourseGenerationJob.Status.COMPLETE).values_list(
+                    "pk", flat=True
+                )
+            ),
+            {uuid.UUID(pk) for pk in plan.job_ids},
+        )
+
+    def test_rpm_sets_the_shared_request_budget(self) -> None:
+        """--rpm becomes the requests-per-minute budget of the LLM limiters; the other limits are kept."""
+        self.addCleanup(apps.get_app_config("agent").ready)
+        update_rate_limits(tokens_per_minute=5000)
+        self._generate(self._write("catalog.csv", "topic\nPython\n"))
+        limiter = get_rate_limiter("test:model")
+        self.assertEqual((limiter.requests_per_minute, limiter.tokens_per_minute), (6000, 5000))
+
+
+class GenerationReportTests(TestCase):
+    """Tests for the per-model p50/p95 generation report."""
+
+    def setUp(self) -> None:
+        for i, seconds in enumerate((10.0, 20.0, 30.0, 40.0, 50.0)):
+            CourseGenerationJob.objects.create(
+                topic=f"Topic {i}",
+                status=CourseGenerationJob.Status.COMPLETE,
+                generation_model="openai:a",
+                num_exercises=5 if i < 2 else 10,
+                prompt_tokens=100,
+                completion_tokens=1000 * (i + 1),
+                llm_requests=1,
+                output_retries=0,
+                queue_wait_seconds=1.0,
+                llm_seconds=seconds,
+                persist_seconds=0.1,
+            )
+        CourseGenerationJob.objects.create(
+            topic="Other", status=CourseGenerationJob.Status.COMPLETE, generation_model="openai:b", llm_seconds=5.0
+        )
+        # Cache hits and failures are left out.
+        CourseGenerationJob.objects.create(
+            topic="Hit", status=CourseGenerationJob.Status.COMPLETE, generation_model="openai:a"
+        )
+        CourseGenerationJob.objects.create(
+            topic="Failed", status=CourseGenerationJob.Status.FAILED, generation_model="openai:a", llm_seconds=99.0
+        )
+
+    def test_report_groups_by_model(self) -> None:
+        """Each model gets its job count and the p50/p95 of every recorded metric."""
+        rows = {row.group: row for row in generation_report(CourseGenerationJob.objects.all())}
+        self.assertEqual(set(rows), {("openai:a",), ("openai:b",)})
+        row = rows[("openai:a",)]
+        self.assertEqual(row.jobs, 5)
+        self.assertEqual(row.p50["llm_seconds"], 30.0)
+        self.assertAlmostEqual(cast(float, row.p95["llm_seconds"]), 48.0)
+        self.assertEqual(row.p50["completion_tokens"], 3000)
+        self.assertIsNone(rows[("openai:b",)].p50["prompt_tokens"])
+
+    def test_command_groups_by_options(self) -> None:
+        """--by splits each model's row by a generation option."""
+        out = StringIO()
+        call_command("generation_report", "--by", "num_exercises", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn("llm s p95", lines[0])
+        self.assertEqual(
+            [line.split()[:3] for line in lines[1:]],
+            [["openai:a", "5", "2"], ["openai:a", "10", "3"], ["openai:b", "None", "1"]],
+        )
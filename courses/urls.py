@@ -26,8 +26,14 @@ app_name = "courses"
 urlpatterns = [
     path("", views.course_list, name="list"),
     path("create/", views.course_create, name="create"),
+    path("api/browse/", views.api_course_list_page, name="list_page"),
+    path("api/courses/", views.api_courses, name="api_courses"),
+    path("api/courses/<uslug:slug>/", views.api_course, name="api_course"),
     path("generating/<uuid:job_id>/", views.generating_view, name="generating"),
+    path("api/job-status/", views.job_status_batch_api, name="job_status_batch"),
     path("api/job-status/<uuid:job_id>/", views.job_status_api, name="job_status"),
+    path("api/events/", views.event_stream, name="events"),
+    path("api/quiz/<uslug:slug>/", views.quiz_api, name="quiz_api"),
     path("api/notifications/", views.api_notifications, name="notifications"),
     path("api/notifications/mark-all-read/", views.api_mark_all_notifications_read, name="notifications_mark_read"),
     path(
@@ -39,4 +45,5 @@ urlpatterns = [
     path("<uslug:slug>/start/", views.course_start, name="start"),
     path("<uslug:slug>/flashcards/", views.flashcards_view, name="flashcards"),
     path("<uslug:slug>/exercise/<int:index>/", views.exercise_view, name="exercise"),
+    path("<uslug:slug>/quiz/", views.quiz_view, name="quiz"),
 ]
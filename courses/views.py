@@ -1,142 +1,49 @@
 """Views for course listing, creation, detail, and exercise flow."""
 
+import json
 import random
-import threading
-from typing import Any
+import uuid
+from dataclasses import asdict
 
-from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.db import close_old_connections
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils.text import slugify
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, set_response_etag
+from django.views.decorators.gzip import gzip_page
+from pydantic import BaseModel
+
+from courseforge.cache import get_or_compute, make_key
+from progress.models import CourseProgress
+from progress.rollup import record_attempt, record_attempts
+
+from .api import CoursePageOut, course_detail_out, course_summary_out, exercise_out
+from .changes import bump_user_events
+from .events import job_status_payload, notification_snapshot, user_events
+from .forms import CreateCourseForm
+from .generation import enqueue_generation
+from .grading import Answer, AnswerKey, Grade, answer_from_form, answer_key, answer_keys, grade, grade_answers
+from .models import Course, CourseGenerationJob, Exercise, Notification
+from .page_cache import cache_course_page
+from .pagination import keyset_page
 
-from agent.run_course_gen import run_course_generator_sync
-from progress.models import UserProgress
+# Most jobs a single batched status request may ask about.
+MAX_BATCH_JOBS = 50
 
-from .forms import CreateCourseForm
-from .models import Course, CourseGenerationJob, Exercise, Flashcard, Notification
-
-
-def _run_generation(
-    job_id: str,
-    topic: str,
-    user_id: int,
-    difficulty: str = "beginner",
-    additional_instructions: str | None = None,
-    include_questions: bool = True,
-    num_exercises: int | None = None,
-    include_flashcards: bool = False,
-    num_flashcards: int | None = None,
-) -> None:
-    """Background thread: run course generator and update job (status, course, error)."""
-    try:
-        close_old_connections()
-        job = CourseGenerationJob.objects.get(pk=job_id)
-        user = get_user_model().objects.get(pk=user_id)
-
-        job.status = CourseGenerationJob.Status.RUNNING
-        job.status_message = "Connecting to AI..."
-        job.save(update_fields=["status", "status_message"])
-
-        job.status_message = "Generating course outline..."
-        job.save(update_fields=["status_message"])
-
-        content, generation_model = run_course_generator_sync(
-            topic=topic,
-            difficulty=difficulty,
-            additional_instructions=additional_instructions,
-            include_questions=include_questions,
-            num_exercises=num_exercises,
-            include_flashcards=include_flashcards,
-            num_flashcards=num_flashcards,
-        )
 
-        job.status_message = "Creating course content..."
-        job.save(update_fields=["status_message"])
-
-        base_slug = slugify(content.title, allow_unicode=True) or "course"
-        slug = base_slug
-        n = 1
-        while Course.objects.filter(slug=slug).exists():
-            slug = f"{base_slug}-{n}"
-            n += 1
-        course = Course.objects.create(
-            title=content.title,
-            slug=slug,
-            overview=content.overview,
-            cheatsheet=content.cheatsheet,
-            has_questions=bool(content.exercises),
-            has_flashcards=bool(content.flashcards),
-            created_by=user,
-            topic_normalized=topic.lower()[:255],
-            generation_model=generation_model,
-        )
-        for i, item in enumerate(content.exercises):
-            if item.type == "multiple_choice" and item.multiple_choice:
-                mc = item.multiple_choice
-                Exercise.objects.create(
-                    course=course,
-                    order_index=i,
-                    exercise_type=Exercise.ExerciseType.MULTIPLE_CHOICE,
-                    question=mc.question,
-                    payload={
-                        "options": mc.options,
-                        "correct_index": mc.correct_index,
-                        "explanation": mc.explanation,
-                    },
-                )
-            elif item.type == "matching" and item.matching:
-                mat = item.matching
-                Exercise.objects.create(
-                    course=course,
-                    order_index=i,
-                    exercise_type=Exercise.ExerciseType.MATCHING_PAIRS,
-                    question=mat.question,
-                    payload={
-                        "pairs": [{"left": p.left, "right": p.right} for p in mat.pairs],
-                    },
-                )
-
-        for i, card in enumerate(content.flashcards):
-            Flashcard.objects.create(
-                course=course,
-                order_index=i,
-                front=card.front,
-                back=card.back,
-            )
-
-        job.course = course
-        job.status = CourseGenerationJob.Status.COMPLETE
-        job.status_message = "Done!"
-        job.save(update_fields=["course", "status", "status_message"])
-        Notification.objects.create(
-            user_id=user_id,
-            message=f'Your course "{course.title}" is ready!',
-            course=course,
-        )
-    except Exception as e:
-        try:
-            close_old_connections()
-            job = CourseGenerationJob.objects.get(pk=job_id)
-            job.status = CourseGenerationJob.Status.FAILED
-            job.error = str(e)
-            job.status_message = "Failed"
-            job.save(update_fields=["status", "error", "status_message"])
-            Notification.objects.create(
-                user_id=user_id,
-                message=f'Course generation failed for "{topic}". Please try again.',
-                course=None,
-            )
-        finally:
-            close_old_connections()
-    finally:
-        close_old_connections()
+def _browse_courses() -> QuerySet[Course]:
+    """Courses for browsing, with creator and exercise count loaded in the same query."""
+    return Course.objects.select_related("created_by").annotate(num_exercises=Count("exercises"))
 
 
 def course_list(request: HttpRequest) -> HttpResponse:
-    """List all courses (browse)."""
-    courses = Course.objects.all().order_by("-created_at")
+    """List courses (browse), newest first, one keyset page at a time (?after=<cursor>)."""
+    courses, next_cursor = keyset_page(_browse_courses(), request.GET.get("after"), settings.COURSE_LIST_PAGE_SIZE)
     pending_jobs = CourseGenerationJob.objects.none()
     if request.user.is_authenticated:
         pending_jobs = CourseGenerationJob.objects.filter(
@@ -151,14 +58,61 @@ def course_list(request: HttpRequest) -> HttpResponse:
         "courses/course_list.html",
         {
             "courses": courses,
+            "next_cursor": next_cursor,
             "pending_jobs": pending_jobs,
         },
     )
 
 
+def api_course_list_page(request: HttpRequest) -> HttpResponse:
+    """Return JSON {html, next_cursor}: rendered course cards for the page after ?after=<cursor> (infinite scroll)."""
+    courses, next_cursor = keyset_page(_browse_courses(), request.GET.get("after"), settings.COURSE_LIST_PAGE_SIZE)
+    html = "".join(render_to_string("partials/course_card.html", {"course": course}) for course in courses)
+    return JsonResponse({"html": html, "next_cursor": next_cursor})
+
+
+def _json_response(data: BaseModel) -> HttpResponse:
+    """Compact JSON of a pydantic model, omitting unset optional fields."""
+    return HttpResponse(data.model_dump_json(exclude_none=True), content_type="application/json")
+
+
+@gzip_page
+def api_courses(request: HttpRequest) -> HttpResponse:
+    """JSON list of courses, newest first, one keyset page at a time (?after=<cursor>).
+
+    The ETag is a hash of the page, so clients can revalidate with If-None-Match and get 304 Not Modified.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    courses, next_cursor = keyset_page(_browse_courses(), request.GET.get("after"), settings.COURSE_LIST_PAGE_SIZE)
+    response = _json_response(
+        CoursePageOut(
+            courses=[course_summary_out(course, course.num_exercises) for course in courses],
+            next_cursor=next_cursor,
+        )
+    )
+    set_response_etag(response)
+    patch_cache_control(response, public=True, no_cache=True)
+    return get_conditional_response(request, etag=response["ETag"], response=response) or response
+
+
+@gzip_page
+@cache_course_page("api", anonymous_only=False)
+def api_course(request: HttpRequest, slug: str) -> HttpResponse:
+    """JSON of a whole course: metadata, cheatsheet, exercises without their answers, and flashcards.
+
+    Served through the course page cache with an ETag of the course version, so clients keeping a course
+    offline revalidate it with If-None-Match and get 304 Not Modified until it is edited.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    course = get_object_or_404(Course.objects.select_related("created_by"), slug=slug)
+    return _json_response(course_detail_out(course))
+
+
 @login_required
 def course_create(request: HttpRequest) -> HttpResponse:
-    """Create a new course: show form (GET) or create job, start background thread, redirect (POST)."""
+    """Create a new course: show form (GET) or queue a generation job (or reuse a cached course) and redirect (POST)."""
     if request.method != "POST":
         form = CreateCourseForm()
         return render(request, "courses/course_create.html", {"form": form})
@@ -169,52 +123,65 @@ def course_create(request: HttpRequest) -> HttpResponse:
     if not topic:
         form.add_error("topic", "Topic is required.")
         return render(request, "courses/course_create.html", {"form": form})
-    include_questions = form.cleaned_data.get("include_questions", True)
-    include_flashcards = form.cleaned_data.get("include_flashcards", False)
-    num_exercises = form.cleaned_data.get("num_exercises")
-    num_flashcards = form.cleaned_data.get("num_flashcards")
-    job = CourseGenerationJob.objects.create(
-        status=CourseGenerationJob.Status.PENDING,
-        created_by_id=request.user.id,
-        topic=topic[:255],
-    )
-    thread = threading.Thread(
-        target=_run_generation,
-        args=(
-            str(job.id),
-            topic,
-            request.user.id,
-            form.cleaned_data["difficulty"],
-            form.cleaned_data.get("additional_instructions") or None,
-            include_questions,
-            num_exercises,
-            include_flashcards,
-            num_flashcards,
-        ),
-        daemon=True,
+    job = enqueue_generation(
+        request.user.id,
+        topic,
+        difficulty=form.cleaned_data["difficulty"],
+        additional_instructions=form.cleaned_data.get("additional_instructions") or None,
+        include_questions=form.cleaned_data.get("include_questions", True),
+        num_exercises=form.cleaned_data.get("num_exercises"),
+        include_flashcards=form.cleaned_data.get("include_flashcards", False),
+        num_flashcards=form.cleaned_data.get("num_flashcards"),
+        force_fresh=form.cleaned_data.get("force_fresh", False),
     )
-    thread.start()
+    if job.status == CourseGenerationJob.Status.COMPLETE and job.course is not None:
+        # Served from the generation cache: no need to wait for a worker.
+        return redirect("courses:detail", slug=job.course.slug)
     return redirect("courses:list")
 
 
 @login_required
 def generating_view(request: HttpRequest, job_id: str) -> HttpResponse:
-    """Show the generating progress page; JS polls job_status_api until complete."""
+    """Show the generating progress page; JS follows the job on the event stream (or polls job_status_api)."""
     job = get_object_or_404(CourseGenerationJob, pk=job_id)
     return render(request, "courses/generating.html", {"job": job})
 
 
 @login_required
 def job_status_api(request: HttpRequest, job_id: str) -> HttpResponse:
-    """Return JSON {status, message, course_slug} for polling."""
-    job = get_object_or_404(CourseGenerationJob, pk=job_id)
-    data = {
-        "status": job.status,
-        "message": job.status_message or "",
-        "course_slug": job.course.slug if job.course else None,
-        "error": job.error or "",
-    }
-    return JsonResponse(data)
+    """Return JSON {status, message, course_slug, error, version} for polling.
+
+    The job's version is the ETag: a poll whose If-None-Match carries the current version gets an empty 304.
+    """
+    job = get_object_or_404(CourseGenerationJob.objects.select_related("course"), pk=job_id)
+    etag = f'"{job.version}"'
+    response: HttpResponse
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(job_status_payload(job))
+    response["ETag"] = etag
+    return response
+
+
+@login_required
+def job_status_batch_api(request: HttpRequest) -> HttpResponse:
+    """Return JSON {jobs: [...]} for several of the current user's jobs in one query.
+
+    Jobs are passed as repeated ?job=<id>:<version> parameters (the version part is optional); only jobs
+    whose version differs from the client's are returned, each in the job_status_api format.
+    """
+    known: dict[uuid.UUID, int | None] = {}
+    for value in request.GET.getlist("job")[:MAX_BATCH_JOBS]:
+        job_id, _, version = value.partition(":")
+        try:
+            known[uuid.UUID(job_id)] = int(version) if version else None
+        except ValueError:
+            continue
+    user_id = request.user.id
+    assert user_id is not None
+    jobs = CourseGenerationJob.objects.filter(pk__in=known, created_by_id=user_id).select_related("course")
+    return JsonResponse({"jobs": [job_status_payload(job) for job in jobs if known[job.pk] != job.version]})
 
 
 @login_required
@@ -224,21 +191,25 @@ def api_notifications(request: HttpRequest) -> HttpResponse:
         return JsonResponse({"detail": "Method not allowed."}, status=405)
     user_id = request.user.id
     assert user_id is not None
-    qs = Notification.objects.filter(user_id=user_id, read=False).order_by("-created_at")
-    items = [
-        {
-            "id": n.id,
-            "message": n.message,
-            "course_slug": n.course.slug if n.course else None,
-        }
-        for n in qs[:20]
-    ]
-    return JsonResponse(
-        {
-            "count": qs.count(),
-            "items": items,
-        }
-    )
+    return JsonResponse(notification_snapshot(user_id))
+
+
+async def event_stream(request: HttpRequest) -> HttpResponseBase:
+    """Server-sent event stream of the current user's notifications and generation jobs (see courses.events).
+
+    Only served under ASGI: a WSGI worker would buffer the whole stream, so there the view answers 204 No
+    Content, which makes the browser's EventSource give up and the page fall back to polling.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required."}, status=401)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(user_events(user.pk), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx-style proxies not to buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 @login_required
@@ -248,7 +219,8 @@ def api_mark_all_notifications_read(request: HttpRequest) -> HttpResponse:
         return JsonResponse({"detail": "Method not allowed."}, status=405)
     user_id = request.user.id
     assert user_id is not None
-    Notification.objects.filter(user_id=user_id, read=False).update(read=True)
+    if Notification.objects.filter(user_id=user_id, read=False).update(read=True):
+        bump_user_events([user_id])
     return JsonResponse({"success": True})
 
 
@@ -260,34 +232,45 @@ def api_mark_notification_read(request: HttpRequest, notification_id: int) -> Ht
     user_id = request.user.id
     assert user_id is not None
     updated = Notification.objects.filter(id=notification_id, user_id=user_id, read=False).update(read=True)
+    if updated:
+        bump_user_events([user_id])
     return JsonResponse({"success": True, "updated": updated})
 
 
+@cache_course_page("detail")
 def course_detail(request: HttpRequest, slug: str) -> HttpResponse:
-    """Show course overview, cheatsheet, exercise count, and progress (X/Y) for the current user."""
-    course = get_object_or_404(Course, slug=slug)
-    exercises = list(course.exercises.order_by("order_index"))
-    total_flashcards = course.flashcards.count()
+    """Show course overview, cheatsheet, exercise count, and progress (X/Y) for the current user.
+
+    Anonymous requests are served from the page cache; the template caches the overview and cheatsheet.
+    """
+    # .get() rather than get_object_or_404, which would drop the annotations from the returned type.
+    courses = Course.objects.select_related("created_by").annotate(
+        total_exercises=Count("exercises", distinct=True),
+        total_flashcards=Count("flashcards", distinct=True),
+    )
+    try:
+        course = courses.get(slug=slug)
+    except Course.DoesNotExist:
+        raise Http404("No Course matches the given query.") from None
     completed_count = 0
-    if request.user.is_authenticated and exercises:
+    if request.user.is_authenticated and course.total_exercises:
         completed_count = (
-            UserProgress.objects.filter(
-                user=request.user,
-                exercise__course=course,
-            )
-            .values("exercise")
-            .distinct()
-            .count()
+            CourseProgress.objects.filter(user=request.user, course=course)
+            .values_list("completed_count", flat=True)
+            .first()
+            or 0
         )
+        # The rollup keeps ids of exercises that may since have been deleted; never report more than exist.
+        completed_count = min(completed_count, course.total_exercises)
     return render(
         request,
         "courses/course_detail.html",
         {
             "course": course,
-            "exercises": exercises,
             "completed_count": completed_count,
-            "total_exercises": len(exercises),
-            "total_flashcards": total_flashcards,
+            "total_exercises": course.total_exercises,
+            "total_flashcards": course.total_flashcards,
+            "fragment_cache_ttl": settings.COURSE_PAGE_CACHE_TTL,
         },
     )
 
@@ -302,104 +285,64 @@ def course_start(request: HttpRequest, slug: str) -> HttpResponse:
     return redirect("courses:exercise", slug=slug, index=0)
 
 
+@cache_course_page("flashcards")
 def flashcards_view(request: HttpRequest, slug: str) -> HttpResponse:
-    """Show all flashcards for a course in a flip-card UI."""
+    """Show all flashcards for a course in a flip-card UI.
+
+    Anonymous requests are served from the page cache. The template caches the cards as a fragment, and
+    the flashcards queryset is only evaluated when that fragment is rendered.
+    """
     course = get_object_or_404(Course, slug=slug)
-    flashcards = list(course.flashcards.order_by("order_index"))
     return render(
         request,
         "courses/flashcards.html",
         {
             "course": course,
-            "flashcards": flashcards,
-            "total_flashcards": len(flashcards),
+            "flashcards": course.flashcards.order_by("order_index"),
+            "fragment_cache_ttl": settings.COURSE_PAGE_CACHE_TTL,
         },
     )
 
 
-def _check_multiple_choice(exercise: Exercise, selected_index: Any) -> bool:
-    """Return True if the selected option index matches the correct answer."""
-    try:
-        idx = int(selected_index)
-        return 0 <= idx < len(exercise.payload.get("options", [])) and idx == exercise.payload.get("correct_index")
-    except (TypeError, ValueError):
-        return False
-
-
-def _check_matching(exercise: Exercise, selected_by_left: dict[int, Any]) -> bool:
-    """Return True if each left item is matched to the correct right item (by original index)."""
-    pairs = exercise.payload.get("pairs", [])
-    if len(selected_by_left) != len(pairs):
-        return False
-    for i in range(len(pairs)):
-        val = selected_by_left.get(i)
-        if val is None:
-            return False
-        try:
-            if int(val) != i:
-                return False
-        except (TypeError, ValueError):
-            return False
-    return True
+def _exercise_count(course: Course) -> int:
+    """Number of exercises in the course, cached per course version (edits change the key)."""
+    return get_or_compute(
+        make_key("course-exercise-count", course.pk, course.cache_version),
+        lambda: course.exercises.count(),
+        settings.COURSE_PAGE_CACHE_TTL,
+    )
 
 
 @login_required
 def exercise_view(request: HttpRequest, slug: str, index: int) -> HttpResponse:
     """Show one exercise (GET) or validate answer and redirect to next / complete (POST)."""
-    course = get_object_or_404(Course, slug=slug)
-    exercises = list(course.exercises.order_by("order_index"))
-    if index < 0 or index >= len(exercises):
+    # The URL index is the exercise's position in the course, not its order_index: deleting an exercise (e.g. in
+    # the admin) leaves a gap in order_index. Slicing keeps this a single LIMIT/OFFSET query.
+    exercises = Exercise.objects.select_related("course").filter(course__slug=slug).order_by("order_index")
+    exercise = next(iter(exercises[index : index + 1]), None)
+    if exercise is None:
+        get_object_or_404(Course.objects.only("pk"), slug=slug)
         return redirect("courses:detail", slug=slug)
-    exercise = exercises[index]
+    course = exercise.course
+    total = _exercise_count(course)
 
     if request.method == "POST":
-        correct = False
-        selected_answer = None
-        matching_result = None
-        if exercise.exercise_type == Exercise.ExerciseType.MULTIPLE_CHOICE:
-            selected_answer = request.POST.get("answer")
-            correct = _check_multiple_choice(exercise, selected_answer)
-        elif exercise.exercise_type == Exercise.ExerciseType.MATCHING_PAIRS:
-            pairs = exercise.payload.get("pairs", [])
-            selected = {i: request.POST.get(f"match_{i}") for i in range(len(pairs))}
-            correct = _check_matching(exercise, selected)
-            # Build read-only result for template: list of {left, correct_right, user_right}
-            matching_result = []
-            for i in range(len(pairs)):
-                try:
-                    raw = selected.get(i)
-                    user_idx = int(raw) if raw is not None and raw != "" else None
-                except (TypeError, ValueError):
-                    user_idx = None
-                matching_result.append(
-                    {
-                        "left": pairs[i]["left"],
-                        "correct_right": pairs[i]["right"],
-                        "user_right": (
-                            pairs[user_idx]["right"] if user_idx is not None and 0 <= user_idx < len(pairs) else "-"
-                        ),
-                        "is_correct": user_idx == i,
-                    }
-                )
-        # @login_required guarantees request.user is the concrete user model
-        UserProgress.objects.create(
-            user=request.user,  # type: ignore[misc]
-            exercise=exercise,
-            correct=correct,
-        )
+        key = answer_key(exercise)
+        result = grade(key, answer_from_form(key, request.POST))
+        user_id = request.user.id
+        assert user_id is not None
+        record_attempt(user_id, exercise, result.correct)
         # Render same page with feedback below answers (no redirect)
         context = {
             "course": course,
             "exercise": exercise,
             "index": index,
-            "total": len(exercises),
+            "total": total,
             "answered": True,
-            "correct": correct,
-            "explanation": exercise.payload.get("explanation", ""),
-            "selected_answer": (
-                int(selected_answer) if isinstance(selected_answer, str) and selected_answer != "" else None
-            ),
-            "matching_result": matching_result,
+            "correct": result.correct,
+            "explanation": result.explanation,
+            "selected_answer": result.selected_answer,
+            "matching_result": result.matching_result,
         }
         return render(request, "courses/exercise.html", context)
 
@@ -408,7 +351,7 @@ def exercise_view(request: HttpRequest, slug: str, index: int) -> HttpResponse:
         "course": course,
         "exercise": exercise,
         "index": index,
-        "total": len(exercises),
+        "total": total,
         "answered": False,
         "correct": None,
         "explanation": "",
@@ -422,3 +365,85 @@ def exercise_view(request: HttpRequest, slug: str, index: int) -> HttpResponse:
         context["left_items"] = [p["left"] for p in pairs]
         context["right_options"] = [(right_indices[k], pairs[right_indices[k]]["right"]) for k in range(len(pairs))]
     return render(request, "courses/exercise.html", context)
+
+
+def _submit_quiz(
+    request: HttpRequest, course: Course, keys: list[AnswerKey], answers: dict[int, Answer]
+) -> list[Grade]:
+    """Grade a whole-course submission and record one attempt per exercise with a single bulk insert."""
+    grades = grade_answers(keys, answers)
+    user_id = request.user.id
+    assert user_id is not None
+    record_attempts(user_id, course.pk, [(g.exercise_id, g.correct) for g in grades])
+    return grades
+
+
+@login_required
+def quiz_view(request: HttpRequest, slug: str) -> HttpResponse:
+    """Show every exercise of a course on one page (GET), or grade the whole submitted quiz at once (POST).
+
+    Form fields are those of the exercise page, prefixed with ex<exercise id>_. Exercises left unanswered
+    are graded (and recorded) as wrong.
+    """
+    course = get_object_or_404(Course, slug=slug)
+    exercises = list(course.exercises.order_by("order_index"))
+    if not exercises:
+        return redirect("courses:detail", slug=slug)
+    rng = random.Random()
+    items = [exercise_out(exercise, rng).model_dump() for exercise in exercises]
+    grades: list[Grade] | None = None
+    if request.method == "POST":
+        keys = answer_keys(course, exercises)
+        answers = {key.exercise_id: answer_from_form(key, request.POST, prefix=f"ex{key.exercise_id}_") for key in keys}
+        grades = _submit_quiz(request, course, keys, answers)
+        by_id = {g.exercise_id: g for g in grades}
+        for item in items:
+            item["grade"] = by_id.get(item["id"])
+    context = {
+        "course": course,
+        "items": items,
+        "total": len(items),
+        "answered": grades is not None,
+        "score": sum(g.correct for g in grades) if grades is not None else None,
+    }
+    return render(request, "courses/quiz.html", context)
+
+
+@login_required
+def quiz_api(request: HttpRequest, slug: str) -> HttpResponse:
+    """JSON quiz mode: GET returns every exercise of the course (without answers); POST grades them all.
+
+    POST a JSON body {"answers": {"<exercise id>": answer}}, where an answer is the option index (multiple
+    choice) or the list of chosen right-item values per left item (matching). The response has the score
+    and per-exercise feedback.
+
+    The POST is CSRF-protected like the site's other JSON endpoints: the GET sets the csrftoken cookie and
+    returns the same value as csrf_token, which the POST must echo in the X-CSRFToken header.
+    """
+    if request.method == "GET":
+        course = get_object_or_404(Course, slug=slug)
+        rng = random.Random()
+        items = [exercise_out(e, rng).model_dump(exclude_none=True) for e in course.exercises.order_by("order_index")]
+        return JsonResponse(
+            {
+                "course": {"slug": course.slug, "title": course.title},
+                "exercises": items,
+                "csrf_token": get_token(request),
+            }
+        )
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    try:
+        raw_answers = json.loads(request.body)["answers"]
+        answers: dict[int, Answer] = {int(exercise_id): answer for exercise_id, answer in raw_answers.items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({"detail": 'Expected a JSON body {"answers": {"<exercise id>": answer}}.'}, status=400)
+    course = get_object_or_404(Course, slug=slug)
+    grades = _submit_quiz(request, course, answer_keys(course), answers)
+    return JsonResponse(
+        {
+            "score": sum(g.correct for g in grades),
+            "total": len(grades),
+            "results": [asdict(g) for g in grades],
+        }
+    )
@@ -0,0 +1,225 @@
+"""Generation workers: claim queued CourseGenerationJob rows and run them with bounded concurrency.
+
+GenerationWorker runs each job on a pool thread (one blocked thread and DB connection per generation).
+AsyncGenerationWorker runs each job as a coroutine on a single event loop, so concurrency is bounded by
+a semaphore rather than by threads and one process can drive many more concurrent LLM calls.
+"""
+
+import abc
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .generation import arun_generation, run_generation
+from .job_queue import claim_next_job, heartbeat, requeue_stale_jobs
+from .models import CourseGenerationJob
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """Identifier unique to this worker process: host, pid, and a random suffix."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class BaseGenerationWorker(abc.ABC):
+    """Configuration and queue maintenance shared by the threaded and asyncio workers."""
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        poll_interval: float = 2.0,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 120.0,
+        max_attempts: int = 3,
+        worker_id: str | None = None,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = timedelta(seconds=stale_after)
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or default_worker_id()
+
+    @abc.abstractmethod
+    def stop(self) -> None:
+        """Stop claiming new jobs; run() returns once in-flight jobs are done."""
+
+    @abc.abstractmethod
+    def run(self, once: bool = False) -> None:
+        """Process jobs until stop() is called (or, with once=True, until the queue is empty)."""
+
+    def _claim(self) -> CourseGenerationJob | None:
+        """Claim the next job to run, or return None if there is none right now."""
+        return claim_next_job(self.worker_id)
+
+    def _maintain(self, active_job_ids: list[str]) -> None:
+        """Heartbeat this worker's running jobs and re-queue jobs orphaned by dead workers."""
+        heartbeat(self.worker_id, active_job_ids)
+        requeued, failed = requeue_stale_jobs(self.stale_after, self.max_attempts)
+        if requeued or failed:
+            logger.warning("Re-queued %d and failed %d orphaned jobs", requeued, failed)
+
+
+class GenerationWorker(BaseGenerationWorker):
+    """Claims pending jobs and runs them on a thread pool of `concurrency` threads.
+
+    While jobs run, the worker heartbeats them and periodically re-queues jobs orphaned by
+    workers that died (no heartbeat for `stale_after`). On stop() it stops claiming and waits
+    for in-flight jobs to finish.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stopping = threading.Event()
+        self._active: dict[str, Future[None]] = {}
+        self._last_maintenance = 0.0
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def run(self, once: bool = False) -> None:
+        logger.info("Generation worker %s started (concurrency=%d)", self.worker_id, self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="generation") as executor:
+            while not self._stopping.is_set():
+                self._reap()
+                self._maintain_if_due()
+                claimed = self._fill(executor)
+                if once and not claimed and not self._active:
+                    break
+                if not claimed:
+                    self._stopping.wait(self.poll_interval)
+            self._drain()
+        close_old_connections()
+        logger.info("Generation worker %s stopped", self.worker_id)
+
+    def _fill(self, executor: ThreadPoolExecutor) -> bool:
+        """Claim jobs until all slots are busy or the queue is empty. Returns True if anything was claimed."""
+        claimed = False
+        while len(self._active) < self.concurrency and not self._stopping.is_set():
+            job = self._claim()
+            if job is None:
+                break
+            job_id = str(job.pk)
+            logger.info("Claimed job %s (attempt %d)", job_id, job.attempts)
+            self._active[job_id] = executor.submit(self._run_job, job_id)
+            claimed = True
+        return claimed
+
+    def _run_job(self, job_id: str) -> None:
+        close_old_connections()
+        try:
+            run_generation(job_id)
+        except Exception:
+            logger.exception("Job %s crashed", job_id)
+        finally:
+            close_old_connections()
+
+    def _reap(self) -> None:
+        for job_id in [job_id for job_id, future in self._active.items() if future.done()]:
+            del self._active[job_id]
+
+    def _maintain_if_due(self) -> None:
+        now = time.monotonic()
+        if now - self._last_maintenance < self.heartbeat_interval:
+            return
+        self._last_maintenance = now
+        self._maintain(list(self._active))
+
+    def _drain(self) -> None:
+        """Wait for in-flight jobs, heartbeating them so other workers do not re-queue them meanwhile."""
+        while self._active:
+            self._maintain_if_due()
+            wait(list(self._active.values()), timeout=self.heartbeat_interval)
+            self._reap()
+
+
+class AsyncGenerationWorker(BaseGenerationWorker):
+    """Claims pending jobs and runs each as a coroutine on one event loop.
+
+    An asyncio.Semaphore of size `concurrency` caps in-flight generations; a slot is taken before
+    claiming and released when the job's task finishes. Heartbeats and re-queueing run in a
+    background task. Database work goes through sync_to_async on Django's shared sync thread.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping: asyncio.Event | None = None
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    def stop(self) -> None:
+        # Safe to call from a signal handler or another thread.
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    def run(self, once: bool = False) -> None:
+        asyncio.run(self._main(once))
+
+    async def _main(self, once: bool) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        slots = asyncio.Semaphore(self.concurrency)
+        logger.info("Async generation worker %s started (concurrency=%d)", self.worker_id, self.concurrency)
+        maintenance = asyncio.create_task(self._maintenance_loop())
+        try:
+            while not self._stopping.is_set():
+                await slots.acquire()
+                if self._stopping.is_set():
+                    slots.release()
+                    break
+                job = await sync_to_async(self._claim)()
+                if job is None:
+                    slots.release()
+                    if once and not self._tasks:
+                        break
+                    await self._sleep(self.poll_interval)
+                    continue
+                job_id = str(job.pk)
+                logger.info("Claimed job %s (attempt %d)", job_id, job.attempts)
+                task = asyncio.create_task(self._run_job(job_id))
+                self._tasks[job_id] = task
+                task.add_done_callback(functools.partial(self._finish, job_id, slots))
+            if self._tasks:
+                await asyncio.wait(list(self._tasks.values()))
+        finally:
+            maintenance.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await maintenance
+            await sync_to_async(close_old_connections)()
+        logger.info("Async generation worker %s stopped", self.worker_id)
+
+    def _finish(self, job_id: str, slots: asyncio.Semaphore, _task: asyncio.Task[None]) -> None:
+        self._tasks.pop(job_id, None)
+        slots.release()
+
+    async def _run_job(self, job_id: str) -> None:
+        try:
+            await arun_generation(job_id)
+        except Exception:
+            logger.exception("Job %s crashed", job_id)
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            try:
+                await sync_to_async(self._maintain)(list(self._tasks))
+            except Exception:
+                logger.exception("Queue maintenance failed")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep, waking early if stop() is called."""
+        assert self._stopping is not None
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
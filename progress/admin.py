@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import UserProgress
+from .models import CourseProgress, UserProgress
 
 
 @admin.register(UserProgress)
@@ -9,3 +9,11 @@ class UserProgressAdmin(admin.ModelAdmin):
 
     list_display = ("user", "exercise", "correct", "completed_at")
     list_filter = ("correct",)
+
+
+@admin.register(CourseProgress)
+class CourseProgressAdmin(admin.ModelAdmin):
+    """Admin for CourseProgress rollups: list by user, course, counts, and last activity."""
+
+    list_display = ("user", "course", "completed_count", "correct_count", "attempt_count", "last_activity")
+    readonly_fields = ("attempted_exercise_ids", "correct_exercise_ids")
@@ -1,4 +1,4 @@
-"""Progress app: UserProgress model for exercise attempts."""
+"""Progress app: UserProgress attempt log and CourseProgress rollups."""
 
 from django.apps import AppConfig
 
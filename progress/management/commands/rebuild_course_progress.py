@@ -0,0 +1,24 @@
+"""Rebuild CourseProgress rollups from the UserProgress attempt log (backfill or repair)."""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from progress.rollup import rebuild_course_progress
+
+
+class Command(BaseCommand):
+    help = "Recompute per-user, per-course progress rollups from recorded exercise attempts."
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild rollups for this user id (repeatable). Defaults to all users.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        written = rebuild_course_progress(options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} course progress rollup(s)."))
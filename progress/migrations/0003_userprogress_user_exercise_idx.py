@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("progress", "0002_course_progress"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userprogress",
+            index=models.Index(fields=["user", "exercise"], name="userprogress_user_exercise_idx"),
+        ),
+    ]
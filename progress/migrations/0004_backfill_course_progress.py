@@ -0,0 +1,49 @@
+from django.db import migrations
+from django.db.models import Count, Max, Q
+
+
+def backfill_course_progress(apps, schema_editor):
+    """Build CourseProgress rollups from the existing attempt log, so progress survives the upgrade."""
+    UserProgress = apps.get_model("progress", "UserProgress")
+    CourseProgress = apps.get_model("progress", "CourseProgress")
+    grouped = (
+        UserProgress.objects.values("user_id", "exercise__course_id", "exercise_id")
+        .annotate(
+            attempts=Count("pk"),
+            any_correct=Count("pk", filter=Q(correct=True)),
+            last_at=Max("completed_at"),
+        )
+        .order_by("user_id", "exercise__course_id", "exercise_id")
+    )
+    existing = set(CourseProgress.objects.values_list("user_id", "course_id"))
+    rollups = {}
+    for row in grouped.iterator(chunk_size=1000):
+        key = (row["user_id"], row["exercise__course_id"])
+        if key in existing:
+            continue
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = CourseProgress(
+                user_id=key[0], course_id=key[1], attempted_exercise_ids=[], correct_exercise_ids=[]
+            )
+        rollup.attempted_exercise_ids.append(row["exercise_id"])
+        if row["any_correct"]:
+            rollup.correct_exercise_ids.append(row["exercise_id"])
+        rollup.attempt_count += row["attempts"]
+        if rollup.last_activity is None or row["last_at"] > rollup.last_activity:
+            rollup.last_activity = row["last_at"]
+    for rollup in rollups.values():
+        rollup.completed_count = len(rollup.attempted_exercise_ids)
+        rollup.correct_count = len(rollup.correct_exercise_ids)
+    CourseProgress.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("progress", "0003_userprogress_user_exercise_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_course_progress, migrations.RunPython.noop),
+    ]
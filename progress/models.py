@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from django.conf import settings
 from django.db import models
 
@@ -22,6 +24,56 @@ class UserProgress(models.Model):
 
     class Meta:
         ordering = ["-completed_at"]
+        indexes = [
+            # Attempts by a user on given exercises (progress lookups and the rollup rebuild's GROUP BY).
+            models.Index(fields=["user", "exercise"], name="userprogress_user_exercise_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} – {self.exercise} ({'correct' if self.correct else 'wrong'})"
+
+
+class CourseProgress(models.Model):
+    """Per-user, per-course rollup of UserProgress, maintained as attempts are recorded.
+
+    Progress pages read this single row instead of counting distinct exercises over the attempt log.
+    attempted_exercise_ids and correct_exercise_ids hold the ids of exercises answered at least once
+    (and correctly at least once); the counts mirror their lengths.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="course_progress",
+    )
+    course = models.ForeignKey(
+        "courses.Course",
+        on_delete=models.CASCADE,
+        related_name="progress_rollups",
+    )
+    completed_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    attempt_count = models.PositiveIntegerField(default=0)
+    attempted_exercise_ids = models.JSONField(default=list)
+    correct_exercise_ids = models.JSONField(default=list)
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "course"], name="unique_course_progress"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} – {self.course} ({self.completed_count} completed)"
+
+    def add_attempt(self, exercise_id: int, correct: bool, at: datetime) -> None:
+        """Fold one attempt into the rollup (does not save)."""
+        if exercise_id not in self.attempted_exercise_ids:
+            self.attempted_exercise_ids.append(exercise_id)
+        if correct and exercise_id not in self.correct_exercise_ids:
+            self.correct_exercise_ids.append(exercise_id)
+        self.completed_count = len(self.attempted_exercise_ids)
+        self.correct_count = len(self.correct_exercise_ids)
+        self.attempt_count += 1
+        if self.last_activity is None or at > self.last_activity:
+            self.last_activity = at
@@ -0,0 +1,82 @@
+"""Maintain CourseProgress rollups: fold new attempts in incrementally, or rebuild them from the attempt log."""
+
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from courses.models import Exercise
+
+from .models import CourseProgress, UserProgress
+
+_REBUILD_BATCH_SIZE = 1000
+
+
+def record_attempt(user_id: int, exercise: Exercise, correct: bool) -> UserProgress:
+    """Log an attempt and update the user's rollup for the exercise's course in the same transaction."""
+    return record_attempts(user_id, exercise.course_id, [(exercise.pk, correct)])[0]
+
+
+def record_attempts(user_id: int, course_id: int, results: Iterable[tuple[int, bool]]) -> list[UserProgress]:
+    """Log attempts on one course's exercises, given as (exercise_id, correct), and update the rollup.
+
+    However many attempts there are, they are written with one bulk insert and one rollup update.
+    """
+    with transaction.atomic():
+        attempts = UserProgress.objects.bulk_create(
+            [
+                UserProgress(user_id=user_id, exercise_id=exercise_id, correct=correct)
+                for exercise_id, correct in results
+            ]
+        )
+        CourseProgress.objects.get_or_create(user_id=user_id, course_id=course_id)
+        # Lock the row so concurrent attempts by the same user (e.g. two tabs) never lose an update.
+        rollup = CourseProgress.objects.select_for_update().get(user_id=user_id, course_id=course_id)
+        for attempt in attempts:
+            rollup.add_attempt(attempt.exercise_id, attempt.correct, attempt.completed_at)
+        rollup.save()
+    return attempts
+
+
+def rebuild_course_progress(user_ids: Iterable[int] | None = None) -> int:
+    """Recompute rollups from UserProgress (all users, or only user_ids). Returns the number of rows written.
+
+    The attempt log is read once, grouped by (user, exercise), so the cost is one pass over the log
+    rather than one query per user or course.
+    """
+    attempts = UserProgress.objects.all()
+    stale = CourseProgress.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        attempts = attempts.filter(user_id__in=user_ids)
+        stale = stale.filter(user_id__in=user_ids)
+    grouped = (
+        attempts.values("user_id", "exercise__course_id", "exercise_id")
+        .annotate(
+            attempts=Count("pk"),
+            any_correct=Count("pk", filter=Q(correct=True)),
+            last_at=Max("completed_at"),
+        )
+        .order_by("user_id", "exercise__course_id", "exercise_id")
+    )
+
+    written = 0
+    with transaction.atomic():
+        stale.delete()
+        batch: list[CourseProgress] = []
+        current: CourseProgress | None = None
+        for row in grouped.iterator(chunk_size=_REBUILD_BATCH_SIZE):
+            key = (row["user_id"], row["exercise__course_id"])
+            if current is None or (current.user_id, current.course_id) != key:
+                current = CourseProgress(user_id=key[0], course_id=key[1])
+                batch.append(current)
+            current.add_attempt(row["exercise_id"], row["any_correct"] > 0, row["last_at"])
+            current.attempt_count += row["attempts"] - 1
+            if len(batch) > _REBUILD_BATCH_SIZE:
+                # Keep the rollup still being filled; flush the finished ones.
+                CourseProgress.objects.bulk_create(batch[:-1])
+                written += len(batch) - 1
+                batch = batch[-1:]
+        CourseProgress.objects.bulk_create(batch)
+        written += len(batch)
+    return written
@@ -1 +1,127 @@
-# Create your tests here.
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from courses.models import Course, Exercise
+
+from .models import CourseProgress, UserProgress
+from .rollup import rebuild_course_progress, record_attempt, record_attempts
+
+User = get_user_model()
+
+
+class CourseProgressTests(TestCase):
+    """Tests for maintaining and rebuilding CourseProgress rollups."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="learner", password="testpass123")
+        self.course = Course.objects.create(title="Python", slug="python", overview="o", cheatsheet="c")
+        self.exercises = [
+            Exercise.objects.create(
+                course=self.course,
+                order_index=i,
+                exercise_type=Exercise.ExerciseType.MULTIPLE_CHOICE,
+                question=f"Q{i}",
+                payload={"options": ["a", "b"], "correct_index": 0},
+            )
+            for i in range(3)
+        ]
+
+    def test_record_attempt_updates_rollup(self) -> None:
+        """Repeated attempts count each exercise once; correct_count tracks exercises ever answered correctly."""
+        record_attempt(self.user.pk, self.exercises[0], False)
+        record_attempt(self.user.pk, self.exercises[0], True)
+        last = record_attempt(self.user.pk, self.exercises[1], False)
+
+        rollup = CourseProgress.objects.get(user=self.user, course=self.course)
+        self.assertEqual(rollup.completed_count, 2)
+        self.assertEqual(rollup.correct_count, 1)
+        self.assertEqual(rollup.attempt_count, 3)
+        self.assertEqual(rollup.last_activity, last.completed_at)
+        self.assertEqual(UserProgress.objects.filter(user=self.user).count(), 3)
+
+    def test_record_attempts_writes_batch_in_one_insert(self) -> None:
+        """A batch of attempts is written with one insert and counts as the single calls would."""
+        results = [(self.exercises[0].pk, True), (self.exercises[1].pk, False), (self.exercises[2].pk, True)]
+        with CaptureQueriesContext(connection) as queries:
+            attempts = record_attempts(self.user.pk, self.course.pk, results)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "progress_userprogress"')]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(UserProgress.objects.filter(user=self.user).count(), 3)
+        rollup = CourseProgress.objects.get(user=self.user, course=self.course)
+        self.assertEqual((rollup.completed_count, rollup.correct_count, rollup.attempt_count), (3, 2, 3))
+
+    def test_exercise_view_records_attempt_in_rollup(self) -> None:
+        """Answering an exercise updates the rollup shown on the course page."""
+        self.client.force_login(self.user)
+        self.client.post(reverse("courses:exercise", args=[self.course.slug, 0]), {"answer": "0"})
+
+        response = self.client.get(reverse("courses:detail", args=[self.course.slug]))
+        self.assertEqual(response.context["completed_count"], 1)
+        self.assertEqual(CourseProgress.objects.get(user=self.user).correct_count, 1)
+
+    def test_rebuild_matches_incremental_rollup(self) -> None:
+        """Rebuilding from the attempt log reproduces the incrementally maintained rollup."""
+        record_attempt(self.user.pk, self.exercises[0], False)
+        record_attempt(self.user.pk, self.exercises[2], True)
+        record_attempt(self.user.pk, self.exercises[2], False)
+        expected = CourseProgress.objects.get(user=self.user)
+
+        # Attempts logged before rollups existed are picked up by the rebuild.
+        UserProgress.objects.create(user=self.user, exercise=self.exercises[1], correct=True)
+        out = StringIO()
+        call_command("rebuild_course_progress", stdout=out)
+
+        rollup = CourseProgress.objects.get(user=self.user)
+        self.assertIn("Rebuilt 1 course progress rollup(s).", out.getvalue())
+        self.assertEqual(rollup.completed_count, expected.completed_count + 1)
+        self.assertEqual(rollup.correct_count, expected.correct_count + 1)
+        self.assertEqual(rollup.attempt_count, 4)
+        self.assertCountEqual(rollup.attempted_exercise_ids, [e.pk for e in self.exercises])
+
+    def test_rebuild_limited_to_users(self) -> None:
+        """Rebuilding for some users leaves other users' rollups alone."""
+        other = User.objects.create_user(username="other", password="testpass123")
+        record_attempt(self.user.pk, self.exercises[0], True)
+        record_attempt(other.pk, self.exercises[0], True)
+        CourseProgress.objects.filter(user=other).update(completed_count=99)
+
+        self.assertEqual(rebuild_course_progress([self.user.pk]), 1)
+        self.assertEqual(CourseProgress.objects.get(user=other).completed_count, 99)
+
+    def test_backfill_migration_builds_missing_rollups(self) -> None:
+        """The data migration creates rollups from attempts logged before rollups existed, keeping existing ones."""
+        backfill = import_module("progress.migrations.0004_backfill_course_progress").backfill_course_progress
+        other = User.objects.create_user(username="other", password="testpass123")
+        UserProgress.objects.create(user=self.user, exercise=self.exercises[0], correct=False)
+        UserProgress.objects.create(user=self.user, exercise=self.exercises[0], correct=True)
+        UserProgress.objects.create(user=self.user, exercise=self.exercises[1], correct=False)
+        record_attempt(other.pk, self.exercises[2], True)
+
+        backfill(apps, None)
+
+        rollup = CourseProgress.objects.get(user=self.user, course=self.course)
+        self.assertEqual((rollup.completed_count, rollup.correct_count, rollup.attempt_count), (2, 1, 3))
+        self.assertEqual(CourseProgress.objects.filter(user=other).count(), 1)
+
+    def test_progress_never_exceeds_exercise_count(self) -> None:
+        """Rollup ids of deleted exercises do not push progress past 100%."""
+        for exercise in self.exercises:
+            record_attempt(self.user.pk, exercise, True)
+        self.exercises[2].delete()
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("courses:detail", args=[self.course.slug]))
+        self.assertEqual(response.context["completed_count"], 2)
+        response = self.client.get(reverse("dashboard"))
+        [item] = response.context["taken_courses_with_progress"]
+        self.assertEqual((item["completed_exercises"], item["progress_pct"]), (2, 100))
@@ -6,6 +6,10 @@ from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from courses.generation import enqueue_generation, generation_fingerprint
+from courses.models import Course, Exercise
+from progress.rollup import record_attempt
+
 User = get_user_model()
 
 
@@ -100,3 +104,63 @@ class LoginViewTests(TestCase):
         client.force_login(self.user)
         response = client.get(reverse("login"))
         self.assertEqual(response.status_code, 302)
+
+
+class DashboardViewTests(TestCase):
+    """Tests for the dashboard's course and progress listing."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="learner", password="testpass123")
+        self.other = User.objects.create_user(username="teacher", password="testpass123")
+        self.client.force_login(self.user)
+
+    def _course(self, slug: str, owner, exercises: int = 3) -> Course:
+        course = Course.objects.create(title=slug, slug=slug, overview="o", cheatsheet="c", created_by=owner)
+        for i in range(exercises):
+            Exercise.objects.create(
+                course=course, order_index=i, exercise_type="multiple_choice", question="q", payload={}
+            )
+        return course
+
+    def test_dashboard_lists_created_and_taken_courses_with_progress(self) -> None:
+        """Created courses and courses with attempts are listed separately with distinct completed counts."""
+        mine = self._course("mine", self.user)
+        taken = self._course("taken", self.other, exercises=4)
+        self._course("untouched", self.other)
+        first, second, *_, last = taken.exercises.all()
+        for exercise, correct in ((first, False), (first, True), (second, True)):
+            record_attempt(self.user.pk, exercise, correct)
+        record_attempt(self.other.pk, last, True)
+
+        response = self.client.get(reverse("dashboard"))
+
+        created = response.context["courses_with_progress"]
+        taking = response.context["taken_courses_with_progress"]
+        self.assertEqual([item["course"] for item in created], [mine])
+        self.assertEqual(created[0]["completed_exercises"], 0)
+        self.assertEqual([item["course"] for item in taking], [taken])
+        self.assertEqual(taking[0]["total_exercises"], 4)
+        self.assertEqual(taking[0]["completed_exercises"], 2)
+        self.assertEqual(taking[0]["progress_pct"], 50)
+
+    def test_dashboard_lists_course_reused_for_request(self) -> None:
+        """A request served from another user's identical course lists that course under the user's own courses."""
+        cached = self._course("rust", self.other)
+        Course.objects.filter(pk=cached.pk).update(generation_fingerprint=generation_fingerprint("Rust"))
+        job = enqueue_generation(self.user.pk, "Rust")
+        self.assertEqual(job.course, cached)
+
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual([item["course"] for item in response.context["courses_with_progress"]], [cached])
+        self.assertEqual(response.context["taken_courses_with_progress"], [])
+
+    def test_dashboard_query_count_does_not_grow_with_courses(self) -> None:
+        """Progress for every course comes from a single query over the rollups."""
+        for n in range(5):
+            course = self._course(f"course-{n}", self.user if n % 2 else self.other)
+            record_attempt(self.user.pk, course.exercises.all()[0], True)
+        # Session and user lookups, then the course/progress query.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(len(response.context["courses_with_progress"]), 2)
+        self.assertEqual(len(response.context["taken_courses_with_progress"]), 3)
@@ -1,12 +1,15 @@
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.views import LoginView, LogoutView
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views.generic import FormView
 
-from progress.models import UserProgress
+from courses.models import Course, CourseGenerationJob
+from progress.models import CourseProgress
 
 
 def home(request: HttpRequest) -> HttpResponse:
@@ -17,39 +20,54 @@ def home(request: HttpRequest) -> HttpResponse:
 
 
 def dashboard(request: HttpRequest) -> HttpResponse:
-    """Dashboard showing links to My courses and Browse all courses."""
+    """Dashboard with the courses the user created or requested and the courses they are taking, with progress."""
     if not request.user.is_authenticated:
         return redirect("login")
 
-    created_courses = list(request.user.created_courses.prefetch_related("exercises").all())
-
-    # Build a per-course progress map: {course_id: completed_exercise_count}
-    course_ids = [c.pk for c in created_courses]
-    progress_qs = (
-        UserProgress.objects.filter(user=request.user, exercise__course_id__in=course_ids)
-        .values("exercise__course_id", "exercise_id")
-        .distinct()
+    user = request.user
+    # The user's progress rollup for the outer course: a unique (user, course) index lookup.
+    completed = CourseProgress.objects.filter(user=user, course=OuterRef("pk")).values("completed_count")
+    # Courses the user asked for: generated for them, or reused from an identical request (cache hit, follower).
+    requested = CourseGenerationJob.objects.filter(created_by=user, status=CourseGenerationJob.Status.COMPLETE)
+    courses = (
+        Course.objects.filter(
+            Q(created_by=user)
+            | Q(pk__in=requested.values("course"))
+            | Q(pk__in=CourseProgress.objects.filter(user=user).values("course"))
+        )
+        .annotate(
+            total_exercises=Count("exercises"),
+            completed_exercises=Coalesce(Subquery(completed), 0),
+            requested=Exists(requested.filter(course=OuterRef("pk"))),
+        )
+        .order_by("-created_at")
     )
-    completed_by_course: dict[int, int] = {}
-    for row in progress_qs:
-        cid = row["exercise__course_id"]
-        completed_by_course[cid] = completed_by_course.get(cid, 0) + 1
 
     courses_with_progress = []
-    for course in created_courses:
-        total = course.exercises.count()
-        completed = completed_by_course.get(course.pk, 0)
-        pct = round(completed / total * 100) if total > 0 else 0
-        courses_with_progress.append(
-            {
-                "course": course,
-                "total_exercises": total,
-                "completed_exercises": completed,
-                "progress_pct": pct,
-            }
-        )
-
-    return render(request, "users/dashboard.html", {"courses_with_progress": courses_with_progress})
+    taken_courses_with_progress = []
+    for course in courses:
+        total = course.total_exercises
+        # The rollup keeps ids of exercises that may since have been deleted; never report more than exist.
+        completed_count = min(course.completed_exercises, total)
+        item = {
+            "course": course,
+            "total_exercises": total,
+            "completed_exercises": completed_count,
+            "progress_pct": round(completed_count / total * 100) if total > 0 else 0,
+        }
+        if course.created_by_id == user.pk or course.requested:
+            courses_with_progress.append(item)
+        else:
+            taken_courses_with_progress.append(item)
+
+    return render(
+        request,
+        "users/dashboard.html",
+        {
+            "courses_with_progress": courses_with_progress,
+            "taken_courses_with_progress": taken_courses_with_progress,
+        },
+    )
 
 
 class RegisterView(FormView):